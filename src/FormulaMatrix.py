@@ -0,0 +1,69 @@
+import numpy as np
+
+class FormulaMatrix:
+    """NumPy view of the formula for vectorized evaluation of many assignments at once.
+    Literals are stored CSR style (flat var indexes + signs, clause offsets); when clause lengths are
+    uniform enough a padded (clauses x max_len) matrix is used instead, padding is masked out"""
+    def __init__(self, num_vars, clauses, weights, normalized_weights):
+        self.num_vars = num_vars
+        self.num_clauses = len(clauses)
+        self.weights = np.asarray(weights, dtype=np.int64)
+        self.normalized_weights = np.asarray(normalized_weights, dtype=np.float64)
+
+        lengths = np.fromiter((len(c) for c in clauses), dtype=np.int64, count=self.num_clauses)
+        literals = np.fromiter((lit for c in clauses for lit in c), dtype=np.int64, count=int(lengths.sum()))
+
+        # CSR
+        self.clause_offsets = np.zeros(self.num_clauses + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.clause_offsets[1:])
+        self.var_indices = np.abs(literals) - 1
+        self.signs = literals > 0
+        # empty clauses are never satisfied, reduceat would read the next clause's literal for them instead
+        self.nonempty = None if lengths.all() else lengths > 0
+
+        # Padded, only if it does not blow up memory on skewed clause lengths
+        self.max_len = int(lengths.max()) if self.num_clauses else 0
+        self.padded = self.num_clauses > 0 and self.max_len * self.num_clauses <= 2 * len(literals)
+        if self.padded:
+            positions = np.arange(self.max_len)
+            self.mask = positions[None, :] < lengths[:, None]
+            self.padded_vars = np.zeros((self.num_clauses, self.max_len), dtype=np.int64)
+            self.padded_signs = np.zeros((self.num_clauses, self.max_len), dtype=bool)
+            self.padded_vars[self.mask] = self.var_indices
+            self.padded_signs[self.mask] = self.signs
+
+    def clause_satisfaction(self, assignments):
+        """(rows x clauses) bool matrix, True where clause is satisfied by the row assignment"""
+        if self.num_clauses == 0:
+            return np.ones((assignments.shape[0], 0), dtype=bool)
+        if self.padded:
+            literal_true = (assignments[:, self.padded_vars] == self.padded_signs) & self.mask
+            return literal_true.any(axis=2)
+        literal_true = assignments[:, self.var_indices] == self.signs
+        if self.nonempty is None:
+            return np.logical_or.reduceat(literal_true, self.clause_offsets[:-1], axis=1)
+        satisfied = np.zeros((assignments.shape[0], self.num_clauses), dtype=bool)
+        if len(self.var_indices):
+            satisfied[:, self.nonempty] = np.logical_or.reduceat(literal_true, self.clause_offsets[:-1][self.nonempty],
+                                                                 axis=1)
+        return satisfied
+
+    def evaluate(self, assignments, chunk_size=None):
+        """
+        Evaluates a batch of assignments given as (rows x num_vars) array of 0/1 or bools, 1-D array is one row.
+        Returns raw scores, normalized scores and number of violated clauses per row.
+        Rows are processed in chunks so the intermediate (rows x clauses x k) array stays bounded.
+        """
+        assignments = np.atleast_2d(np.asarray(assignments)).astype(bool, copy=False)
+        rows = assignments.shape[0]
+        if chunk_size is None:
+            # about 16M literal checks per chunk
+            chunk_size = max(1, (1 << 24) // max(1, len(self.var_indices)))
+
+        raw = assignments @ self.weights
+        norm = assignments @ self.normalized_weights
+        violated = np.empty(rows, dtype=np.int64)
+        for start in range(0, rows, chunk_size):
+            chunk = assignments[start:start + chunk_size]
+            violated[start:start + chunk_size] = self.num_clauses - self.clause_satisfaction(chunk).sum(axis=1)
+        return raw, norm, violated
@@ -1,22 +1,53 @@
 import os
-from collections import defaultdict
+import hashlib
+from OccurrenceIndex import OccurrenceIndex, ArrayRows
+from FormulaMatrix import FormulaMatrix
+from mwcnf_parser import parse_mwcnf
+import instance_cache
 
 class MWSATInstance:
     """Efficient implementation of MWSATInstance. Keeps track of which clauses variables occur in, stores weight info and clause to index conversion dict"""
-    def __init__(self, filepath, penalty_violation_factor=2):
+    def __init__(self, filepath, penalty_violation_factor=2, use_compiled=True, write_compiled=False, compiled_dir=None,
+                 compiled=None, strict=False, formula=None, views=False):
+        """
+        use_compiled - load from an up to date compiled (.mwbin) file when there is one, see instance_cache
+        write_compiled - compile the instance after parsing the text file, so next load can use it
+        compiled_dir - where compiled files live, next to the source file by default
+        compiled - already loaded CompiledInstance (e.g. attached shared memory), filepath is then only informative
+        strict - header counts that do not match the file raise ValueError instead of printing a warning, a literal
+                 over the declared variable count raises either way
+        formula - (num_vars, weights, clause_offsets, literals) flat arrays to build the instance from, no file is read
+        views - with compiled, clauses, weights and the occurrence index are read in place from its arrays (memoryview
+                rows, see OccurrenceIndex.ArrayRows) instead of being copied into Python lists - for shared memory,
+                only normalized_weights (one float per variable) is built per process
+        Text files (plain or gzip/xz/bz2) are read by mwcnf_parser, parse statistics end up in self.parse_info
+        """
         self.filepath = filepath
         self.num_vars = 0
         self.num_clauses = 0
         self.weights = [] 
         self.normalized_weights = [] # weights in [0,1] range
         self.clauses = [] 
-        self.clause_lookup = defaultdict(list) # which clauses variable is in
-
-        self._load_instance()
-        self._init_clause_lookup()
+        self.occurrences = None # var -> clause ids and literal signs
+        self.clause_lookup = None # which clauses variable is in, built on first get_clauses_for_var
+        self.formula_matrix = None # NumPy representation for batch evaluation, built on first use
+        self.parse_info = None # mwcnf_parser.ParsedFormula without the arrays, None when loaded compiled
+        self._fingerprint = None
+
+        if compiled is None and formula is None and use_compiled:
+            compiled = instance_cache.load_compiled(filepath, compiled_dir)
+        if formula is not None:
+            self._init_from_arrays(*formula)
+            self.occurrences = OccurrenceIndex(self.num_vars, self.clauses)
+        elif compiled is not None:
+            self._init_from_compiled(compiled, views)
+        else:
+            self._load_instance(strict)
+            if write_compiled:
+                instance_cache.write_compiled(self, filepath, compiled_dir)
 
         self.total_raw_weight = sum(self.weights) # maximal possible weight
-        self.max_single_weight = max(self.weights) if self.weights else 1
+        self.max_single_weight = max(self.weights, default=0) or 1 # all zero weights (e.g. reduced instance) normalize to 0
 
         # Normalize weights to range [0, 1]
         self.normalized_weights = [w / self.max_single_weight for w in self.weights]
@@ -27,35 +58,64 @@ class MWSATInstance:
         self.penalty_factor = penalty_violation_factor 
 
 
-    def _load_instance(self):
-        with open(self.filepath, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('c') or line.startswith('%'):
-                    continue
-                parts = line.split()
-                if line.startswith('p'):
-                    self.num_vars = int(parts[2])
-                    self.num_clauses = int(parts[3])
-                elif line.startswith('w'):
-                    w_values = [int(x) for x in parts[1:] if x != '0']
-                    self.weights.extend(w_values)
-                else:
-                    literals = [int(x) for x in parts if x != '0']
-                    if literals:
-                        self.clauses.append(tuple(literals))
-
-    def _init_clause_lookup(self):
-        """fills self.clause_lookup:  variable -> clauses it is in"""
-        for var_idx in range(self.num_vars):
+    def _load_instance(self, strict=False):
+        parsed = parse_mwcnf(self.filepath, strict=strict)
+        for problem in parsed.problems:
+            print(f"Warning: {os.path.basename(self.filepath)}: {problem}")
+        self._init_from_arrays(parsed.num_vars, parsed.weights, parsed.clause_offsets, parsed.literals)
+        self.occurrences = OccurrenceIndex(self.num_vars, self.clauses)
+        # arrays are in the instance now, keep only the counts and timing
+        parsed.weights = parsed.clause_offsets = parsed.literals = None
+        self.parse_info = parsed
+
+    def _init_from_arrays(self, num_vars, weights, clause_offsets, literals):
+        """Fills num_vars, weights and clauses from flat int arrays (clause i is literals[offsets[i]:offsets[i + 1]]),
+        shared by the text parser and compiled instances"""
+        self.num_vars = num_vars
+        self.weights = weights.tolist()
+        literals = literals.tolist()
+        offsets = clause_offsets.tolist()
+        self.clauses = [tuple(literals[offsets[i]:offsets[i + 1]]) for i in range(len(offsets) - 1)]
+
+    def _init_from_compiled(self, compiled, views=False):
+        """Fills clauses, weights and occurrence index from flat arrays of a compiled instance - no text parsing"""
+        if views:
+            self.num_vars = compiled.num_vars
+            self.weights = memoryview(compiled.weights)
+            self.clauses = ArrayRows(compiled.clause_offsets, compiled.literals)
+        else:
+            self._init_from_arrays(compiled.num_vars, compiled.weights, compiled.clause_offsets, compiled.literals)
+        self.occurrences = OccurrenceIndex.from_arrays(compiled.num_vars, compiled.occ_offsets, compiled.occ_clause_ids,
+                                                       compiled.occ_signs, compiled.tautologies, compiled.cv_offsets,
+                                                       compiled.cv_vars, views=views)
+
+    def fingerprint(self):
+        """Content hash of the formula and weights, identifies the instance independently of its file path"""
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            digest.update(f"{self.num_vars} {len(self.clauses)}\n".encode())
+            digest.update(" ".join(map(str, self.weights)).encode())
             for clause in self.clauses:
-                for lit in clause:
-                    if abs(lit) == var_idx + 1:
-                        self.clause_lookup[var_idx].append(clause)
+                digest.update(("\n" + " ".join(map(str, clause))).encode())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
 
     def get_clauses_for_var(self, var):
+        """Clause tuples the variable occurs in - the lookup is built for all variables on the first call,
+        solvers use the occurrence index and never pay for it"""
+        if self.clause_lookup is None:
+            clauses = self.clauses
+            self.clause_lookup = [[clauses[clause_id] for clause_id in ids] for ids in self.occurrences.clause_ids]
         return self.clause_lookup[abs(var) - 1]
 
+    def get_clause_ids_for_var(self, var):
+        return self.occurrences.get_clause_ids(abs(var) - 1)
+
+    def get_occurrences_for_var(self, var):
+        """Clause ids the variable occurs in and whether the literal is positive there (parallel lists)"""
+        var_idx = abs(var) - 1
+        return self.occurrences.clause_ids[var_idx], self.occurrences.signs[var_idx]
+
     def get_weight_for_variable(self, variable):
         return self.weights[abs(variable) - 1]
 
@@ -73,6 +133,7 @@ class MWSATInstance:
         return count
 
     def is_satisfied_in_clause(self, clause, variable, variable_value):
+        """Legacy, scans the clause - flips read the literal sign from self.occurrences instead"""
         # Check if the specific literal in this clause matches the value
         target_lit = 0
         for x in clause:
@@ -97,4 +158,10 @@ class MWSATInstance:
                 variable_score_norm += self.normalized_weights[i]
 
         is_valid = (violated_count == 0)
-        return variable_score, variable_score_norm, is_valid
\ No newline at end of file
+        return variable_score, variable_score_norm, is_valid
+
+    def evaluate_batch(self, solutions):
+        """Vectorized evaluate of (rows x num_vars) 0/1 array, returns arrays of raw scores, normalized scores and violated clause counts"""
+        if self.formula_matrix is None:
+            self.formula_matrix = FormulaMatrix(self.num_vars, self.clauses, self.weights, self.normalized_weights)
+        return self.formula_matrix.evaluate(solutions)
@@ -1,14 +1,20 @@
 from MWSATInstance import MWSATInstance
+from UnsatClauseSet import UnsatClauseSet
+from array import array
 import random
 
 class MWSATSolution:
     """For tracking current state of solution, effective - flipping automatically recalculates weight price"""
-    def __init__(self, mwsat: MWSATInstance):
+    def __init__(self, mwsat: MWSATInstance, variable_values=None, rng=random):
+        """Random initial assignment drawn from rng (random.Random, global random module by default), or the given 0/1 sequence"""
         self.instance = mwsat
-        self.variable_values = [random.choice([0, 1]) for _ in range(mwsat.num_vars)]
+        if variable_values is None:
+            self.variable_values = bytearray(rng.choice([0, 1]) for _ in range(mwsat.num_vars))
+        else:
+            self.variable_values = bytearray(int(v) for v in variable_values)
         
-        self.satisfied_in_clause = {} # satisfied literals in clauses
-        self.unsatisfied_clauses = set() # unsatisfied clauses for efficient getting of literals to flip
+        self.satisfied_in_clause = array('i') # clause id -> satisfied literals in clause
+        self.unsatisfied_clauses = UnsatClauseSet(len(mwsat.clauses)) # unsatisfied clause ids for efficient getting of literals to flip
         
         
         raw, norm, _ = mwsat.evaluate(self.variable_values) # get initial scores
@@ -18,20 +24,50 @@ class MWSATSolution:
         
         self.clauses_satisfied = 0 
 
-        #init clauses satisfied
-        for clause in self.instance.clauses:
-            sat_count = self.instance.get_satisfied_vars_in_clause_count(clause, self.variable_values)
-            self.satisfied_in_clause[clause] = sat_count
+        self._init_clause_state()
+
+    def _init_clause_state(self):
+        """Counts true literals per clause from the occurrence index and fills the make/break cache.
+        true_vars_xor keeps xor of (var_idx + 1) over true literals - with one true literal it is the critical variable"""
+        occurrences = self.instance.occurrences
+        num_clauses = len(self.instance.clauses)
+        values = self.variable_values
+
+        self.satisfied_in_clause = array('i', [0]) * num_clauses
+        self.true_vars_xor = array('i', [0]) * num_clauses
+        self.make_count = array('i', [0]) * self.instance.num_vars # unsat clauses flipping the variable would satisfy
+        self.break_count = array('i', [0]) * self.instance.num_vars # sat clauses flipping the variable would break
+
+        satisfied_in_clause = self.satisfied_in_clause
+        true_vars_xor = self.true_vars_xor
+        for var_idx in range(self.instance.num_vars):
+            value = values[var_idx]
+            for clause_id, positive in zip(occurrences.clause_ids[var_idx], occurrences.signs[var_idx]):
+                if positive == value:
+                    satisfied_in_clause[clause_id] += 1
+                    true_vars_xor[clause_id] ^= var_idx + 1
+        for clause_id in occurrences.tautologies:
+            satisfied_in_clause[clause_id] = 1 # always satisfied, never touched by flips
+
+        for clause_id in range(num_clauses):
+            sat_count = satisfied_in_clause[clause_id]
             if sat_count > 0:
                 self.clauses_satisfied += 1
+                if sat_count == 1 and true_vars_xor[clause_id]:
+                    self.break_count[true_vars_xor[clause_id] - 1] += 1
             else:
-                self.unsatisfied_clauses.add(clause)
+                self.unsatisfied_clauses.add(clause_id)
+                for var_idx in occurrences.clause_vars[clause_id]:
+                    self.make_count[var_idx] += 1
 
     def copy(self):
         new_sol = MWSATSolution.__new__(MWSATSolution)
         new_sol.instance = self.instance
         new_sol.variable_values = self.variable_values[:]
-        new_sol.satisfied_in_clause = self.satisfied_in_clause.copy()
+        new_sol.satisfied_in_clause = self.satisfied_in_clause[:]
+        new_sol.true_vars_xor = self.true_vars_xor[:]
+        new_sol.make_count = self.make_count[:]
+        new_sol.break_count = self.break_count[:]
         new_sol.unsatisfied_clauses = self.unsatisfied_clauses.copy()
         
         new_sol.current_score = self.current_score
@@ -39,12 +75,23 @@ class MWSATSolution:
         new_sol.clauses_satisfied = self.clauses_satisfied
         return new_sol
 
+    def flip_delta(self, variable):
+        """O(1) effect of flipping variable without touching the state: (satisfied clauses delta, raw score delta, normalized score delta)"""
+        var_idx = variable - 1
+        sat_delta = self.make_count[var_idx] - self.break_count[var_idx]
+        if self.variable_values[var_idx] == 1:
+            return sat_delta, -self.instance.weights[var_idx], -self.instance.normalized_weights[var_idx]
+        return sat_delta, self.instance.weights[var_idx], self.instance.normalized_weights[var_idx]
+
     def update_variable_and_score(self, variable):
-        """Updates variable and score, if new clause satisfied then updated clauses_satisfied, if new is broken, it is removed so it is as efficient as possible"""
-        variable_value_before = self.variable_values[variable - 1]
+        """Updates variable and score, if new clause satisfied then updated clauses_satisfied, if new is broken, it is removed so it is as efficient as possible.
+        Keeps make/break counts of affected variables up to date"""
+        var_idx = variable - 1
+        variable_value_before = self.variable_values[var_idx]
+        instance = self.instance
         
-        raw_w = self.instance.get_weight_for_variable(variable)
-        norm_w = self.instance.get_normalized_weight_for_variable(variable) # <--- Fetch normalized
+        raw_w = instance.weights[var_idx]
+        norm_w = instance.normalized_weights[var_idx]
 
         # Update Scores - new variable 1 means new score increase
         if variable_value_before == 1:
@@ -56,51 +103,75 @@ class MWSATSolution:
             self.current_score += raw_w
             self.current_score_norm += norm_w
 
-        # Update Clauses - if new clause is satisfied or broken
-        for clause in self.instance.get_clauses_for_var(variable):
-            number_of_satisfied_in_clause = self.satisfied_in_clause[clause]
-            is_var_satisfied_in_clause_before = self.instance.is_satisfied_in_clause(clause, variable, variable_value_before)
+        # Update Clauses - if new clause is satisfied or broken, literal sign is precomputed per occurrence
+        occurrences = instance.occurrences
+        clause_vars = occurrences.clause_vars
+        satisfied_in_clause = self.satisfied_in_clause
+        true_vars_xor = self.true_vars_xor
+        make_count = self.make_count
+        break_count = self.break_count
+        unsatisfied_clauses = self.unsatisfied_clauses
+        clauses_satisfied = self.clauses_satisfied
+        for clause_id, positive in zip(occurrences.clause_ids[var_idx], occurrences.signs[var_idx]):
+            number_of_satisfied_in_clause = satisfied_in_clause[clause_id]
 
-            if is_var_satisfied_in_clause_before:
-                self.satisfied_in_clause[clause] -= 1
+            if positive == variable_value_before: # literal was true before the flip
+                satisfied_in_clause[clause_id] = number_of_satisfied_in_clause - 1
+                remaining = true_vars_xor[clause_id] ^ variable
+                true_vars_xor[clause_id] = remaining
                 if number_of_satisfied_in_clause == 1:
-                    self.clauses_satisfied -= 1
-                    self.unsatisfied_clauses.add(clause)
+                    # clause broken - every variable in it can now make it
+                    clauses_satisfied -= 1
+                    unsatisfied_clauses.add(clause_id)
+                    break_count[var_idx] -= 1
+                    for other_idx in clause_vars[clause_id]:
+                        make_count[other_idx] += 1
+                elif number_of_satisfied_in_clause == 2:
+                    # last true literal becomes critical
+                    break_count[remaining - 1] += 1
             else:
-                self.satisfied_in_clause[clause] += 1
+                satisfied_in_clause[clause_id] = number_of_satisfied_in_clause + 1
                 if number_of_satisfied_in_clause == 0:
-                    self.clauses_satisfied += 1
-                    self.unsatisfied_clauses.remove(clause)
+                    clauses_satisfied += 1
+                    unsatisfied_clauses.remove(clause_id)
+                    break_count[var_idx] += 1
+                    for other_idx in clause_vars[clause_id]:
+                        make_count[other_idx] -= 1
+                elif number_of_satisfied_in_clause == 1:
+                    # previously critical literal is no longer alone
+                    break_count[true_vars_xor[clause_id] - 1] -= 1
+                true_vars_xor[clause_id] ^= variable
 
-        self.variable_values[variable - 1] = 1 - self.variable_values[variable - 1] # flip
+        self.clauses_satisfied = clauses_satisfied
+        self.variable_values[var_idx] = 1 - variable_value_before # flip
 
 
-    def pick_variable_to_flip(self, random_flip=False):
+    def pick_variable_to_flip(self, random_flip=False, rng=random):
         if random_flip:
-            return random.randint(1, self.instance.num_vars)
+            return rng.randint(1, self.instance.num_vars)
         
         # Heuristic: Prioritize variables in unsatisfied clauses
         if self.unsatisfied_clauses:
-            clause = random.choice(list(self.unsatisfied_clauses))
+            clause = self.instance.clauses[self.unsatisfied_clauses.random_choice(rng)]
             # Pick a random literal from that clause
-            literal = random.choice(clause) 
+            literal = rng.choice(clause) 
             return abs(literal)
         else:
             # fallback when all clauses are satisfied
-            return random.randint(1, self.instance.num_vars)
+            return rng.randint(1, self.instance.num_vars)
 
 
-    def generate_neighbor(self, random_flip=False):
+    def generate_neighbor(self, random_flip=False, rng=random):
         """Legacy, uneffective - copying itself is unnecessary, this logic is now done in simulated_annealing function"""
         new_solution = self.copy()
         if random_flip:
-            var_to_flip = random.randint(1, self.instance.num_vars)
+            var_to_flip = rng.randint(1, self.instance.num_vars)
         elif len(new_solution.unsatisfied_clauses) > 0:
-            random_unsat_clause = random.choice(list(new_solution.unsatisfied_clauses))
-            random_literal = random.choice(random_unsat_clause)
+            random_unsat_clause = self.instance.clauses[new_solution.unsatisfied_clauses.random_choice(rng)]
+            random_literal = rng.choice(random_unsat_clause)
             var_to_flip = abs(random_literal)
         else:
-            var_to_flip = random.randint(1, self.instance.num_vars)
+            var_to_flip = rng.randint(1, self.instance.num_vars)
 
         new_solution.update_variable_and_score(var_to_flip)
         return new_solution
@@ -0,0 +1,105 @@
+from collections.abc import Sequence
+
+
+class OccurrenceIndex:
+    """Variable -> occurrences lookup, built in a single pass over the clauses.
+    For every variable stores the ids of clauses it occurs in and the sign of the literal there,
+    so the cost of building it is linear in formula size (sum of clause lengths).
+    Repeated literals in a clause are indexed once and clauses containing both x and -x are not indexed at all
+    (no flip can falsify them), so every variable occurs at most once per indexed clause"""
+    def __init__(self, num_vars, clauses):
+        self.num_vars = num_vars
+        self.clause_ids = [[] for _ in range(num_vars)] # var_idx -> clause ids
+        self.signs = [[] for _ in range(num_vars)] # var_idx -> True if literal is positive in that clause
+        self.clause_vars = [] # clause id -> var indexes in the clause (without repeats)
+        self.tautologies = [] # ids of clauses that are always satisfied
+
+        for clause_id, clause in enumerate(clauses):
+            literals = dict.fromkeys(clause) # drops repeated literals, keeps order
+            if any(-lit in literals for lit in literals):
+                self.tautologies.append(clause_id)
+                self.clause_vars.append(())
+                continue
+
+            clause_vars = []
+            for lit in literals:
+                var_idx = abs(lit) - 1
+                if var_idx >= self.num_vars:
+                    raise ValueError(f"literal {lit} of clause {clause_id} is outside of the {num_vars} declared variables")
+                self.clause_ids[var_idx].append(clause_id)
+                self.signs[var_idx].append(lit > 0)
+                clause_vars.append(var_idx)
+            self.clause_vars.append(tuple(clause_vars))
+
+    @classmethod
+    def from_arrays(cls, num_vars, occ_offsets, occ_clause_ids, occ_signs, tautologies, cv_offsets, cv_vars,
+                    views=False):
+        """Rebuilds the index from flat arrays (see to_arrays) without looking at the clauses.
+        With views the per variable and per clause rows are ArrayRows over the arrays (e.g. in shared memory)
+        instead of Python lists - nothing is copied, signs are then 1/0 instead of True/False"""
+        index = cls.__new__(cls)
+        index.num_vars = num_vars
+        index.tautologies = tautologies.tolist()
+        if views:
+            index.clause_ids = ArrayRows(occ_offsets, occ_clause_ids)
+            index.signs = ArrayRows(occ_offsets, occ_signs)
+            index.clause_vars = ArrayRows(cv_offsets, cv_vars)
+            return index
+
+        clause_ids = occ_clause_ids.tolist()
+        signs = [sign == 1 for sign in occ_signs.tolist()]
+        offsets = occ_offsets.tolist()
+        index.clause_ids = [clause_ids[offsets[i]:offsets[i + 1]] for i in range(num_vars)]
+        index.signs = [signs[offsets[i]:offsets[i + 1]] for i in range(num_vars)]
+        clause_vars = cv_vars.tolist()
+        offsets = cv_offsets.tolist()
+        index.clause_vars = [tuple(clause_vars[offsets[i]:offsets[i + 1]]) for i in range(len(offsets) - 1)]
+        return index
+
+    def to_arrays(self):
+        """Flat CSR form: occurrence offsets per variable, clause ids, signs (1/0), tautology ids and
+        clause_vars as offsets per clause and var indexes"""
+        occ_offsets = [0]
+        for ids in self.clause_ids:
+            occ_offsets.append(occ_offsets[-1] + len(ids))
+        occ_clause_ids = [clause_id for ids in self.clause_ids for clause_id in ids]
+        occ_signs = [1 if sign else 0 for signs in self.signs for sign in signs]
+        cv_offsets = [0]
+        for clause_vars in self.clause_vars:
+            cv_offsets.append(cv_offsets[-1] + len(clause_vars))
+        cv_vars = [var_idx for clause_vars in self.clause_vars for var_idx in clause_vars]
+        return occ_offsets, occ_clause_ids, occ_signs, self.tautologies, cv_offsets, cv_vars
+
+    def get_clause_ids(self, var_idx):
+        return self.clause_ids[var_idx]
+
+    def get_signs(self, var_idx):
+        return self.signs[var_idx]
+
+    def occurrence_count(self, var_idx):
+        return len(self.clause_ids[var_idx])
+
+    def __len__(self):
+        """Total number of indexed literal occurrences"""
+        return sum(len(ids) for ids in self.clause_ids)
+
+
+class ArrayRows(Sequence):
+    """Read only list of rows of a CSR pair - rows[i] is a memoryview of values[offsets[i]:offsets[i + 1]], so rows
+    of arrays in shared memory stay shared. Indexes are non negative (no rows[-1])"""
+    def __init__(self, offsets, values):
+        self.offsets = memoryview(offsets)
+        self.values = memoryview(values)
+
+    def __getitem__(self, i):
+        offsets = self.offsets
+        return self.values[offsets[i]:offsets[i + 1]]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        values = self.values
+        offsets = self.offsets.tolist()
+        for i in range(len(offsets) - 1):
+            yield values[offsets[i]:offsets[i + 1]]
@@ -0,0 +1,49 @@
+from array import array
+import random
+
+class UnsatClauseSet:
+    """Set of clause ids with O(1) add, remove and random sample.
+    Ids are kept densely packed in a list, positions map clause id -> index in that list (-1 when absent),
+    removal swaps the last id into the freed slot"""
+    def __init__(self, num_clauses):
+        self.items = []
+        self.positions = array('i', [-1]) * num_clauses
+
+    def add(self, clause_id):
+        if self.positions[clause_id] != -1:
+            return
+        self.positions[clause_id] = len(self.items)
+        self.items.append(clause_id)
+
+    def remove(self, clause_id):
+        position = self.positions[clause_id]
+        if position == -1:
+            raise KeyError(clause_id)
+        last = self.items.pop()
+        if last != clause_id:
+            # move last id into the freed slot
+            self.items[position] = last
+            self.positions[last] = position
+        self.positions[clause_id] = -1
+
+    def random_choice(self, rng=random):
+        """Random clause id, the set must not be empty. rng is a random.Random, the global random module by default"""
+        return self.items[int(rng.random() * len(self.items))]
+
+    def copy(self):
+        new_set = UnsatClauseSet.__new__(UnsatClauseSet)
+        new_set.items = self.items[:]
+        new_set.positions = self.positions[:]
+        return new_set
+
+    def __contains__(self, clause_id):
+        return self.positions[clause_id] != -1
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
@@ -0,0 +1,221 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from MWSATInstance import MWSATInstance
+from MWSATSolution import MWSATSolution
+from simulated_annealing import simulated_annealing, set_delta, calibrate_initial_temperature
+from trace_recorders import NoTrace
+from mwcnf_parser import parse_mwcnf
+from instance_dataset import read_optima, instance_key
+from benchmarks import generate_instance, QUICK_PARAMS
+
+# Fixed benchmark inputs - changing any of these makes results incomparable with older files, bump SUITE_VERSION
+SUITE_VERSION = 1
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+SETS = ("wuf20-91", "wuf50-218", "wuf75-325")
+INSTANCES_PER_SET = 3
+SEEDS = (0, 1, 2)
+TIME_TO_TARGET_LIMIT = 10.0 # seconds, runs that do not reach the optimum count with this time
+LARGE_SIZE = (10000, 40000)
+
+
+def _measure(function, repeats):
+    """Min and median wall time of repeats calls - min is what is compared, noise from other processes only adds time"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def _result(value, unit, better, **extra):
+    row = {"value": value, "unit": unit, "better": better}
+    row.update(extra)
+    return row
+
+
+def _set_paths(set_name):
+    subset = os.path.join(DATA_DIR, set_name, f"{set_name}-M")
+    names = sorted(name for name in os.listdir(subset) if name.endswith(".mwcnf"))[:INSTANCES_PER_SET]
+    optima = read_optima(subset + "-opt.dat")
+    return [(os.path.join(subset, name), optima[instance_key(name)]) for name in names]
+
+
+def bench_instance_load(results, large_path, repeats):
+    for set_name in SETS:
+        paths = [path for path, _ in _set_paths(set_name)]
+        best, median = _measure(lambda: [MWSATInstance(path, use_compiled=False) for path in paths], repeats)
+        results[f"load/{set_name}"] = _result(best / len(paths) * 1000, "ms", "lower", median=median / len(paths) * 1000)
+    best, median = _measure(lambda: MWSATInstance(large_path, use_compiled=False), max(1, repeats // 2))
+    results["load/generated-large"] = _result(best * 1000, "ms", "lower", median=median * 1000)
+    best, median = _measure(lambda: parse_mwcnf(large_path), repeats)
+    megabytes = os.path.getsize(large_path) / 1e6
+    results["parse/generated-large"] = _result(megabytes / best, "MB/s", "higher", median=megabytes / median)
+
+
+def bench_flips(results, large_path, repeats, flips=100000):
+    for label, path in (("wuf75-325", _set_paths("wuf75-325")[0][0]), ("generated-large", large_path)):
+        instance = MWSATInstance(path)
+        rng = random.Random(0)
+        variables = [rng.randint(1, instance.num_vars) for _ in range(flips)]
+        state = MWSATSolution(instance, rng=rng)
+
+        def flip_all():
+            for var in variables:
+                state.update_variable_and_score(var)
+        best, median = _measure(flip_all, repeats)
+        results[f"flips/{label}"] = _result(flips / best, "flips/s", "higher", median=flips / median)
+
+
+def bench_calibration(results, repeats):
+    for set_name in SETS:
+        instance = MWSATInstance(_set_paths(set_name)[0][0])
+        best, median = _measure(lambda: set_delta(instance, 1e6, cooling_coefficient=1, equilibrium_steps=100, steps=3000,
+                                                  fitness_coefficient=QUICK_PARAMS["fitness_coefficient"], seed=0), repeats)
+        results[f"calibration/{set_name}"] = _result(best * 1000, "ms", "lower", median=median * 1000)
+
+
+def bench_time_to_target(results):
+    """
+    Fixed seed runs to the known optimum - same seeds give the same trajectories, so only speed differs.
+    Initial temperature is calibrated beforehand (seeded, not timed), calibration has its own benchmark.
+    """
+    params = dict(QUICK_PARAMS, max_steps_without_improvement=float("inf"))
+    for set_name in SETS:
+        total_time = 0.0
+        total_steps = 0
+        solved = 0
+        for path, optimum in _set_paths(set_name):
+            instance = MWSATInstance(path)
+            initial_temperature = calibrate_initial_temperature(instance, params["P0"], params["fitness_coefficient"], seed=0)
+            for seed in SEEDS:
+                trace = NoTrace()
+                start = time.perf_counter()
+                simulated_annealing(instance, trace=trace, seed=seed, time_limit=TIME_TO_TARGET_LIMIT, target_score=optimum,
+                                    initial_temperature=initial_temperature, **params)
+                total_time += time.perf_counter() - start
+                total_steps += trace.total_steps
+                solved += trace.stop_reason == "target_score"
+        runs = len(SEEDS) * INSTANCES_PER_SET
+        results[f"time_to_target/{set_name}"] = _result(total_time / runs * 1000, "ms", "lower",
+                                                        steps=total_steps, solved=solved, runs=runs)
+
+
+def bench_large_anneal(results, large_path, max_flips=100000):
+    instance = MWSATInstance(large_path)
+    trace = NoTrace()
+    start = time.perf_counter()
+    # fixed temperature instead of calibration, a 40k clause calibration walk would dominate the measurement
+    simulated_annealing(instance, trace=trace, seed=0, max_flips=max_flips, initial_temperature=1.0, **QUICK_PARAMS)
+    elapsed = time.perf_counter() - start
+    results["anneal/generated-large"] = _result(trace.total_steps / elapsed, "steps/s", "higher", steps=trace.total_steps)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(output_path=None, repeats=3):
+    """Runs every benchmark, returns {"meta": ..., "results": {name: {value, unit, better, ...}}} and writes it as JSON"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        large_path = generate_instance(os.path.join(tmp_dir, "large.mwcnf"), *LARGE_SIZE, seed=0)
+        bench_instance_load(results, large_path, repeats)
+        bench_flips(results, large_path, repeats)
+        bench_calibration(results, repeats)
+        bench_time_to_target(results)
+        bench_large_anneal(results, large_path)
+
+    report = {
+        "meta": {
+            "suite_version": SUITE_VERSION,
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    if output_path is not None:
+        with open(output_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    print("\n" + "=" * 70)
+    print(f"{'Benchmark':<34} | {'value':>14} | {'unit':<8}")
+    print("-" * 70)
+    for name, row in results.items():
+        print(f"{name:<34} | {row['value']:>14.2f} | {row['unit']:<8}")
+    print("=" * 70)
+    return report
+
+
+def compare_reports(baseline, current, threshold=0.10):
+    """
+    Compares two suite reports (dicts or JSON paths). A benchmark regresses when it got worse by more than threshold
+    (relative), time_to_target also flags changed step counts - the trajectory changed, not only the speed.
+    Returns list of regressed benchmark names.
+    """
+    if isinstance(baseline, str):
+        with open(baseline) as f:
+            baseline = json.load(f)
+    if isinstance(current, str):
+        with open(current) as f:
+            current = json.load(f)
+    if baseline["meta"]["suite_version"] != current["meta"]["suite_version"]:
+        print("Warning: reports come from different suite versions")
+
+    regressions = []
+    print("\n" + "=" * 90)
+    print(f"{'Benchmark':<34} | {'baseline':>12} | {'current':>12} | {'change':>8} | status")
+    print("-" * 90)
+    for name, row in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name:<34} | {'-':>12} | {row['value']:>12.2f} | {'-':>8} | new")
+            continue
+        change = (row["value"] - old["value"]) / old["value"] if old["value"] else 0.0
+        worse = -change if row["better"] == "higher" else change
+        status = "ok"
+        if worse > threshold:
+            status = "SLOWER"
+            regressions.append(name)
+        elif worse < -threshold:
+            status = "faster"
+        if "steps" in row and "steps" in old and row["steps"] != old["steps"] and name.startswith("time_to_target"):
+            status += " (trajectory changed)"
+        print(f"{name:<34} | {old['value']:>12.2f} | {row['value']:>12.2f} | {change * 100:>7.1f}% | {status}")
+    print("=" * 90)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solver core benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the suite and write JSON results")
+    run_parser.add_argument("--output", default=None)
+    run_parser.add_argument("--repeats", type=int, default=3)
+    compare_parser = commands.add_parser("compare", help="compare two JSON results, exit code 1 on regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run_suite(args.output, args.repeats)
+    else:
+        sys.exit(1 if compare_reports(args.baseline, args.current, args.threshold) else 0)
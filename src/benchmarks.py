@@ -0,0 +1,594 @@
+import math
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from MWSATInstance import MWSATInstance
+import instance_cache
+from MWSATSolution import MWSATSolution
+from multi_chain_annealing import simulated_annealing_multichain
+from simulated_annealing import simulated_annealing, calibrate_initial_temperature
+from trace_recorders import NoTrace
+from run_stats import RunStats
+from parallel_tempering import parallel_tempering
+from restart_policies import LubyRestarts, GeometricRestarts
+from temperature_calibration import TemperatureCalibrationCache
+from preprocessing import preprocess, solve_preprocessed
+from instance_dataset import read_optima, instance_key
+
+
+def generate_instance(filepath, num_vars, num_clauses, clause_length=3, max_weight=1000, seed=None):
+    """
+    Writes a random weighted k-SAT instance in the .mwcnf format used in data/.
+    A hidden assignment is planted so every generated instance is satisfiable.
+    """
+    rng = random.Random(seed)
+    planted = [rng.choice([0, 1]) for _ in range(num_vars)]
+
+    with open(filepath, 'w') as f:
+        f.write(f"c generated instance, planted satisfiable, clause length = {clause_length}\n")
+        f.write(f"p mwcnf {num_vars} {num_clauses}\n")
+        f.write("w " + " ".join(str(rng.randint(1, max_weight)) for _ in range(num_vars)) + " 0\n")
+        for _ in range(num_clauses):
+            variables = rng.sample(range(1, num_vars + 1), clause_length)
+            literals = [v if rng.random() < 0.5 else -v for v in variables]
+            # make sure the planted assignment satisfies the clause
+            if not any((lit > 0) == planted[abs(lit) - 1] for lit in literals):
+                literals[0] = -literals[0]
+            f.write(" ".join(str(lit) for lit in literals) + " 0\n")
+    return filepath
+
+
+def _legacy_clause_lookup(instance):
+    """Original O(vars x clauses x k) lookup build, kept only for comparison"""
+    clause_lookup = {}
+    for var_idx in range(instance.num_vars):
+        for clause in instance.clauses:
+            for lit in clause:
+                if abs(lit) == var_idx + 1:
+                    clause_lookup.setdefault(var_idx, []).append(clause)
+    return clause_lookup
+
+
+def benchmark_instance_load(sizes=((1000, 4000), (2500, 10000), (5000, 20000), (10000, 40000)),
+                            clause_length=3, repeats=3, legacy_max_vars=2500):
+    """
+    Measures MWSATInstance load time on generated instances of growing size.
+    Time per literal should stay flat if loading is linear in formula size.
+    The legacy lookup build is timed only up to legacy_max_vars, it gets too slow after that.
+    """
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_vars, num_clauses in sizes:
+            path = generate_instance(os.path.join(tmp_dir, f"gen{num_vars}-{num_clauses}.mwcnf"),
+                                     num_vars, num_clauses, clause_length=clause_length, seed=num_vars)
+            load_times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                instance = MWSATInstance(path)
+                load_times.append(time.perf_counter() - start)
+            load_time = min(load_times)
+
+            legacy_time = None
+            if num_vars <= legacy_max_vars:
+                start = time.perf_counter()
+                _legacy_clause_lookup(instance)
+                legacy_time = time.perf_counter() - start
+
+            num_literals = num_clauses * clause_length
+            rows.append({
+                "Vars": num_vars,
+                "Clauses": num_clauses,
+                "Load_Time": load_time,
+                "Us_Per_Literal": load_time / num_literals * 1e6,
+                "Legacy_Lookup_Time": legacy_time
+            })
+
+    print("\n" + "=" * 75)
+    print(f"{'Vars':<8} | {'Clauses':<8} | {'Load [s]':<10} | {'us/literal':<10} | {'Legacy lookup [s]':<18}")
+    print("-" * 75)
+    for row in rows:
+        legacy = f"{row['Legacy_Lookup_Time']:.3f}" if row['Legacy_Lookup_Time'] is not None else "skipped"
+        print(f"{row['Vars']:<8} | {row['Clauses']:<8} | {row['Load_Time']:<10.4f} | {row['Us_Per_Literal']:<10.3f} | {legacy:<18}")
+    print("=" * 75)
+    return rows
+
+
+def _traced_size(build):
+    """Bytes allocated by build(), the built object is kept alive until measured"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def benchmark_solution_memory(num_vars=10000, num_clauses=40000, clause_length=3, copies=20):
+    """
+    Compares per-solution clause state (array of true-literal counts) with the legacy
+    tuple-keyed dict + set, both in allocated bytes and in copy() time.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = generate_instance(os.path.join(tmp_dir, "gen.mwcnf"), num_vars, num_clauses,
+                                 clause_length=clause_length, seed=1)
+        instance = MWSATInstance(path)
+
+    solution = MWSATSolution(instance)
+    legacy_counts = {instance.clauses[i]: c for i, c in enumerate(solution.satisfied_in_clause)}
+    legacy_unsat = {instance.clauses[i] for i in solution.unsatisfied_clauses}
+
+    array_bytes = _traced_size(lambda: solution.satisfied_in_clause[:])
+    legacy_bytes = _traced_size(lambda: (legacy_counts.copy(), legacy_unsat.copy()))
+
+    start = time.perf_counter()
+    for _ in range(copies):
+        solution.copy()
+    copy_time = (time.perf_counter() - start) / copies
+
+    start = time.perf_counter()
+    for _ in range(copies):
+        legacy_counts.copy()
+        legacy_unsat.copy()
+    legacy_copy_time = (time.perf_counter() - start) / copies
+
+    print("\n" + "=" * 60)
+    print(f"Clauses: {len(instance.clauses)} (distinct: {len(legacy_counts)})")
+    print(f"{'':<12} | {'Clause state [kB]':<18} | {'copy() [ms]':<12}")
+    print("-" * 60)
+    print(f"{'array':<12} | {array_bytes / 1024:<18.1f} | {copy_time * 1000:<12.3f}")
+    print(f"{'legacy dict':<12} | {legacy_bytes / 1024:<18.1f} | {legacy_copy_time * 1000:<12.3f}")
+    print("=" * 60)
+    return {"Array_Bytes": array_bytes, "Legacy_Bytes": legacy_bytes,
+            "Copy_Time": copy_time, "Legacy_Copy_Time": legacy_copy_time}
+
+
+def _walk_steps_per_sec(instance, steps, materialize_unsat):
+    """Random walk over unsat-clause literals, the way the annealing loop picks variables"""
+    state = MWSATSolution(instance)
+    clauses = instance.clauses
+    start = time.perf_counter()
+    for _ in range(steps):
+        if not state.unsatisfied_clauses:
+            var_to_flip = random.randint(1, instance.num_vars)
+        elif materialize_unsat:
+            # previous selection: materialize the whole unsat set to draw one clause
+            var_to_flip = abs(random.choice(clauses[random.choice(list(state.unsatisfied_clauses))]))
+        else:
+            var_to_flip = abs(random.choice(clauses[state.unsatisfied_clauses.random_choice()]))
+        state.update_variable_and_score(var_to_flip)
+    return steps / (time.perf_counter() - start)
+
+
+def benchmark_unsat_selection(instance_paths=None, steps=20000, large_size=(10000, 40000)):
+    """
+    Steps/sec of the flip loop with O(1) unsat-clause sampling vs materializing the unsat set every step.
+    Runs on the given instances (default: first 10 of wuf75-325-M..R) and one generated large instance.
+    """
+    if instance_paths is None:
+        data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "wuf75-325")
+        instance_paths = []
+        for subset in ("M", "N", "Q", "R"):
+            subset_dir = os.path.join(data_dir, f"wuf75-325-{subset}")
+            if os.path.isdir(subset_dir):
+                instance_paths += [os.path.join(subset_dir, x) for x in sorted(os.listdir(subset_dir))[:10]]
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        large_path = generate_instance(os.path.join(tmp_dir, "large.mwcnf"), *large_size, seed=2)
+        for label, paths in (("wuf75-325", instance_paths), ("generated large", [large_path])):
+            if not paths:
+                continue
+            instances = [MWSATInstance(path) for path in paths]
+            per_instance = max(1, steps // len(instances))
+            indexed = sum(_walk_steps_per_sec(inst, per_instance, False) for inst in instances) / len(instances)
+            materialized = sum(_walk_steps_per_sec(inst, per_instance, True) for inst in instances) / len(instances)
+            rows.append({"Set": label, "Instances": len(instances),
+                         "Indexed_Steps_Per_Sec": indexed, "Materialized_Steps_Per_Sec": materialized})
+
+    print("\n" + "=" * 75)
+    print(f"{'Set':<16} | {'Instances':<9} | {'indexed [steps/s]':<18} | {'list(set) [steps/s]':<19}")
+    print("-" * 75)
+    for row in rows:
+        print(f"{row['Set']:<16} | {row['Instances']:<9} | {row['Indexed_Steps_Per_Sec']:<18.0f} | {row['Materialized_Steps_Per_Sec']:<19.0f}")
+    print("=" * 75)
+    return rows
+
+
+def _legacy_flip(state, variable):
+    """Clause update as before the sign table: is_satisfied_in_clause scans the clause for the literal"""
+    instance = state.instance
+    clauses = instance.clauses
+    value_before = state.variable_values[variable - 1]
+    for clause_id in instance.get_clause_ids_for_var(variable):
+        count = state.satisfied_in_clause[clause_id]
+        if instance.is_satisfied_in_clause(clauses[clause_id], variable, value_before):
+            state.satisfied_in_clause[clause_id] = count - 1
+            if count == 1:
+                state.clauses_satisfied -= 1
+                state.unsatisfied_clauses.add(clause_id)
+        else:
+            state.satisfied_in_clause[clause_id] = count + 1
+            if count == 0:
+                state.clauses_satisfied += 1
+                state.unsatisfied_clauses.remove(clause_id)
+    state.variable_values[variable - 1] = 1 - value_before
+
+
+def benchmark_flip_cost(clause_lengths=(3, 5, 7, 10), num_vars=2000, clause_to_var_ratio=4, flips=50000):
+    """
+    Per-flip cost of update_variable_and_score (precomputed literal signs) vs the legacy clause scan,
+    on generated instances with growing clause length. Every flip is done twice (flip + revert),
+    like a rejected move in the annealing loop.
+    """
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for k in clause_lengths:
+            path = generate_instance(os.path.join(tmp_dir, f"k{k}.mwcnf"), num_vars, num_vars * clause_to_var_ratio,
+                                     clause_length=k, seed=k)
+            instance = MWSATInstance(path)
+            variables = [random.randint(1, num_vars) for _ in range(flips)]
+
+            state = MWSATSolution(instance)
+            start = time.perf_counter()
+            for var in variables:
+                state.update_variable_and_score(var)
+                state.update_variable_and_score(var)
+            new_cost = (time.perf_counter() - start) / (2 * flips)
+
+            state = MWSATSolution(instance)
+            start = time.perf_counter()
+            for var in variables:
+                _legacy_flip(state, var)
+                _legacy_flip(state, var)
+            legacy_cost = (time.perf_counter() - start) / (2 * flips)
+
+            rows.append({"K": k, "Occurrences_Per_Var": k * clause_to_var_ratio,
+                         "Flip_Us": new_cost * 1e6, "Legacy_Flip_Us": legacy_cost * 1e6})
+
+    print("\n" + "=" * 70)
+    print(f"{'k':<4} | {'occ/var':<8} | {'sign table [us/flip]':<21} | {'clause scan [us/flip]':<21}")
+    print("-" * 70)
+    for row in rows:
+        print(f"{row['K']:<4} | {row['Occurrences_Per_Var']:<8} | {row['Flip_Us']:<21.2f} | {row['Legacy_Flip_Us']:<21.2f}")
+    print("=" * 70)
+    return rows
+
+
+def benchmark_evaluate(instance_path=None, rows=1000, large_size=(10000, 40000), large_rows=50):
+    """
+    Time per assignment of MWSATInstance.evaluate (Python loops) vs evaluate_batch (NumPy),
+    on one wuf75-325 instance and a generated large instance.
+    """
+    if instance_path is None:
+        instance_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data",
+                                     "wuf75-325", "wuf75-325-M", "wuf75-01.mwcnf")
+    rng = np.random.default_rng(0)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        large_path = generate_instance(os.path.join(tmp_dir, "large.mwcnf"), *large_size, seed=3)
+        for label, path, n_rows in (("wuf75-325", instance_path, rows), ("generated large", large_path, large_rows)):
+            instance = MWSATInstance(path)
+            assignments = rng.integers(0, 2, size=(n_rows, instance.num_vars), dtype=np.int8)
+            as_lists = [row.tolist() for row in assignments]
+
+            start = time.perf_counter()
+            loop_results = [instance.evaluate(row) for row in as_lists]
+            loop_time = (time.perf_counter() - start) / n_rows
+
+            instance.evaluate_batch(assignments[:1]) # build matrix outside of the timing
+            start = time.perf_counter()
+            raw, _, violated = instance.evaluate_batch(assignments)
+            batch_time = (time.perf_counter() - start) / n_rows
+
+            assert all(r[0] == raw[i] and r[2] == (violated[i] == 0) for i, r in enumerate(loop_results))
+            results.append({"Set": label, "Rows": n_rows, "Loop_Us": loop_time * 1e6, "Batch_Us": batch_time * 1e6})
+
+    print("\n" + "=" * 65)
+    print(f"{'Set':<16} | {'Rows':<6} | {'loop [us/row]':<14} | {'batch [us/row]':<14}")
+    print("-" * 65)
+    for row in results:
+        print(f"{row['Set']:<16} | {row['Rows']:<6} | {row['Loop_Us']:<14.1f} | {row['Batch_Us']:<14.1f}")
+    print("=" * 65)
+    return results
+
+
+def benchmark_compiled_load(instance_path=None, large_size=(10000, 40000), repeats=20):
+    """Load time from the .mwcnf text vs from the memory mapped compiled file"""
+    if instance_path is None:
+        instance_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data",
+                                     "wuf75-325", "wuf75-325-M", "wuf75-01.mwcnf")
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        large_path = generate_instance(os.path.join(tmp_dir, "large.mwcnf"), *large_size, seed=4)
+        for label, path, n in (("wuf75-325", instance_path, repeats), ("generated large", large_path, max(1, repeats // 10))):
+            instance_cache.compile_instance(path, cache_dir=tmp_dir)
+            start = time.perf_counter()
+            for _ in range(n):
+                MWSATInstance(path, use_compiled=False)
+            text_time = (time.perf_counter() - start) / n
+            start = time.perf_counter()
+            for _ in range(n):
+                MWSATInstance(path, compiled_dir=tmp_dir)
+            compiled_time = (time.perf_counter() - start) / n
+            rows.append({"Set": label, "Text_Ms": text_time * 1000, "Compiled_Ms": compiled_time * 1000})
+
+    print("\n" + "=" * 55)
+    print(f"{'Set':<16} | {'text [ms]':<12} | {'compiled [ms]':<14}")
+    print("-" * 55)
+    for row in rows:
+        print(f"{row['Set']:<16} | {row['Text_Ms']:<12.2f} | {row['Compiled_Ms']:<14.2f}")
+    print("=" * 55)
+    return rows
+
+
+QUICK_PARAMS = {
+    "P0": 0.8,
+    "cooling_coefficient": 0.95,
+    "equilibrium_steps": 1,
+    "max_steps_without_improvement": 30,
+    "fitness_coefficient": 1.2
+}
+
+
+def benchmark_multichain(instance_path=None, chain_counts=(1, 10, 50, 100), params=QUICK_PARAMS, serial_runs=3):
+    """Chain-steps/sec of the lockstep multi-chain engine for growing number of chains vs serial simulated_annealing"""
+    if instance_path is None:
+        instance_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data",
+                                     "wuf75-325", "wuf75-325-M", "wuf75-01.mwcnf")
+    instance = MWSATInstance(instance_path)
+    rows = []
+
+    steps = 0
+    start = time.perf_counter()
+    for _ in range(serial_runs):
+        trace = NoTrace()
+        simulated_annealing(instance, trace=trace, **params)
+        steps += trace.total_steps
+    rows.append({"Engine": "serial", "Chains": 1, "Steps_Per_Sec": steps / (time.perf_counter() - start)})
+
+    for n_chains in chain_counts:
+        traces = [NoTrace() for _ in range(n_chains)]
+        start = time.perf_counter()
+        simulated_annealing_multichain(instance, n_chains, seed=0, traces=traces, **params)
+        elapsed = time.perf_counter() - start
+        rows.append({"Engine": "multichain", "Chains": n_chains,
+                     "Steps_Per_Sec": sum(t.total_steps for t in traces) / elapsed})
+
+    print("\n" + "=" * 50)
+    print(f"{'Engine':<12} | {'Chains':<6} | {'chain-steps/s':<14}")
+    print("-" * 50)
+    for row in rows:
+        print(f"{row['Engine']:<12} | {row['Chains']:<6} | {row['Steps_Per_Sec']:<14.0f}")
+    print("=" * 50)
+    return rows
+
+
+def _time_to_target(instance, optimum, params, restart, time_budget, calibration_cache):
+    """Seconds until a valid solution with score >= optimum is found, runs that end early are rerun from scratch. None on failure"""
+    start = time.perf_counter()
+    while True:
+        remaining = time_budget - (time.perf_counter() - start)
+        if remaining <= 0:
+            return None
+        trace = NoTrace()
+        best_state, _ = simulated_annealing(instance, trace=trace, calibration_cache=calibration_cache, restart=restart,
+                                           time_limit=remaining, target_score=optimum, **params)
+        if trace.stop_reason == "target_score":
+            return time.perf_counter() - start
+
+
+def benchmark_restarts(sets=("wuf50-218", "wuf75-325"), instances_per_set=5, runs=4, time_budget=2.0,
+                       checkpoints=(0.25, 0.5, 1.0, 2.0), params=QUICK_PARAMS, policies=None):
+    """
+    Success rate over time of restart policies vs independent reruns (no policy) on the M instances of the benchmark sets.
+    Every run repeats simulated_annealing until the optimum is hit or time_budget seconds are used up; reported are
+    the fraction of runs successful by each checkpoint and successes per CPU second.
+    """
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+    if policies is None:
+        policies = {
+            "rerun": None,
+            "luby reheat": LubyRestarts(unit=2, reheat_fraction=0.5),
+            "luby perturb": LubyRestarts(unit=2, reheat_fraction=0.3, perturb_fraction=0.1),
+            "geometric perturb": GeometricRestarts(first=2, factor=1.5, reheat_fraction=0.3, perturb_fraction=0.1),
+        }
+    calibration_cache = TemperatureCalibrationCache() # same calibration for every policy, only the search differs
+    rows = []
+
+    for set_name in sets:
+        subset = os.path.join(data_dir, set_name, f"{set_name}-M")
+        optima = read_optima(subset + "-opt.dat")
+        paths = sorted(os.path.join(subset, name) for name in os.listdir(subset) if name.endswith(".mwcnf"))[:instances_per_set]
+
+        for label, restart in policies.items():
+            times = []
+            for path in paths:
+                instance = MWSATInstance(path)
+                optimum = optima[instance_key(path)]
+                for _ in range(runs):
+                    times.append(_time_to_target(instance, optimum, params, restart, time_budget, calibration_cache))
+            solved = [t for t in times if t is not None]
+            cpu_seconds = sum(solved) + time_budget * (len(times) - len(solved))
+            row = {"Set": set_name, "Policy": label, "Success_Per_Sec": len(solved) / cpu_seconds}
+            for checkpoint in checkpoints:
+                row[checkpoint] = sum(t <= checkpoint for t in solved) / len(times)
+            rows.append(row)
+
+    header = " | ".join(f"{f'<={c}s':<7}" for c in checkpoints)
+    print("\n" + "=" * (50 + 10 * len(checkpoints)))
+    print(f"{'Set':<10} | {'Policy':<18} | {header} | {'success/s':<9}")
+    print("-" * (50 + 10 * len(checkpoints)))
+    for row in rows:
+        rates = " | ".join(f"{row[c] * 100:>6.0f}%" for c in checkpoints)
+        print(f"{row['Set']:<10} | {row['Policy']:<18} | {rates} | {row['Success_Per_Sec']:<9.2f}")
+    print("=" * (50 + 10 * len(checkpoints)))
+    return rows
+
+
+def benchmark_parallel_tempering(subsets=("Q", "R"), instances_per_set=6, time_budget=3.0, n_replicas=8, fitness_coefficient=5):
+    """Valid and optimal results within the same time budget on the hard wuf75-325 subsets: simulated_annealing vs parallel_tempering"""
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "wuf75-325")
+    calibration_cache = TemperatureCalibrationCache()
+    solvers = {
+        "annealing": lambda instance, trace, optimum: simulated_annealing(
+            instance, 0.8, 0.99, 1, math.inf, fitness_coefficient, trace=trace, calibration_cache=calibration_cache,
+            time_limit=time_budget, target_score=optimum),
+        f"tempering x{n_replicas}": lambda instance, trace, optimum: parallel_tempering(
+            instance, n_replicas, 0.8, fitness_coefficient, math.inf, trace=trace, calibration_cache=calibration_cache,
+            time_limit=time_budget, target_score=optimum),
+    }
+    rows = []
+    for subset in subsets:
+        subset_dir = os.path.join(data_dir, f"wuf75-325-{subset}")
+        optima = read_optima(subset_dir + "-opt.dat")
+        paths = sorted(os.path.join(subset_dir, name) for name in os.listdir(subset_dir) if name.endswith(".mwcnf"))[:instances_per_set]
+        instances = [MWSATInstance(path) for path in paths]
+
+        for label, solve in solvers.items():
+            valid = optimal = 0
+            for path, instance in zip(paths, instances):
+                trace = NoTrace()
+                best_state, _ = solve(instance, trace, optima[instance_key(path)])
+                valid += best_state.clauses_satisfied == instance.num_clauses
+                optimal += trace.stop_reason == "target_score"
+            rows.append({"Set": f"wuf75-325-{subset}", "Solver": label, "Instances": len(paths), "Valid": valid, "Optimal": optimal})
+
+    print("\n" + "=" * 65)
+    print(f"{'Set':<12} | {'Solver':<14} | {'Instances':<9} | {'Valid':<6} | {'Optimal':<7}")
+    print("-" * 65)
+    for row in rows:
+        print(f"{row['Set']:<12} | {row['Solver']:<14} | {row['Instances']:<9} | {row['Valid']:<6} | {row['Optimal']:<7}")
+    print("=" * 65)
+    return rows
+
+
+def _augmented_formula(instance, optimal_values, rng, units, duplicates, supersets):
+    """
+    Formula of instance plus redundancy of the kind real encodings have: unit clauses agreeing with the optimal
+    assignment, repeated clauses and clauses extended by one literal (subsumed) - the optimum does not change
+    """
+    clauses = list(instance.clauses)
+    for var in rng.sample(range(1, instance.num_vars + 1), units):
+        clauses.append((var if optimal_values[var - 1] else -var,))
+    clauses.extend(rng.sample(instance.clauses, duplicates))
+    for clause in rng.sample(instance.clauses, supersets):
+        extra = rng.choice([v for v in range(1, instance.num_vars + 1) if v not in map(abs, clause)])
+        clauses.append(clause + (extra if rng.random() < 0.5 else -extra,))
+    clause_offsets = np.zeros(len(clauses) + 1, dtype=np.int32)
+    np.cumsum([len(clause) for clause in clauses], out=clause_offsets[1:])
+    literals = np.array([lit for clause in clauses for lit in clause], dtype=np.int32)
+    return MWSATInstance(instance.filepath, use_compiled=False,
+                         formula=(instance.num_vars, np.array(instance.weights), clause_offsets, literals))
+
+
+def benchmark_preprocessing(subset="wuf75-325-M", instances=6, units=8, duplicates=30, supersets=30, seeds=(0, 1, 2),
+                            time_budget=5.0, params=QUICK_PARAMS):
+    """
+    Reduction by preprocessing and its effect on annealing: time to the known optimum (seeded runs, preprocessing
+    included in the time) and steps/sec, on the subset's instances as they are and with added redundancy
+    (see _augmented_formula).
+    """
+    subset_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", subset.rsplit("-", 1)[0], subset)
+    optima = read_optima(subset_dir + "-opt.dat", assignments=True)
+    paths = sorted(os.path.join(subset_dir, name) for name in os.listdir(subset_dir) if name.endswith(".mwcnf"))[:instances]
+    params = dict(params, max_steps_without_improvement=math.inf)
+    rng = random.Random(0)
+
+    rows = []
+    for variant in ("original", "redundant"):
+        totals = {"plain": [0.0, 0, 0, 0], "preprocessed": [0.0, 0, 0, 0]} # seconds, steps, solved, runs
+        vars_before = vars_after = clauses_before = clauses_after = 0
+        for path in paths:
+            optimum, optimal_values = optima[instance_key(path)]
+            instance = MWSATInstance(path)
+            if variant == "redundant":
+                instance = _augmented_formula(instance, optimal_values, rng, units, duplicates, supersets)
+            reduction = preprocess(instance)
+            vars_before += instance.num_vars
+            clauses_before += instance.num_clauses
+            vars_after += reduction.instance.num_vars
+            clauses_after += reduction.instance.num_clauses
+            # calibrated once per instance and form, calibration is not what is compared
+            temperatures = {form: calibrate_initial_temperature(target, params["P0"], params["fitness_coefficient"], seed=0)
+                            for form, target in (("plain", instance), ("preprocessed", reduction.instance))
+                            if target.num_clauses} # fully reduced instance is not annealed at all
+            for seed in seeds:
+                for form in ("plain", "preprocessed"):
+                    trace = NoTrace()
+                    start = time.perf_counter()
+                    if form == "plain":
+                        best_state, _ = simulated_annealing(instance, trace=trace, seed=seed, time_limit=time_budget,
+                                                            target_score=optimum, initial_temperature=temperatures[form],
+                                                            **params)
+                    else:
+                        best_state, _, _ = solve_preprocessed(instance, trace=trace, seed=seed, time_limit=time_budget,
+                                                              target_score=optimum, initial_temperature=temperatures.get(form),
+                                                              **params)
+                    row = totals[form]
+                    row[0] += time.perf_counter() - start
+                    row[1] += trace.total_steps
+                    row[2] += best_state.clauses_satisfied == instance.num_clauses and best_state.current_score >= optimum
+                    row[3] += 1
+        for form, (seconds, steps, solved, runs) in totals.items():
+            rows.append({"Instances": variant, "Form": form,
+                         "Vars": vars_after if form == "preprocessed" else vars_before,
+                         "Clauses": clauses_after if form == "preprocessed" else clauses_before,
+                         "Solved": f"{solved}/{runs}", "Mean_Time": seconds / runs, "Steps_Per_Sec": steps / seconds})
+
+    print("\n" + "=" * 85)
+    print(f"{'Instances':<10} | {'Form':<12} | {'Vars':>6} | {'Clauses':>7} | {'Solved':>6} | {'Mean time':>10} | {'Steps/s':>9}")
+    print("-" * 85)
+    for row in rows:
+        print(f"{row['Instances']:<10} | {row['Form']:<12} | {row['Vars']:>6} | {row['Clauses']:>7} | {row['Solved']:>6} | "
+              f"{row['Mean_Time']:>9.3f}s | {row['Steps_Per_Sec']:>9.0f}")
+    print("=" * 85)
+    return rows
+
+
+def benchmark_stats_overhead(num_vars=2000, num_clauses=8500, flips=300000, repeats=5, params=QUICK_PARAMS):
+    """
+    Steps per second of simulated_annealing without stats, with counters only (RunStats(sample_phases=False)) and
+    with phase sampling, same seed and flip budget - runs are identical, only the instrumentation differs.
+    Best of repeats, forms interleaved so a noisy machine hits all of them alike.
+    """
+    forms = {"off": lambda: None, "counters": lambda: RunStats(sample_phases=False), "phases": RunStats}
+    best = dict.fromkeys(forms, 0.0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = generate_instance(os.path.join(tmp_dir, "stats.mwcnf"), num_vars, num_clauses, seed=num_vars)
+        instance = MWSATInstance(path)
+        params = dict(params, max_steps_without_improvement=math.inf)
+        for _ in range(repeats):
+            for form, make_stats in forms.items():
+                trace = NoTrace()
+                start = time.perf_counter()
+                simulated_annealing(instance, trace=trace, seed=1, initial_temperature=1.0, max_flips=flips,
+                                    stats=make_stats(), **params)
+                best[form] = max(best[form], trace.total_steps / (time.perf_counter() - start))
+
+    rows = [{"Stats": form, "Steps_Per_Sec": rate, "Overhead_Pct": (best["off"] / rate - 1) * 100}
+            for form, rate in best.items()]
+    print("\n" + "=" * 45)
+    print(f"{'Stats':<10} | {'Steps/s':>10} | {'Overhead':>10}")
+    print("-" * 45)
+    for row in rows:
+        print(f"{row['Stats']:<10} | {row['Steps_Per_Sec']:>10.0f} | {row['Overhead_Pct']:>9.1f}%")
+    print("=" * 45)
+    return rows
+
+
+if __name__ == "__main__":
+    benchmark_instance_load()
+    benchmark_solution_memory()
+    benchmark_unsat_selection()
+    benchmark_flip_cost()
+    benchmark_evaluate()
+    benchmark_compiled_load()
+    benchmark_multichain()
+    benchmark_restarts()
+    benchmark_parallel_tempering()
+    benchmark_preprocessing()
+    benchmark_stats_overhead()
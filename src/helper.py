@@ -3,6 +3,9 @@ import os
 from MWSATInstance import MWSATInstance
 from MWSATSolution import MWSATSolution
 from simulated_annealing import simulated_annealing
+from temperature_calibration import TemperatureCalibrationCache
+from param_sweep import grid_configs, run_sweep, summarize_sweep, race_configs
+from instance_dataset import read_optima
 import numpy as np
 
 def evaluate_algorithm_performance(instance_paths, solutions_dict, params, n_runs=4, title="Algorithm Evaluation"):
@@ -26,6 +29,7 @@ def evaluate_algorithm_performance(instance_paths, solutions_dict, params, n_run
         axes = np.array([[axes]])
 
     summary_data = []
+    calibration_cache = TemperatureCalibrationCache() # runs of the same instance share initial temperature
 
     print(f"--- Starting {title} ({n_instances * n_runs} total runs) ---")
     print(f"Params: {params}")
@@ -36,7 +40,7 @@ def evaluate_algorithm_performance(instance_paths, solutions_dict, params, n_run
     for i, path in enumerate(instance_paths):
         filename = os.path.basename(path)
         key = filename.split(".")[0]
-        optimal_weight = solutions_dict.get(key, 0)
+        optimal_weight = solutions_dict.get(path, solutions_dict.get(key, 0))
         
         print(f"Processing Instance {i+1}/{n_instances}: {filename}")
         
@@ -46,12 +50,13 @@ def evaluate_algorithm_performance(instance_paths, solutions_dict, params, n_run
         inst_solved_count = 0
         inst_optimal_count = 0
 
+        instance = MWSATInstance(path)
+
         for j in range(n_runs):
             ax = axes[i, j]
             
             # Run Algorithm
-            instance = MWSATInstance(path)
-            best_state, history = simulated_annealing(instance, **params)
+            best_state, history = simulated_annealing(instance, calibration_cache=calibration_cache, **params)
             
             # Collect Metrics
             is_solved = (best_state.clauses_satisfied == instance.num_clauses)
@@ -140,7 +145,7 @@ def plot_algorithm_run(instance, solutions_dict, params, ax=None, title=None):
 
     filename = os.path.basename(instance.filepath)
     instance_key = filename.split(".")[0]
-    optima = solutions_dict.get(instance_key, 0) # Default to 0 if unknown
+    optima = solutions_dict.get(instance.filepath, solutions_dict.get(instance_key, 0)) # Default to 0 if unknown
     
     is_solved = (best_state.clauses_satisfied == instance.num_clauses)
     final_score = best_state.current_score
@@ -183,14 +188,8 @@ def plot_algorithm_run(instance, solutions_dict, params, ax=None, title=None):
     return ax
 
 def get_solution_dict(filepath):
-    result_dict = {}
-    with open(filepath) as file:
-        lines = [line.rstrip() for line in file]
-
-        for line in lines:
-            tokens = line.split(" ")
-            result_dict["w"+tokens[0]] = int(tokens[1])
-    return result_dict
+    """{instance key: optimum} of an -opt.dat file, see instance_dataset for whole directory trees"""
+    return read_optima(filepath)
 
 
 def run_tuning_experiment(base_params, param_name, param_values, instance_path, optimal_weight, n_runs=4):
@@ -209,6 +208,8 @@ def run_tuning_experiment(base_params, param_name, param_values, instance_path,
     
     filename = os.path.basename(instance_path)
     summary_data = []
+    calibration_cache = TemperatureCalibrationCache()
+    instance = MWSATInstance(instance_path) # loaded once, runs only read it
     
     print(f"--- Tuning '{param_name}' on {filename} ({n_rows * n_cols} total runs) ---")
     
@@ -229,8 +230,7 @@ def run_tuning_experiment(base_params, param_name, param_values, instance_path,
             current_params = base_params.copy()
             current_params[param_name] = val
             
-            instance = MWSATInstance(instance_path)
-            best_state, history = simulated_annealing(instance, **current_params)
+            best_state, history = simulated_annealing(instance, calibration_cache=calibration_cache, **current_params)
             
             is_solved = (best_state.clauses_satisfied == instance.num_clauses)
             is_optimal = is_solved and (best_state.current_score >= optimal_weight)
@@ -289,61 +289,26 @@ def run_tuning_experiment(base_params, param_name, param_values, instance_path,
     print("="*95)
 
     
-def evaluate_param_tuning_no_plot(instance_paths, solutions_dict, base_params, param_name, param_values, n_runs_per_instance=4):
+def evaluate_param_tuning_no_plot(instance_paths, solutions_dict, base_params, param_name, param_values, n_runs_per_instance=4,
+                                  max_workers=None, results_path=None, race=False, seed=None):
     """
     Evaluates a parameter's performance across multiple instances without plotting.
+    All (value x instance x run) combinations run in parallel through param_sweep, see run_sweep.
+    With race values that are clearly losing are dropped early and get fewer runs, see race_configs.
     Prints a summary table aggregating the results.
     """
     
     print(f"\n--- Tuning Parameter: '{param_name}' (Across {len(instance_paths)} instances) ---")
     
-    summary_rows = []
-
-    for val in param_values:
-        total_runs = 0
-        total_solved = 0
-        total_optimal = 0
-        all_pct_opts = []
-        all_steps = []
-        
-        # 2. Run on every instance in the list
-        for path in instance_paths:
-            filename = os.path.basename(path)
-            key = filename.split(".")[0]
-            optimal_weight = solutions_dict.get(key, 0)
-            
-            instance = MWSATInstance(path) 
-            
-            for _ in range(n_runs_per_instance):
-                current_params = base_params.copy()
-                current_params[param_name] = val
-                
-                best_state, history = simulated_annealing(instance, **current_params)
-                
-                is_solved = (best_state.clauses_satisfied == instance.num_clauses)
-                is_optimal = is_solved and (optimal_weight > 0) and (best_state.current_score >= optimal_weight)
-                
-                pct_opt = 0.0
-                if optimal_weight > 0:
-                    pct_opt = (best_state.current_score / optimal_weight) * 100
-                
-                total_runs += 1
-                if is_solved: total_solved += 1
-                if is_optimal: total_optimal += 1
-                if is_solved: all_pct_opts.append(pct_opt)
-                all_steps.append(len(history))
-        
-        avg_pct = np.mean(all_pct_opts) if all_pct_opts else 0
-        avg_steps = np.mean(all_steps) if all_steps else 0
-        
-        summary_rows.append({
-            "Val": val,
-            "Runs": total_runs,
-            "Solved": total_solved,
-            "Optimal": total_optimal,
-            "Avg_Pct_Opt": avg_pct,
-            "Avg_Steps": avg_steps
-        })
+    configs = grid_configs(base_params, {param_name: param_values})
+    if race:
+        summary_rows, _ = race_configs(configs, instance_paths, solutions_dict, n_runs_per_instance,
+                                       max_workers=max_workers, results_path=results_path, seed=seed)
+        for row in summary_rows:
+            row["Val"] = param_values[row["Val"]]
+    else:
+        results = run_sweep(configs, instance_paths, solutions_dict, n_runs_per_instance, max_workers, results_path, seed=seed)
+        summary_rows = summarize_sweep(results, labels=list(param_values))
 
     print("\n" + "="*90)
     print(f" {param_name:<15} | {'Runs':<6} | {'Solved':<8} | {'Optimal':<8} | {'Avg % Opt':<12} | {'Avg Steps':<10}")
@@ -0,0 +1,132 @@
+import glob
+import hashlib
+import mmap
+import os
+import struct
+import numpy as np
+
+# Compiled instance file layout (little endian):
+#   header, then int32 arrays weights, clause_offsets, literals, occ_offsets, occ_clause_ids, tautologies,
+#   cv_offsets, cv_vars and int8 array occ_signs - occurrence index is the normalized one from OccurrenceIndex,
+#   cv_* is its clause_vars (variables of every clause in literal order)
+MAGIC = b"MWSATBIN"
+VERSION = 2
+HEADER = struct.Struct("<8sIqq20sqqqqqqq") # magic, version, source size, source mtime_ns, source sha1, num_vars,
+                                           # weights, clauses, literals, occurrences, tautologies, clause vars
+SUFFIX = ".mwbin"
+
+
+class CompiledInstance:
+    """Flat arrays of a compiled instance, views into the underlying buffer (mmap or shared memory) - no copying"""
+    def __init__(self, buffer):
+        self.buffer = buffer # keeps mmap / shared memory alive
+        (magic, version, self.source_size, self.source_mtime_ns, self.source_sha1, self.num_vars,
+         n_weights, n_clauses, n_literals, n_occurrences, n_tautologies, n_clause_vars) = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a compiled MWSAT instance or unsupported version")
+
+        offset = HEADER.size
+        arrays = []
+        for dtype, count in ((np.int32, n_weights), (np.int32, n_clauses + 1), (np.int32, n_literals),
+                             (np.int32, self.num_vars + 1), (np.int32, n_occurrences), (np.int32, n_tautologies),
+                             (np.int32, n_clauses + 1), (np.int32, n_clause_vars), (np.int8, n_occurrences)):
+            arrays.append(np.frombuffer(buffer, dtype=dtype, count=count, offset=offset))
+            offset += np.dtype(dtype).itemsize * count
+        (self.weights, self.clause_offsets, self.literals, self.occ_offsets, self.occ_clause_ids, self.tautologies,
+         self.cv_offsets, self.cv_vars, self.occ_signs) = arrays
+        self.num_clauses = n_clauses
+        self.nbytes = offset
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def compiled_path(source_path, cache_dir=None):
+    """Compiled file sits next to the source, or in cache_dir when given"""
+    if cache_dir is None:
+        return source_path + SUFFIX
+    return os.path.join(cache_dir, os.path.basename(source_path) + SUFFIX)
+
+
+def instance_to_bytes(instance, source_size=0, source_mtime_ns=0, source_sha1=b"\0" * 20):
+    """Serializes a loaded MWSATInstance into the compiled format"""
+    clause_offsets = np.zeros(len(instance.clauses) + 1, dtype=np.int32)
+    np.cumsum([len(c) for c in instance.clauses], out=clause_offsets[1:])
+    literals = np.fromiter((lit for c in instance.clauses for lit in c), dtype=np.int32, count=int(clause_offsets[-1]))
+    occ_offsets, occ_clause_ids, occ_signs, tautologies, cv_offsets, cv_vars = instance.occurrences.to_arrays()
+
+    header = HEADER.pack(MAGIC, VERSION, source_size, source_mtime_ns, source_sha1, instance.num_vars,
+                         len(instance.weights), len(instance.clauses), len(literals), len(occ_clause_ids), len(tautologies),
+                         len(cv_vars))
+    parts = [header,
+             np.asarray(instance.weights, dtype=np.int32).tobytes(),
+             clause_offsets.tobytes(),
+             literals.tobytes(),
+             np.asarray(occ_offsets, dtype=np.int32).tobytes(),
+             np.asarray(occ_clause_ids, dtype=np.int32).tobytes(),
+             np.asarray(tautologies, dtype=np.int32).tobytes(),
+             np.asarray(cv_offsets, dtype=np.int32).tobytes(),
+             np.asarray(cv_vars, dtype=np.int32).tobytes(),
+             np.asarray(occ_signs, dtype=np.int8).tobytes()]
+    return b"".join(parts)
+
+
+def write_compiled(instance, source_path, cache_dir=None):
+    """Writes compiled form of an already loaded instance, stamped with its source file's size, mtime and hash"""
+    stat = os.stat(source_path)
+    data = instance_to_bytes(instance, stat.st_size, stat.st_mtime_ns, file_sha1(source_path))
+    target = compiled_path(source_path, cache_dir)
+    tmp_target = target + ".tmp"
+    with open(tmp_target, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_target, target)
+    return target
+
+
+def load_compiled(source_path, cache_dir=None):
+    """
+    Memory maps the compiled file of source_path. Returns None when it is missing, corrupt or stale -
+    stale means size/mtime of the source changed and so did its content hash.
+    """
+    target = compiled_path(source_path, cache_dir)
+    try:
+        with open(target, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        compiled = CompiledInstance(buffer)
+    except (OSError, ValueError, struct.error):
+        return None
+
+    try:
+        stat = os.stat(source_path)
+    except OSError:
+        return compiled # source is gone, compiled file is all we have
+    if stat.st_size == compiled.source_size and stat.st_mtime_ns == compiled.source_mtime_ns:
+        return compiled
+    if stat.st_size == compiled.source_size and file_sha1(source_path) == compiled.source_sha1:
+        return compiled # touched but unchanged
+    return None
+
+
+def compile_instance(source_path, cache_dir=None, force=False):
+    """Compiles one .mwcnf file unless an up to date compiled file exists, returns path of the compiled file"""
+    from MWSATInstance import MWSATInstance
+    if not force and load_compiled(source_path, cache_dir) is not None:
+        return compiled_path(source_path, cache_dir)
+    instance = MWSATInstance(source_path, use_compiled=False)
+    return write_compiled(instance, source_path, cache_dir)
+
+
+def compile_directory(directory, pattern="**/*.mwcnf", cache_dir=None, force=False):
+    """Compiles every instance under directory, returns number of files that were (re)compiled"""
+    compiled = 0
+    for source_path in sorted(glob.glob(os.path.join(directory, pattern), recursive=True)):
+        if not force and load_compiled(source_path, cache_dir) is not None:
+            continue
+        compile_instance(source_path, cache_dir, force=True)
+        compiled += 1
+    return compiled
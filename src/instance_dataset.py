@@ -0,0 +1,188 @@
+import concurrent.futures
+import os
+import numpy as np
+import pandas as pd
+from MWSATInstance import MWSATInstance
+from mwcnf_parser import parse_mwcnf
+from instance_cache import file_sha1, SUFFIX as COMPILED_SUFFIX
+
+MANIFEST_NAME = "mwcnf_manifest.csv"
+OPT_SUFFIX = "-opt.dat"
+# manifest columns besides Path, in this order
+COLUMNS = ["Key", "Set", "Family", "Size", "Mtime_Ns", "Sha1", "Vars", "Clauses", "Literals", "Max_Clause_Len",
+           "Total_Weight", "Problems", "Optimum"]
+
+
+def read_optima(filepath, assignments=False):
+    """
+    Optimum file (lines "uf20-01 4900 <assignment> 0") -> {"wuf20-01": 4900}, keys match instance_key.
+    With assignments the values are (4900, [0/1 value of every variable]).
+    """
+    result_dict = {}
+    with open(filepath) as file:
+        for line in file:
+            tokens = line.split()
+            if len(tokens) >= 2:
+                optimum = int(tokens[1])
+                if assignments:
+                    optimum = (optimum, [1 if int(lit) > 0 else 0 for lit in tokens[2:-1]])
+                result_dict["w" + tokens[0]] = optimum
+    return result_dict
+
+
+def instance_key(path):
+    """wuf20-01 for .../wuf20-01.mwcnf(.gz), the key used by optimum files and solution dicts"""
+    return os.path.basename(path).split(".")[0]
+
+
+def scan_instances(root):
+    """Sorted paths of every .mwcnf file under root, compressed ones (.mwcnf.gz, .mwcnf.xz ...) included"""
+    paths = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if ".mwcnf" in name and not name.endswith((COMPILED_SUFFIX, ".tmp")):
+                paths.append(os.path.join(directory, name))
+    return sorted(paths)
+
+
+def _index_instance(path):
+    """Manifest row of one file (everything except Optimum), runs in pool workers"""
+    stat = os.stat(path)
+    parsed = parse_mwcnf(path)
+    lengths = np.diff(parsed.clause_offsets)
+    subset = os.path.dirname(path)
+    return {
+        "Path": path,
+        "Key": instance_key(path),
+        "Set": os.path.basename(subset),
+        "Family": os.path.basename(os.path.dirname(subset)),
+        "Size": stat.st_size,
+        "Mtime_Ns": stat.st_mtime_ns,
+        "Sha1": file_sha1(path).hex(),
+        "Vars": parsed.num_vars,
+        "Clauses": parsed.num_clauses,
+        "Literals": len(parsed.literals),
+        "Max_Clause_Len": int(lengths.max()) if len(lengths) else 0,
+        "Total_Weight": int(parsed.weights.sum(dtype=np.int64)),
+        "Problems": "; ".join(parsed.problems),
+    }
+
+
+class InstanceDataset:
+    """
+    Index of a directory tree of instances, e.g. data/ with wuf20-91/wuf20-91-M/*.mwcnf and wuf20-91-M-opt.dat next
+    to every subset directory. One row per instance in self.frame: path, key, subset (Set) and family directory,
+    file size/mtime/sha1, variable, clause and literal counts, longest clause, total weight, header problems and the
+    optimum from the subset's opt file (NaN when there is none).
+    The index is cached as a manifest CSV (root/mwcnf_manifest.csv by default). On open only new files and files
+    whose size or mtime changed are parsed - in a process pool - so a warm open reads no instance file at all.
+    Opt files are small and always read again.
+    """
+    def __init__(self, root, manifest_path=None, max_workers=None, frame=None):
+        self.root = root
+        self.manifest_path = manifest_path or os.path.join(root, MANIFEST_NAME)
+        self.frame = frame if frame is not None else self._build(max_workers)
+
+    def _build(self, max_workers):
+        paths = scan_instances(self.root)
+        cached = {}
+        if os.path.exists(self.manifest_path):
+            manifest = pd.read_csv(self.manifest_path, keep_default_na=False, na_values={"Optimum": [""]})
+            # paths are stored relative to root, the manifest stays valid when the tree is moved or opened from elsewhere
+            cached = {os.path.join(self.root, row["Path"]): row for row in manifest.to_dict("records")}
+
+        rows = {}
+        stale = []
+        for path in paths:
+            row = cached.get(path)
+            if row is not None:
+                stat = os.stat(path)
+                if stat.st_size == row["Size"] and stat.st_mtime_ns == row["Mtime_Ns"]:
+                    row["Path"] = path
+                    rows[path] = row
+                    continue
+            stale.append(path)
+
+        if stale:
+            print(f"Indexing {len(stale)} of {len(paths)} instances")
+            if max_workers == 1 or len(stale) < 64:
+                indexed = [_index_instance(path) for path in stale]
+            else:
+                n_workers = max_workers or os.cpu_count() or 1
+                with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    indexed = list(executor.map(_index_instance, stale, chunksize=max(1, len(stale) // (n_workers * 4))))
+            for row in indexed:
+                rows[row["Path"]] = row
+
+        optima = {}
+        for subset in {os.path.dirname(path) for path in paths}:
+            opt_path = subset + OPT_SUFFIX
+            if os.path.exists(opt_path):
+                optima[subset] = read_optima(opt_path)
+        for path, row in rows.items():
+            row["Optimum"] = optima.get(os.path.dirname(path), {}).get(row["Key"], np.nan)
+
+        frame = pd.DataFrame([rows[path] for path in paths], columns=["Path"] + COLUMNS)
+        if stale or len(cached) != len(paths):
+            tmp_path = self.manifest_path + ".tmp"
+            frame.assign(Path=[os.path.relpath(path, self.root) for path in paths]).to_csv(tmp_path, index=False)
+            os.replace(tmp_path, self.manifest_path)
+        return frame
+
+    def select(self, family=None, subset=None, min_vars=None, max_vars=None, with_optimum=False, query=None,
+               largest=None, smallest=None, by="Literals"):
+        """
+        New dataset of the matching rows, the manifest is not touched. family / subset are names or lists of names
+        ("wuf75-325", "wuf75-325-Q"), query is a pandas query string over the columns,
+        largest / smallest keep that many instances ordered by the column by (literal count = formula size),
+        ties broken by file size.
+        """
+        frame = self.frame
+        if family is not None:
+            frame = frame[frame["Family"].isin([family] if isinstance(family, str) else family)]
+        if subset is not None:
+            frame = frame[frame["Set"].isin([subset] if isinstance(subset, str) else subset)]
+        if min_vars is not None:
+            frame = frame[frame["Vars"] >= min_vars]
+        if max_vars is not None:
+            frame = frame[frame["Vars"] <= max_vars]
+        if with_optimum:
+            frame = frame[frame["Optimum"].notna()]
+        if query is not None:
+            frame = frame.query(query)
+        if largest is not None:
+            frame = frame.sort_values([by, "Size"], ascending=False, kind="stable").head(largest)
+        elif smallest is not None:
+            frame = frame.sort_values([by, "Size"], kind="stable").head(smallest)
+        return InstanceDataset(self.root, self.manifest_path, frame=frame)
+
+    @property
+    def paths(self):
+        return self.frame["Path"].tolist()
+
+    def solutions(self, by_path=False):
+        """
+        {key: optimum} of instances that have one, the solutions_dict expected by run_blackbox_parallel.
+        Keys repeat across subsets (wuf20-01 is in M, N, Q and R) - when such instances have different optima a
+        ValueError is raised, pass by_path=True to get {path: optimum} instead (run_blackbox_parallel takes both).
+        """
+        known = self.frame[self.frame["Optimum"].notna()]
+        optima = known["Optimum"].astype(int)
+        if by_path:
+            return dict(zip(known["Path"], optima))
+        result_dict = {}
+        for key, path, optimum in zip(known["Key"], known["Path"], optima):
+            if result_dict.setdefault(key, optimum) != optimum:
+                raise ValueError(f"{key} has different optima in this selection ({path}), use solutions(by_path=True)")
+        return result_dict
+
+    def instances(self, **kwargs):
+        """Loads the instances one by one (kwargs go to MWSATInstance)"""
+        for path in self.paths:
+            yield MWSATInstance(path, **kwargs)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __iter__(self):
+        return iter(self.paths)
@@ -0,0 +1,191 @@
+import numpy as np
+from MWSATInstance import MWSATInstance
+from MWSATSolution import MWSATSolution
+from simulated_annealing import calibrate_initial_temperature
+from trace_recorders import NoTrace
+
+
+class ChainArrays:
+    """Padded NumPy copy of the (normalized) occurrence index shared by all chains.
+    Padding slots point to an extra dummy clause (id num_clauses), so batched updates never collide with real clauses"""
+    def __init__(self, instance: MWSATInstance):
+        occurrences = instance.occurrences
+        self.num_vars = instance.num_vars
+        self.num_clauses = len(instance.clauses)
+        dummy = self.num_clauses
+
+        max_occ = max((len(ids) for ids in occurrences.clause_ids), default=0)
+        self.occ_clause = np.full((self.num_vars, max(1, max_occ)), dummy, dtype=np.int64)
+        self.occ_sign = np.zeros((self.num_vars, max(1, max_occ)), dtype=np.int8)
+        for var_idx in range(self.num_vars):
+            ids = occurrences.clause_ids[var_idx]
+            self.occ_clause[var_idx, :len(ids)] = ids
+            self.occ_sign[var_idx, :len(ids)] = occurrences.signs[var_idx]
+        self.occ_mask = self.occ_clause != dummy
+
+        # clause -> vars for picking a variable from an unsatisfied clause
+        self.clause_len = np.array([len(v) for v in occurrences.clause_vars], dtype=np.int64)
+        max_len = int(self.clause_len.max()) if self.num_clauses else 1
+        self.clause_vars = np.zeros((self.num_clauses + 1, max(1, max_len)), dtype=np.int64)
+        for clause_id, clause_vars in enumerate(occurrences.clause_vars):
+            self.clause_vars[clause_id, :len(clause_vars)] = clause_vars
+
+        self.tautologies = np.array(occurrences.tautologies, dtype=np.int64)
+        self.weights = np.asarray(instance.weights, dtype=np.int64)
+        self.normalized_weights = np.asarray(instance.normalized_weights, dtype=np.float64)
+
+    def true_counts(self, assignments):
+        """(chains x num_clauses + 1) true literal counts, last column is the dummy clause"""
+        chains = assignments.shape[0]
+        counts = np.zeros((chains, self.num_clauses + 1), dtype=np.int32)
+        rows = np.arange(chains)[:, None]
+        for var_idx in range(self.num_vars):
+            true_here = (self.occ_sign[var_idx][None, :] == assignments[:, var_idx][:, None]) & self.occ_mask[var_idx][None, :]
+            np.add.at(counts, (np.broadcast_to(rows, true_here.shape), np.broadcast_to(self.occ_clause[var_idx], true_here.shape)), true_here)
+        counts[:, self.tautologies] = 1
+        counts[:, self.num_clauses] = 1
+        return counts
+
+
+def simulated_annealing_multichain(instance: MWSATInstance,
+                                   n_chains: int,
+                                   P0: float,
+                                   cooling_coefficient: float,
+                                   equilibrium_steps: int,
+                                   max_steps_without_improvement: float,
+                                   fitness_coefficient: float,
+                                   random_flip=False,
+                                   seed=None,
+                                   traces=None,
+                                   initial_temperature=None,
+                                   calibration_cache=None):
+    """
+    Runs n_chains independent annealing chains in lockstep on 2-D NumPy state.
+    Every step each active chain picks a variable, its delta is computed from true literal counts of the clauses
+    the variable occurs in, and Metropolis acceptance, best tracking and cooling are done for all chains at once.
+    Same acceptance rule and stopping criteria as simulated_annealing; the initial temperature is calibrated once
+    (or taken from initial_temperature / calibration_cache) and shared by all chains.
+    traces is an optional list of recorders (one per chain), only end_level and total_steps are used - per step
+    recording would bring back the per chain Python loop.
+    Returns list of (best_state, trace values) in chain order.
+    """
+    rng = np.random.default_rng(seed) # int, SeedSequence or Generator
+    arrays = ChainArrays(instance)
+    num_vars = arrays.num_vars
+    num_clauses = arrays.num_clauses
+    if traces is None:
+        traces = [NoTrace() for _ in range(n_chains)]
+
+    if initial_temperature is None:
+        initial_temperature = calibrate_initial_temperature(instance, P0, fitness_coefficient, random_flip, calibration_cache,
+                                                            seed=rng)
+    temperature = initial_temperature
+
+    # state of active chains, rows are compacted when chains finish
+    chain_ids = np.arange(n_chains)
+    values = rng.integers(0, 2, size=(n_chains, num_vars), dtype=np.int8)
+    counts = arrays.true_counts(values)
+    unsat = counts == 0 # (chains x num_clauses + 1), dummy column is never unsat
+    sat = (counts[:, :num_clauses] > 0).sum(axis=1)
+    score = values @ arrays.weights
+    score_norm = values @ arrays.normalized_weights
+    fitness = score_norm - fitness_coefficient * (num_clauses - sat) / num_clauses * num_vars
+
+    best_values = values.copy()
+    best_sat = sat.copy()
+    best_score = score.copy()
+    steps_without_improvement = np.zeros(n_chains, dtype=np.int64)
+    total_steps = 0
+
+    # finished chains
+    final_values = np.empty((n_chains, num_vars), dtype=np.int8)
+    final_steps = np.zeros(n_chains, dtype=np.int64)
+
+    max_steps = max_steps_without_improvement * num_clauses
+    while len(chain_ids) > 0:
+        rows = np.arange(len(chain_ids))
+        for _ in range(equilibrium_steps * num_clauses):
+            chains = len(rows)
+            steps_without_improvement += 1
+            total_steps += 1
+
+            # PICK VARIABLE - total random, or random literal of a random unsat clause
+            var_to_flip = rng.integers(0, num_vars, size=chains)
+            if not random_flip:
+                unsat_count = num_clauses - sat
+                has_unsat = unsat_count > 0
+                if has_unsat.any():
+                    # positions of all unsat clauses, row by row - k-th unsat clause of a row is at row start + k
+                    flat_unsat = np.flatnonzero(unsat)
+                    row_start = np.cumsum(unsat_count) - unsat_count
+                    kth = (rng.random(chains) * unsat_count).astype(np.int64)
+                    flat_position = np.minimum(row_start + kth, len(flat_unsat) - 1)
+                    clause = flat_unsat[flat_position] - rows * (num_clauses + 1)
+                    clause = clause[has_unsat]
+                    position = (rng.random(len(clause)) * arrays.clause_len[clause]).astype(np.int64)
+                    var_to_flip[has_unsat] = arrays.clause_vars[clause, position]
+
+            # DELTA from counts of clauses the variable occurs in
+            occ_clause = arrays.occ_clause[var_to_flip]
+            occ_mask = arrays.occ_mask[var_to_flip]
+            value_before = values[rows, var_to_flip]
+            literal_true = arrays.occ_sign[var_to_flip] == value_before[:, None]
+            occ_counts = counts[rows[:, None], occ_clause]
+            breaks = (literal_true & (occ_counts == 1) & occ_mask).sum(axis=1)
+            makes = (~literal_true & (occ_counts == 0) & occ_mask).sum(axis=1)
+
+            direction = 1 - 2 * value_before.astype(np.int64) # +1 for 0 -> 1, -1 for 1 -> 0
+            new_sat = sat + makes - breaks
+            new_score = score + direction * arrays.weights[var_to_flip]
+            new_score_norm = score_norm + direction * arrays.normalized_weights[var_to_flip]
+            neighbor_fitness = new_score_norm - fitness_coefficient * (num_clauses - new_sat) / num_clauses * num_vars
+            delta = neighbor_fitness - fitness
+
+            # ACCEPT - greedy, better fitness, or Metropolis
+            greedy = (new_sat > sat) | ((new_sat == sat) & (new_score > score))
+            exponent = np.clip(delta / temperature, -100, 0) # positive delta is accepted anyway
+            accept = greedy | (delta > 0) | ((exponent > -100) & (rng.random(chains) < np.exp(exponent)))
+
+            if accept.any():
+                accepted = rows[accept]
+                increment = np.where(literal_true[accept], -1, 1).astype(np.int32) * occ_mask[accept]
+                accepted_clauses = occ_clause[accept]
+                new_counts = counts[accepted[:, None], accepted_clauses] + increment
+                counts[accepted[:, None], accepted_clauses] = new_counts
+                unsat[accepted[:, None], accepted_clauses] = new_counts == 0
+                values[accepted, var_to_flip[accept]] ^= 1
+                sat = np.where(accept, new_sat, sat)
+                score = np.where(accept, new_score, score)
+                score_norm = np.where(accept, new_score_norm, score_norm)
+                fitness = np.where(accept, neighbor_fitness, fitness)
+
+                improved = greedy & ((sat > best_sat) | ((sat == best_sat) & (score > best_score)))
+                if improved.any():
+                    best_values[improved] = values[improved]
+                    best_sat[improved] = sat[improved]
+                    best_score[improved] = score[improved]
+                    steps_without_improvement[improved] = 0
+
+        for row, chain_id in enumerate(chain_ids):
+            traces[chain_id].end_level(int(score[row]))
+        temperature *= cooling_coefficient
+
+        finished = steps_without_improvement >= max_steps
+        if temperature < 1e-5:
+            finished[:] = True
+        if finished.any():
+            final_values[chain_ids[finished]] = best_values[finished]
+            final_steps[chain_ids[finished]] = total_steps
+            keep = ~finished
+            chain_ids = chain_ids[keep]
+            values, counts, unsat = values[keep], counts[keep], unsat[keep]
+            sat, score, score_norm, fitness = sat[keep], score[keep], score_norm[keep], fitness[keep]
+            best_values, best_sat, best_score = best_values[keep], best_sat[keep], best_score[keep]
+            steps_without_improvement = steps_without_improvement[keep]
+
+    results = []
+    for chain_id in range(n_chains):
+        traces[chain_id].total_steps = int(final_steps[chain_id])
+        best_state = MWSATSolution(instance, variable_values=final_values[chain_id])
+        results.append((best_state, traces[chain_id].values()))
+    return results
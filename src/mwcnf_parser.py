@@ -0,0 +1,204 @@
+import bz2
+import gzip
+import lzma
+import os
+import re
+import time
+import warnings
+from array import array
+import numpy as np
+
+# magic bytes of supported compressed inputs, plain text otherwise
+_COMPRESSED = ((b"\x1f\x8b", gzip.open), (b"\xfd7zXZ\x00", lzma.open), (b"BZh", bz2.open))
+_INT32_MAX = 2 ** 31 - 1
+_NUMERIC = b"0123456789-+ \t\r\n"
+_EMPTY = np.zeros(0, dtype=np.int64)
+# line that is not a plain list of numbers - comment, p, w or % line
+_TEXT_LINE = re.compile(rb"^[ \t]*[^-+0-9\s].*$", re.M)
+
+
+def open_instance_file(path):
+    """Binary file object of an instance, gzip/xz/bz2 is recognized by its magic bytes (not by the suffix)"""
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    for magic, opener in _COMPRESSED:
+        if head.startswith(magic):
+            return opener(path, 'rb')
+    return open(path, 'rb')
+
+
+def _has_lone_sign(text):
+    """Sign without a digit after it - fromstring would glue "- 2" into -2 and read a trailing "-" as 0.
+    One vectorized pass over the bytes, substring searches for every sign + whitespace pair are a few times slower"""
+    chars = np.frombuffer(text, dtype=np.uint8)
+    sign = chars == 45 # "-"
+    if b"+" in text: # rare, skip the second pass when there is none
+        sign |= chars == 43
+    return bool(sign[-1] or (sign[:-1] & (chars[1:] - 48 > 9)).any()) # uint8 wraps, non digits end up over 9
+
+
+def _parse_ints(text, line_hint):
+    """Whitespace separated integers of text as int64 array, fromstring parses them in C without a token list"""
+    if not text or text.isspace():
+        return _EMPTY # fromstring reads blank text as a single 0
+    if _has_lone_sign(text):
+        raise ValueError(f"unexpected token in clauses near {line_hint!r}")
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning) # older numpy only warns on garbage
+            return np.fromstring(text, dtype=np.int64, sep=" ")
+    except (ValueError, DeprecationWarning):
+        raise ValueError(f"unexpected token in clauses near {line_hint!r}") from None
+
+
+class ParsedFormula:
+    """
+    Flat arrays of a parsed .mwcnf file - int32 weights, clause_offsets (num_clauses + 1) and literals, the same
+    layout as a compiled instance. Header counts are kept next to what was actually found, problems lists
+    every mismatch. bytes_read is the uncompressed text size, file_bytes the size on disk.
+    """
+    def __init__(self):
+        self.header_vars = None
+        self.header_clauses = None
+        self.num_vars = 0
+        self.weights = None
+        self.clause_offsets = None
+        self.literals = None
+        self.problems = []
+        self.bytes_read = 0
+        self.file_bytes = 0
+        self.seconds = 0.0
+
+    @property
+    def num_clauses(self):
+        return len(self.clause_offsets) - 1
+
+    @property
+    def mb_per_s(self):
+        """Parse throughput in (uncompressed) MB/s"""
+        return self.bytes_read / 1e6 / self.seconds if self.seconds > 0 else 0.0
+
+
+class _ClauseBuilder:
+    """Growable int32 literal and clause end arrays, fed with 0 terminated literal streams chunk by chunk"""
+    def __init__(self):
+        self.literals = array('i')
+        self.clause_ends = array('i', [0])
+        self.max_abs = 0
+
+    def add(self, ints):
+        if not len(ints):
+            return
+        nonzero = ints != 0
+        literals = ints[nonzero]
+        if len(literals):
+            max_abs = int(np.abs(literals).max())
+            if max_abs > _INT32_MAX:
+                raise ValueError(f"literal {max_abs} does not fit int32")
+            self.max_abs = max(self.max_abs, max_abs)
+        # end offset of every clause terminated in this chunk, counted over all literals so far
+        ends = np.cumsum(nonzero)[~nonzero] + len(self.literals)
+        self.literals.frombytes(literals.astype(np.int32).tobytes())
+        if len(ends):
+            ends = ends[np.diff(ends, prepend=self.clause_ends[-1]) > 0] # empty clauses (e.g. "0" after %) are skipped
+            self.clause_ends.frombytes(ends.astype(np.int32).tobytes())
+
+    def finish(self):
+        """Literals after the last 0 form a clause too, returns (clause_offsets, literals) as int32 arrays"""
+        if len(self.literals) > self.clause_ends[-1]:
+            self.clause_ends.append(len(self.literals))
+        return np.frombuffer(self.clause_ends, dtype=np.int32), np.frombuffer(self.literals, dtype=np.int32)
+
+
+def _parse_weights(weight_lines, num_vars, problems):
+    """
+    Weights from w lines. Each line is terminated by 0, but 0 is also a valid weight - the terminators are cut
+    only when the token count says they are there (declared count + one per line)
+    """
+    tokens = [_parse_ints(b" ".join(line.split()[1:]), line[:40]) for line in weight_lines]
+    total = sum(len(t) for t in tokens)
+    if num_vars is not None and total == num_vars + len(tokens) and all(len(t) and t[-1] == 0 for t in tokens):
+        tokens = [t[:-1] for t in tokens]
+    elif num_vars is None or total != num_vars:
+        # no header to go by - drop a trailing 0 of every line (the usual terminator)
+        tokens = [t[:-1] if len(t) and t[-1] == 0 else t for t in tokens]
+    weights = np.concatenate(tokens) if tokens else np.zeros(0, dtype=np.int64)
+    if len(weights) and (weights.min() < 0 or weights.max() > _INT32_MAX):
+        problems.append("weights out of range (negative or over int32)")
+    return weights.astype(np.int32)
+
+
+def parse_mwcnf(path, chunk_size=1 << 22, strict=False, verbose=False):
+    """
+    Streaming parser of .mwcnf (DIMACS style: c comments, "p mwcnf vars clauses", w weight line(s), 0 terminated
+    clauses), plain or gzip/xz/bz2 compressed. The file is read in chunk_size blocks, clause literals go straight
+    from the text into int32 arrays (numpy parses whole blocks) - no per clause Python objects.
+    Header counts are validated against the weights, clauses and largest variable found: mismatches go to
+    ParsedFormula.problems and raise ValueError with strict. verbose prints size, time and MB/s.
+    """
+    parsed = ParsedFormula()
+    builder = _ClauseBuilder()
+    weight_lines = []
+    start = time.perf_counter()
+    parsed.file_bytes = os.path.getsize(path)
+
+    with open_instance_file(path) as f:
+        carry = b""
+        while True:
+            block = f.read(chunk_size)
+            parsed.bytes_read += len(block)
+            if block:
+                block = carry + block
+                cut = block.rfind(b"\n") + 1 # only complete lines, the rest waits for the next block
+                if cut == 0:
+                    carry = block
+                    continue
+                block, carry = block[:cut], block[cut:]
+            else:
+                block, carry = carry, b""
+                if not block:
+                    break
+
+            if not block.translate(None, _NUMERIC):
+                builder.add(_parse_ints(block, block[:40])) # only clauses, the usual case past the header
+                continue
+            position = 0
+            for match in _TEXT_LINE.finditer(block):
+                builder.add(_parse_ints(block[position:match.start()], block[position:position + 40]))
+                position = match.end()
+                line = match.group().strip()
+                if line.startswith(b"p"):
+                    parts = line.split()
+                    if len(parts) != 4 or parts[1] != b"mwcnf":
+                        parsed.problems.append(f"unexpected header {line.decode(errors='replace')!r}")
+                    try:
+                        parsed.header_vars, parsed.header_clauses = int(parts[2]), int(parts[3])
+                    except (IndexError, ValueError):
+                        raise ValueError(f"malformed header {line.decode(errors='replace')!r}") from None
+                elif line.startswith(b"w"):
+                    weight_lines.append(line)
+                # c comments and % end markers are skipped
+            builder.add(_parse_ints(block[position:], block[position:position + 40]))
+
+    parsed.clause_offsets, parsed.literals = builder.finish()
+    parsed.weights = _parse_weights(weight_lines, parsed.header_vars, parsed.problems)
+    parsed.num_vars = parsed.header_vars if parsed.header_vars is not None else max(len(parsed.weights), builder.max_abs)
+
+    if parsed.header_vars is None:
+        parsed.problems.append("missing p mwcnf header")
+    else:
+        if len(parsed.weights) != parsed.header_vars:
+            parsed.problems.append(f"header declares {parsed.header_vars} variables, found {len(parsed.weights)} weights")
+        if parsed.num_clauses != parsed.header_clauses:
+            parsed.problems.append(f"header declares {parsed.header_clauses} clauses, found {parsed.num_clauses}")
+        if builder.max_abs > parsed.header_vars:
+            parsed.problems.append(f"variable {builder.max_abs} outside of the declared {parsed.header_vars}")
+    parsed.seconds = time.perf_counter() - start
+
+    name = os.path.basename(path)
+    if strict and parsed.problems:
+        raise ValueError(f"{name}: " + "; ".join(parsed.problems))
+    if verbose:
+        print(f"Parsed {name}: {parsed.num_vars} vars, {parsed.num_clauses} clauses, {parsed.bytes_read / 1e6:.1f} MB "
+              f"in {parsed.seconds:.2f}s ({parsed.mb_per_s:.1f} MB/s)")
+    return parsed
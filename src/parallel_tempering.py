@@ -0,0 +1,163 @@
+import math
+import time
+from MWSATInstance import MWSATInstance
+from MWSATSolution import MWSATSolution
+from simulated_annealing import compare_metrics, compare_states, calibrate_initial_temperature
+from trace_recorders import FullTrace
+from seeding import make_rng
+
+
+def _fitness(state: MWSATSolution, fitness_coefficient):
+    instance = state.instance
+    sat_unsat = len(state.unsatisfied_clauses) / instance.num_clauses
+    return state.current_score_norm - (fitness_coefficient * sat_unsat * instance.num_vars)
+
+
+def _walk(state: MWSATSolution, fitness, temperature, steps, fitness_coefficient, random_flip, best_state, rng):
+    """
+    steps Metropolis steps of one replica at fixed temperature, same moves and acceptance as simulated_annealing.
+    Returns (fitness, best_state, improved) - best_state is replaced by a copy when this replica beats it.
+    """
+    instance = state.instance
+    num_clauses = instance.num_clauses
+    num_vars = instance.num_vars
+    make_count = state.make_count
+    break_count = state.break_count
+    variable_values = state.variable_values
+    weights = instance.weights
+    normalized_weights = instance.normalized_weights
+    improved = False
+
+    for _ in range(steps):
+        if random_flip:
+            var_to_flip = rng.randint(1, num_vars)
+        elif state.unsatisfied_clauses:
+            clause = instance.clauses[state.unsatisfied_clauses.random_choice(rng)]
+            var_to_flip = abs(rng.choice(clause))
+        else:
+            var_to_flip = rng.randint(1, num_vars)
+
+        var_idx = var_to_flip - 1
+        old_sat = state.clauses_satisfied
+        old_score = state.current_score
+        new_sat = old_sat + make_count[var_idx] - break_count[var_idx]
+        if variable_values[var_idx] == 1:
+            new_score = old_score - weights[var_idx]
+            new_score_norm = state.current_score_norm - normalized_weights[var_idx]
+        else:
+            new_score = old_score + weights[var_idx]
+            new_score_norm = state.current_score_norm + normalized_weights[var_idx]
+        neighbor_fitness = new_score_norm - (fitness_coefficient * (num_clauses - new_sat) / num_clauses * num_vars)
+        delta = neighbor_fitness - fitness
+
+        greedy_move = compare_metrics(new_sat, new_score, old_sat, old_score)
+        if greedy_move or delta > 0:
+            accept_move = True
+        else:
+            exponent = delta / temperature
+            accept_move = exponent > -100 and rng.random() < math.exp(exponent)
+
+        if accept_move:
+            state.update_variable_and_score(var_to_flip)
+            fitness = neighbor_fitness
+            if greedy_move and compare_states(state, best_state):
+                best_state = state.copy()
+                improved = True
+
+    return fitness, best_state, improved
+
+
+def temperature_ladder(t_max, t_min, n_replicas):
+    """Geometric ladder from hottest to coldest - constant ratio between neighbours keeps swap rates even"""
+    if n_replicas == 1:
+        return [t_min]
+    ratio = (t_min / t_max) ** (1 / (n_replicas - 1))
+    return [t_max * ratio ** k for k in range(n_replicas)]
+
+
+def parallel_tempering(instance: MWSATInstance,
+                       n_replicas: int,
+                       P0: float,
+                       fitness_coefficient: float,
+                       max_steps_without_improvement: float,
+                       equilibrium_steps: int = 1,
+                       min_temperature_ratio: float = 1e-3,
+                       random_flip=False,
+                       trace=None,
+                       initial_temperature=None,
+                       calibration_cache=None,
+                       time_limit=None,
+                       target_score=None,
+                       seed=None):
+    """
+    Replica exchange: n_replicas MWSATSolution states walk at fixed temperatures of a geometric ladder from T0
+    (calibrated like in simulated_annealing) down to T0 * min_temperature_ratio. After every
+    equilibrium_steps * num_clauses steps of each replica, neighbouring replicas (even and odd pairs alternately)
+    swap states with probability min(1, exp((f_j - f_i) * (1/T_i - 1/T_j))), f being the annealing fitness.
+    Stops after max_steps_without_improvement * num_clauses steps per replica without a new best state,
+    on time_limit (seconds, checked between rounds) or once a valid state reaches target_score.
+    Returns (best_state, trace values) like simulated_annealing, trace.end_level gets the coldest replica's score
+    every round and trace.swap_rates the accepted swap fraction of every neighbour pair.
+    seed makes the run reproducible, see seeding.make_rng.
+    """
+    if trace is None:
+        trace = FullTrace()
+    start_time = time.perf_counter()
+    deadline = start_time + time_limit if time_limit is not None else math.inf
+    rng = make_rng(seed)
+    calibration_seed = rng.getrandbits(64)
+
+    if initial_temperature is None:
+        initial_temperature = calibrate_initial_temperature(instance, P0, fitness_coefficient, random_flip, calibration_cache,
+                                                            seed=calibration_seed)
+    temperatures = temperature_ladder(initial_temperature, initial_temperature * min_temperature_ratio, n_replicas)
+
+    replicas = [MWSATSolution(instance, rng=rng) for _ in range(n_replicas)] # replicas[k] walks at temperatures[k]
+    fitnesses = [_fitness(state, fitness_coefficient) for state in replicas]
+    best_state = replicas[0].copy()
+    for state in replicas[1:]:
+        if compare_states(state, best_state):
+            best_state = state.copy()
+
+    steps_per_round = equilibrium_steps * instance.num_clauses
+    max_steps = max_steps_without_improvement * instance.num_clauses
+    swaps_tried = [0] * max(0, n_replicas - 1)
+    swaps_accepted = [0] * max(0, n_replicas - 1)
+    steps_without_improvement = 0
+    total_steps = 0
+    rounds = 0
+    stop_reason = "no_improvement"
+
+    while steps_without_improvement < max_steps:
+        improved = False
+        for k in range(n_replicas):
+            fitnesses[k], best_state, replica_improved = _walk(replicas[k], fitnesses[k], temperatures[k], steps_per_round,
+                                                               fitness_coefficient, random_flip, best_state, rng)
+            improved = improved or replica_improved
+        total_steps += steps_per_round * n_replicas
+        steps_without_improvement = 0 if improved else steps_without_improvement + steps_per_round
+
+        # SWAP neighbouring replicas, even pairs on even rounds and odd pairs on odd ones
+        for i in range(rounds % 2, n_replicas - 1, 2):
+            j = i + 1
+            swaps_tried[i] += 1
+            exponent = (fitnesses[j] - fitnesses[i]) * (1 / temperatures[i] - 1 / temperatures[j])
+            if exponent >= 0 or rng.random() < math.exp(max(exponent, -100)):
+                swaps_accepted[i] += 1
+                replicas[i], replicas[j] = replicas[j], replicas[i]
+                fitnesses[i], fitnesses[j] = fitnesses[j], fitnesses[i]
+        rounds += 1
+        trace.end_level(replicas[-1].current_score)
+
+        if (target_score is not None and best_state.clauses_satisfied == instance.num_clauses
+                and best_state.current_score >= target_score):
+            stop_reason = "target_score"
+            break
+        if time.perf_counter() >= deadline:
+            stop_reason = "time_limit"
+            break
+
+    trace.total_steps = total_steps
+    trace.stop_reason = stop_reason
+    trace.swap_rates = [accepted / tried if tried else 0.0 for accepted, tried in zip(swaps_accepted, swaps_tried)]
+    return best_state, trace.values()
@@ -0,0 +1,212 @@
+import itertools
+import json
+import math
+import random
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from worker_utils import run_configs_parallel
+from seeding import new_base_seed
+
+# parameters of simulated_annealing that can be swept
+SWEEP_PARAMS = ("P0", "cooling_coefficient", "equilibrium_steps", "max_steps_without_improvement",
+                "fitness_coefficient", "random_flip")
+
+
+def _check_names(names):
+    unknown = [name for name in names if name not in SWEEP_PARAMS]
+    if unknown:
+        raise ValueError(f"Unknown parameters {unknown}, expected some of {SWEEP_PARAMS}")
+
+
+def grid_configs(base_params, grid):
+    """All combinations of grid = {param_name: [values]} on top of base_params, last parameter varies fastest"""
+    _check_names(grid)
+    names = list(grid)
+    configs = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = base_params.copy()
+        params.update(zip(names, values))
+        configs.append(params)
+    return configs
+
+
+def random_configs(base_params, space, n_samples, seed=None):
+    """
+    n_samples random configs on top of base_params. space = {param_name: choices}, where choices is
+    a list (one element is picked) or a (low, high) tuple (uniform; integer when both bounds are ints).
+    """
+    _check_names(space)
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(n_samples):
+        params = base_params.copy()
+        for name, choices in space.items():
+            if isinstance(choices, tuple):
+                low, high = choices
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = rng.randint(low, high)
+                else:
+                    params[name] = rng.uniform(low, high)
+            else:
+                params[name] = rng.choice(choices)
+        configs.append(params)
+    return configs
+
+
+def run_sweep(configs, instance_paths, solutions_dict, n_repeats=4, max_workers=None, results_path=None,
+              share_instances=True, seed=None):
+    """
+    Runs every config n_repeats times on every instance in one process pool, returns DataFrame of all runs
+    with a Config column plus the values of parameters that differ between configs.
+    With results_path runs are streamed to that file and an interrupted sweep resumes where it stopped.
+    Every config runs on the same random streams per (instance, repeat), see run_configs_parallel.
+    """
+    varying = [name for name in SWEEP_PARAMS if len({repr(params.get(name)) for params in configs}) > 1]
+    return run_configs_parallel(instance_paths, solutions_dict, configs, n_repeats, max_workers, share_instances,
+                                results_path=results_path, config_columns=varying, title="Parameter Sweep",
+                                seed=seed)
+
+
+def summarize_sweep(results, labels=None):
+    """
+    One summary row per config: Runs, Solved, Optimal, Avg_Pct_Opt (over solved runs) and Avg_Steps.
+    labels maps config index -> value shown in the Val column (defaults to the index).
+    """
+    summary_rows = []
+    if len(results) == 0:
+        return summary_rows
+    for config, runs in results.groupby("Config", sort=True):
+        solved = runs[runs["Is_Valid"]]
+        with_optimum = solved[solved["Optimum"] > 0]
+        pct_opts = (solved["Score"] / solved["Optimum"] * 100).where(solved["Optimum"] > 0, 0.0)
+        summary_rows.append({
+            "Val": labels[config] if labels is not None else config,
+            "Runs": len(runs),
+            "Solved": len(solved),
+            "Optimal": int((with_optimum["Score"] >= with_optimum["Optimum"]).sum()),
+            "Avg_Pct_Opt": float(pct_opts.mean()) if len(pct_opts) else 0,
+            "Avg_Steps": float(runs["Steps"].mean())
+        })
+    return summary_rows
+
+
+def _block_costs(results, config_ids, speed_tie_break=False):
+    """
+    (blocks x configs) matrix of run costs, a block is one (instance, repeat) all the configs ran on.
+    Instances are told apart by the full path from Run_Key - subsets reuse file names (wuf20-01.mwcnf is in M, N, Q, R).
+    Cost is relative error (1 for invalid runs); with speed_tie_break equally good runs are told apart by steps.
+    """
+    runs = results[results["Config"].isin(config_ids)]
+    cost = runs["Rel_Error"] + runs["Steps"] * 1e-12 if speed_tie_break else runs["Rel_Error"]
+    paths = runs["Run_Key"].map(lambda key: json.loads(key)[0])
+    runs = runs.assign(Block=paths + "#" + runs["Repeat"].astype(str), Cost=cost)
+    costs = runs.pivot_table(index="Block", columns="Config", values="Cost", aggfunc="first")[list(config_ids)]
+    return costs.dropna().to_numpy()
+
+
+def _chi2_quantile(p, df):
+    """Wilson-Hilferty approximation of the chi square quantile"""
+    z = NormalDist().inv_cdf(p)
+    return df * (1 - 2 / (9 * df) + z * math.sqrt(2 / (9 * df))) ** 3
+
+
+def friedman_statistic(costs):
+    """
+    Friedman statistic (Conover's tie corrected form) of a (b blocks x k configs) cost matrix with within-block ranks:
+    T = (k - 1) * (sum R_j^2 - b * C1) / (A1 - C1), A1 = sum of squared ranks, C1 = b k (k + 1)^2 / 4.
+    Without ties it equals 12 / (b k (k + 1)) * sum R_j^2 - 3 b (k + 1). Returns (T, rank sums, A1), T is None
+    when every block is a tie.
+    """
+    blocks, k = costs.shape
+    ranks = pd.DataFrame(costs).rank(axis=1).to_numpy() # average ranks for ties
+    rank_sums = ranks.sum(axis=0)
+    a = (ranks ** 2).sum()
+    c = blocks * k * (k + 1) ** 2 / 4 # C1
+    if a - c <= 1e-12:
+        return None, rank_sums, a
+    return (k - 1) * ((rank_sums ** 2).sum() - blocks * c) / (a - c), rank_sums, a
+
+
+def friedman_eliminate(costs, alpha=0.05):
+    """
+    F-race step on a (blocks x configs) cost matrix: Friedman test over within-block ranks, when it rejects
+    "all configs are equal", configs whose rank sum is significantly worse than the best one (Conover post-hoc test)
+    are returned as column indexes to drop, worst (highest rank sum) first.
+    """
+    blocks, k = costs.shape
+    if blocks < 2 or k < 2:
+        return []
+    statistic, rank_sums, a = friedman_statistic(costs)
+    if statistic is None or statistic <= _chi2_quantile(1 - alpha, k - 1):
+        return []
+
+    best = rank_sums.min()
+    spread = math.sqrt(2 * (blocks * a - (rank_sums ** 2).sum()) / ((blocks - 1) * (k - 1)))
+    critical = NormalDist().inv_cdf(1 - alpha / 2) * spread # t quantile, normal for the usual block counts
+    worse = [j for j in range(k) if rank_sums[j] - best > critical]
+    return sorted(worse, key=lambda j: rank_sums[j], reverse=True)
+
+
+def race_configs(configs, instance_paths, solutions_dict, max_repeats=4, runs_per_round=1, min_blocks=5, alpha=0.05,
+                 halving=False, min_survivors=1, speed_tie_break=False, max_workers=None, results_path=None, seed=None):
+    """
+    Racing (F-race) over configs: every round the surviving configs get runs_per_round more repeats on every instance,
+    then configs statistically worse than the best one are dropped (friedman_eliminate, once min_blocks blocks exist),
+    or with halving the worse half by rank is dropped (successive halving). Stops after max_repeats repeats or when
+    min_survivors configs remain. Runs are compared by relative error, see _block_costs. Returns (summary rows with Alive flag, DataFrame of all runs) and prints
+    CPU seconds spent and saved compared to running every config max_repeats times.
+    All rounds share one seed (fresh one when None), so every config sees the same run streams.
+    """
+    if seed is None:
+        seed = new_base_seed()
+    varying = [name for name in SWEEP_PARAMS if len({repr(params.get(name)) for params in configs}) > 1]
+    alive = list(range(len(configs)))
+    frames = []
+    done = 0
+    while done < max_repeats:
+        repeats = min(runs_per_round, max_repeats - done)
+        round_results = run_configs_parallel(instance_paths, solutions_dict, [configs[i] for i in alive], repeats,
+                                             max_workers, results_path=results_path, config_columns=varying,
+                                             title=f"Race Round (repeats {done}-{done + repeats - 1}, {len(alive)} configs)",
+                                             first_repeat=done, seed=seed)
+        if len(round_results):
+            # only this round's repeats - Config indexes the round's list of alive configs
+            round_results = round_results[round_results["Repeat"].between(done, done + repeats - 1)].copy()
+            round_results["Config"] = round_results["Config"].map(lambda index: alive[index])
+            frames.append(round_results)
+        done += repeats
+        if done >= max_repeats or len(alive) <= min_survivors or not frames:
+            continue # nothing left to decide
+
+        costs = _block_costs(pd.concat(frames, ignore_index=True), alive, speed_tie_break)
+        if len(costs) == 0:
+            # no block every alive config finished (failed tasks, no instances) - nothing to rank them by
+            print(f"No complete blocks after {done} repeats, keeping all {len(alive)} configs")
+            dropped = []
+        elif halving:
+            order = np.argsort(pd.DataFrame(costs).rank(axis=1).to_numpy().sum(axis=0), kind="stable")
+            keep = max(min_survivors, (len(alive) + 1) // 2)
+            dropped = list(order[keep:])
+        elif len(costs) >= min_blocks:
+            dropped = friedman_eliminate(costs, alpha)[:len(alive) - min_survivors] # worst ones go first
+        else:
+            dropped = []
+        if dropped:
+            print(f"Eliminated configs {[alive[j] for j in dropped]} after {done} repeats")
+            alive = [config for j, config in enumerate(alive) if j not in set(dropped)]
+
+    results = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    summary_rows = summarize_sweep(results)
+    for row in summary_rows:
+        row["Alive"] = row["Val"] in alive
+
+    # CPU time saved - runs that were not done, at the mean run time of the config that skipped them
+    spent = float(results["Time"].sum()) if len(results) else 0.0
+    saved = 0.0
+    for config, runs in results.groupby("Config") if len(results) else []:
+        skipped = len(instance_paths) * max_repeats - len(runs)
+        saved += skipped * runs["Time"].mean()
+    print(f"Race finished with configs {alive}: {spent:.1f} CPU s spent, about {saved:.1f} CPU s saved "
+          f"({saved / (spent + saved) * 100 if spent + saved else 0:.0f}% of the exhaustive sweep)")
+    return summary_rows, results
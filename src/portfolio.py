@@ -0,0 +1,128 @@
+import concurrent.futures
+import multiprocessing
+import os
+import time
+from MWSATInstance import MWSATInstance
+from MWSATSolution import MWSATSolution
+from simulated_annealing import simulated_annealing, compare_states
+from shared_instances import SharedInstanceStore
+from trace_recorders import NoTrace
+from worker_utils import _get_instance, _calibration_cache
+from seeding import derive_seed, new_base_seed
+
+# set in every worker by _init_member
+_best_score = None # best valid score found by any member
+_stop_event = None # set once the target is reached
+
+
+def _init_member(best_score, stop_event):
+    global _best_score, _stop_event
+    _best_score = best_score
+    _stop_event = stop_event
+
+
+def _member_task(filepath, shared_handle, member, params, deadline, target_score, prune_after, base_seed):
+    """
+    One portfolio member: reruns simulated_annealing with its params until the deadline, the target or cancellation.
+    Publishes its valid scores to the shared best score. With prune_after it gives up after that many seconds
+    when it is behind the shared best valid score.
+    """
+    start_time = time.time()
+    instance = _get_instance(filepath, shared_handle)
+    best_state = None
+    runs = steps = 0
+    stop_reason = "time_limit"
+
+    def publish(state, total_steps, elapsed):
+        if state.clauses_satisfied == instance.num_clauses:
+            with _best_score.get_lock():
+                if state.current_score > _best_score.value:
+                    _best_score.value = state.current_score
+        return False
+
+    def behind():
+        if prune_after is None or time.time() - start_time < prune_after:
+            return False
+        own = best_state.current_score if best_state is not None and best_state.clauses_satisfied == instance.num_clauses else -1
+        return own < _best_score.value
+
+    def stop_check():
+        return _stop_event.is_set() or behind()
+
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        if stop_check():
+            stop_reason = "cancelled" if _stop_event.is_set() else "pruned"
+            break
+        trace = NoTrace()
+        state, _ = simulated_annealing(instance, trace=trace, calibration_cache=_calibration_cache, time_limit=remaining,
+                                       target_score=target_score, on_improvement=publish, stop_check=stop_check,
+                                       seed=derive_seed(base_seed, member, runs), **params)
+        runs += 1
+        steps += trace.total_steps
+        if best_state is None or compare_states(state, best_state):
+            best_state = state
+        if trace.stop_reason == "target_score":
+            stop_reason = "target_score"
+            _stop_event.set()
+            break
+
+    return {
+        "Member": member,
+        "Params": params,
+        "Seed": base_seed,
+        "Runs": runs,
+        "Steps": steps,
+        "Time": time.time() - start_time,
+        "Is_Valid": best_state is not None and best_state.clauses_satisfied == instance.num_clauses,
+        "Score": best_state.current_score if best_state is not None else None,
+        "Stop_Reason": stop_reason,
+        "Values": bytes(best_state.variable_values) if best_state is not None else None,
+    }
+
+
+def portfolio_solve(instance_path, configs, time_limit, target_score=None, max_workers=None, prune_after=None, seed=None):
+    """
+    Races several simulated_annealing parameter dicts on one instance in a process pool until time_limit seconds pass
+    or a member finds a valid solution with score >= target_score - then all other members are cancelled.
+    Members share the best valid score found so far, with prune_after (seconds) members that are behind it give up
+    and free their core for queued members - without it members beyond max_workers only run once others finish.
+    Every run of every member has its own stream derived from seed, the base seed is in the stats as Seed.
+    Returns (best state over all members or None, list of per member stat dicts).
+    """
+    base_seed = seed if seed is not None else new_base_seed()
+    instance = MWSATInstance(instance_path)
+    deadline = time.time() + time_limit
+    context = multiprocessing.get_context()
+    best_score = context.Value('q', -1)
+    stop_event = context.Event()
+    max_workers = max_workers or min(len(configs), os.cpu_count() or 1)
+
+    stats = []
+    with SharedInstanceStore() as shared, concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=context, initializer=_init_member, initargs=(best_score, stop_event)) as executor:
+        shared_handle = shared.add(instance_path)
+        futures = [executor.submit(_member_task, instance_path, shared_handle, member, params, deadline, target_score, prune_after,
+                                   base_seed)
+                   for member, params in enumerate(configs)]
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                stats.append(future.result())
+            except Exception as e:
+                print(f"Portfolio member generated an exception: {e}")
+
+    stats.sort(key=lambda row: row["Member"])
+    best_state = None
+    for row in stats:
+        values = row.pop("Values")
+        if values is None:
+            continue
+        state = MWSATSolution(instance, variable_values=values)
+        if best_state is None or compare_states(state, best_state):
+            best_state = state
+            winner = row["Member"]
+    for row in stats:
+        row["Winner"] = best_state is not None and row["Member"] == winner
+    return best_state, stats
@@ -0,0 +1,211 @@
+import numpy as np
+from MWSATInstance import MWSATInstance
+from MWSATSolution import MWSATSolution
+from simulated_annealing import simulated_annealing
+
+
+class Reduction:
+    """
+    Result of preprocess: the reduced instance and what is needed to map its assignments back.
+    fixed - original variable -> forced 0/1 value, var_map - reduced variable index -> original variable.
+    conflict is True when unit propagation derived an empty clause (no valid assignment exists), the
+    instance is then left as it was. stats counts what every rule removed.
+    """
+    def __init__(self, original, instance, fixed, var_map, stats, conflict=False):
+        self.original = original
+        self.instance = instance
+        self.fixed = fixed
+        self.var_map = var_map
+        self.stats = stats
+        self.conflict = conflict
+        # weight of the variables fixed to true, a full assignment scores this plus the reduced score
+        self.fixed_score = sum(original.weights[var - 1] for var, value in fixed.items() if value)
+
+    def expand(self, values):
+        """Full 0/1 assignment of the original instance from an assignment of the reduced one"""
+        full = bytearray(self.original.num_vars)
+        for var, value in self.fixed.items():
+            full[var - 1] = value
+        for var_idx, var in enumerate(self.var_map):
+            full[var - 1] = values[var_idx]
+        return full
+
+    def restrict(self, values):
+        """Assignment of the reduced instance taken from a full one (e.g. a warm start), fixed variables are dropped"""
+        return bytearray(values[var - 1] for var in self.var_map)
+
+    def expand_state(self, state: MWSATSolution):
+        """MWSATSolution of the original instance for a state of the reduced one"""
+        return MWSATSolution(self.original, self.expand(state.variable_values))
+
+    def summary(self):
+        return (f"{self.stats['vars_before']} -> {self.stats['vars_after']} vars, "
+                f"{self.stats['clauses_before']} -> {self.stats['clauses_after']} clauses "
+                f"(units {self.stats['units']}, pure {self.stats['pure']}, free {self.stats['free']}, "
+                f"tautologies {self.stats['tautologies']}, duplicates {self.stats['duplicates']}, "
+                f"subsumed {self.stats['subsumed']})")
+
+
+class _Formula:
+    """Mutable clause sets with literal -> clause ids occurrence lists, clauses are only ever removed or shrunk"""
+    def __init__(self, clauses):
+        self.clauses = [set(clause) for clause in clauses]
+        self.alive = [True] * len(clauses)
+        self.occurrences = {}
+        for clause_id, clause in enumerate(self.clauses):
+            for lit in clause:
+                self.occurrences.setdefault(lit, set()).add(clause_id)
+        self.fixed = {}
+        self.units = [] # literals still to propagate
+        self.conflict = False
+
+    def remove(self, clause_id):
+        self.alive[clause_id] = False
+        for lit in self.clauses[clause_id]:
+            self.occurrences[lit].discard(clause_id)
+
+    def occurrences_of(self, lit):
+        return self.occurrences.get(lit, ())
+
+    def assign(self, lit):
+        """Makes lit true - clauses with lit are satisfied, -lit is removed from the others"""
+        var = abs(lit)
+        value = 1 if lit > 0 else 0
+        if var in self.fixed:
+            if self.fixed[var] != value:
+                self.conflict = True
+            return
+        self.fixed[var] = value
+        for clause_id in list(self.occurrences_of(lit)):
+            self.remove(clause_id)
+        for clause_id in list(self.occurrences_of(-lit)):
+            clause = self.clauses[clause_id]
+            clause.discard(-lit)
+            self.occurrences[-lit].discard(clause_id)
+            if not clause:
+                self.conflict = True
+            elif len(clause) == 1:
+                self.units.append(next(iter(clause)))
+
+    def propagate(self):
+        """Unit propagation to a fixpoint, returns number of variables fixed"""
+        count = 0
+        while self.units and not self.conflict:
+            lit = self.units.pop()
+            if abs(lit) not in self.fixed:
+                count += 1
+            self.assign(lit)
+        return count
+
+    def subsume(self):
+        """Removes clauses that are a superset of another clause (equal ones included), shortest clauses go first"""
+        count = 0
+        order = sorted((clause_id for clause_id, alive in enumerate(self.alive) if alive),
+                       key=lambda clause_id: len(self.clauses[clause_id]))
+        for clause_id in order:
+            if not self.alive[clause_id]:
+                continue
+            clause = self.clauses[clause_id]
+            # every superset contains the rarest literal of the clause
+            rarest = min(clause, key=lambda lit: len(self.occurrences_of(lit)))
+            for other_id in list(self.occurrences_of(rarest)):
+                if other_id != clause_id and len(self.clauses[other_id]) >= len(clause) and clause <= self.clauses[other_id]:
+                    self.remove(other_id)
+                    count += 1
+        return count
+
+
+def preprocess(instance: MWSATInstance, subsumption=True):
+    """
+    Shrinks the instance without changing its optimum: unit clauses are propagated (their literal is forced in every
+    valid assignment), pure literals are fixed where it cannot cost weight (only positive occurrences - setting the
+    variable true satisfies its clauses and adds weight, only negative ones - only for zero weight), variables left
+    in no clause are set true, tautologies and duplicate clauses are dropped and with subsumption every clause
+    containing another clause is removed. Rules are repeated until none applies.
+    Returns a Reduction with the reduced instance and the mapping back to full assignments.
+    """
+    weights = instance.weights
+    stats = dict.fromkeys(("units", "pure", "free", "tautologies", "duplicates", "subsumed"), 0)
+    stats["vars_before"] = instance.num_vars
+    stats["clauses_before"] = instance.num_clauses
+
+    # tautologies and duplicates (up to literal order and repeats)
+    clauses = []
+    seen = set()
+    for clause in instance.clauses:
+        literals = frozenset(clause)
+        if any(-lit in literals for lit in literals):
+            stats["tautologies"] += 1
+        elif literals in seen:
+            stats["duplicates"] += 1
+        else:
+            seen.add(literals)
+            clauses.append(literals)
+
+    formula = _Formula(clauses)
+    formula.units = [next(iter(clause)) for clause in formula.clauses if len(clause) == 1]
+    changed = True
+    while changed and not formula.conflict:
+        stats["units"] += formula.propagate()
+        if formula.conflict:
+            break
+        pure = []
+        for var in range(1, instance.num_vars + 1):
+            if var in formula.fixed:
+                continue
+            positive = len(formula.occurrences_of(var))
+            negative = len(formula.occurrences_of(-var))
+            if positive and not negative and weights[var - 1] >= 0:
+                pure.append(var)
+            elif negative and not positive and weights[var - 1] == 0:
+                pure.append(-var)
+        for lit in pure:
+            formula.assign(lit)
+        stats["pure"] += len(pure)
+        subsumed = formula.subsume() if subsumption else 0
+        stats["subsumed"] += subsumed
+        changed = bool(pure or subsumed or formula.units)
+
+    if formula.conflict:
+        stats.update(vars_after=instance.num_vars, clauses_after=instance.num_clauses)
+        return Reduction(instance, instance, {}, list(range(1, instance.num_vars + 1)), stats, conflict=True)
+
+    # variables in no remaining clause only add weight
+    fixed = formula.fixed
+    used = set()
+    remaining = [sorted(formula.clauses[clause_id], key=abs) for clause_id, alive in enumerate(formula.alive) if alive]
+    for clause in remaining:
+        used.update(abs(lit) for lit in clause)
+    for var in range(1, instance.num_vars + 1):
+        if var not in fixed and var not in used:
+            fixed[var] = 1 if weights[var - 1] >= 0 else 0
+            stats["free"] += 1
+
+    var_map = sorted(used)
+    new_index = {var: var_idx + 1 for var_idx, var in enumerate(var_map)}
+    clause_offsets = np.zeros(len(remaining) + 1, dtype=np.int32)
+    np.cumsum([len(clause) for clause in remaining], out=clause_offsets[1:])
+    literals = np.array([new_index[abs(lit)] * (1 if lit > 0 else -1) for clause in remaining for lit in clause],
+                        dtype=np.int32)
+    reduced_weights = np.array([weights[var - 1] for var in var_map], dtype=np.int64)
+    reduced = MWSATInstance(instance.filepath, penalty_violation_factor=instance.penalty_factor, use_compiled=False,
+                            formula=(len(var_map), reduced_weights, clause_offsets, literals))
+    stats.update(vars_after=reduced.num_vars, clauses_after=reduced.num_clauses)
+    return Reduction(instance, reduced, fixed, var_map, stats)
+
+
+def solve_preprocessed(instance: MWSATInstance, solver=simulated_annealing, reduction=None, **solver_kwargs):
+    """
+    Runs solver (simulated_annealing or anything with the same call and return) on the reduced instance and returns
+    (best state of the original instance, history, reduction). Pass reduction to reuse one between runs.
+    target_score is given for the original instance and translated to the reduced one.
+    When nothing is left to search (every variable fixed) the solver is not called and history is empty.
+    """
+    if reduction is None:
+        reduction = preprocess(instance)
+    if reduction.instance.num_clauses == 0 and reduction.instance.num_vars == 0:
+        return MWSATSolution(instance, reduction.expand(b"")), [], reduction
+    if solver_kwargs.get("target_score") is not None:
+        solver_kwargs["target_score"] -= reduction.fixed_score
+    best_state, history = solver(reduction.instance, **solver_kwargs)
+    return reduction.expand_state(best_state), history, reduction
@@ -0,0 +1,63 @@
+import random
+from abc import ABC, abstractmethod
+
+
+def luby(i):
+    """i-th element (from 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ..."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while True:
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+
+
+class RestartPolicy(ABC):
+    """
+    Restart schedule for simulated_annealing. A restart happens when the run has gone interval(k) * num_clauses steps
+    without improving its best state and without restarting - checked at the end of every temperature level.
+    On restart the temperature is reheated to reheat_fraction * T0; with perturb_fraction > 0 the search
+    also continues from the best state with that fraction of variables flipped at random, otherwise from the current one.
+    """
+    def __init__(self, reheat_fraction=0.5, perturb_fraction=0.0):
+        self.reheat_fraction = reheat_fraction
+        self.perturb_fraction = perturb_fraction
+
+    @abstractmethod
+    def interval(self, k):
+        """Stagnation length before the k-th restart (from 1), in multiples of num_clauses steps"""
+
+    def restart_state(self, current_state, best_state, rng=random):
+        """State the search continues from, perturbation is drawn from rng"""
+        if self.perturb_fraction <= 0:
+            return current_state
+        state = best_state.copy()
+        num_vars = state.instance.num_vars
+        for var_idx in rng.sample(range(num_vars), max(1, round(self.perturb_fraction * num_vars))):
+            state.update_variable_and_score(var_idx + 1)
+        return state
+
+
+class LubyRestarts(RestartPolicy):
+    """Intervals unit * luby(k) - the universal schedule, no tuning of the interval length needed"""
+    def __init__(self, unit=1.0, reheat_fraction=0.5, perturb_fraction=0.0):
+        super().__init__(reheat_fraction, perturb_fraction)
+        self.unit = unit
+
+    def interval(self, k):
+        return self.unit * luby(k)
+
+
+class GeometricRestarts(RestartPolicy):
+    """Intervals first * factor ** (k - 1)"""
+    def __init__(self, first=1.0, factor=1.5, reheat_fraction=0.5, perturb_fraction=0.0):
+        super().__init__(reheat_fraction, perturb_fraction)
+        self.first = first
+        self.factor = factor
+
+    def interval(self, k):
+        return self.first * self.factor ** (k - 1)
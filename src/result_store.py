@@ -0,0 +1,92 @@
+import json
+import os
+import time
+import pandas as pd
+
+
+def params_key(params):
+    """Stable text form of a parameter dict"""
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def run_key(instance_path, params, repeat, seed=None):
+    """Identifies one run: (instance, params, repeat, seed) - absolute path, so a resume from another cwd matches"""
+    return json.dumps([os.path.abspath(instance_path), params_key(params), repeat, seed])
+
+
+class ResultStore:
+    """
+    Append-only JSON lines file of run records, flushed every flush_every records or flush_seconds.
+    The file is its own manifest - completed run keys are read back on open, so an interrupted
+    evaluation resumes by skipping them. A partially written last line (crash mid write) is cut off.
+    """
+    def __init__(self, path, flush_every=50, flush_seconds=10.0, fsync=False):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.fsync = fsync
+        self.completed = set()
+        self._pending = 0
+        self._last_flush = time.time()
+
+        if os.path.exists(path):
+            self._read_manifest()
+        self.file = open(path, 'a')
+
+    def _read_manifest(self):
+        valid_size = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break # torn write
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                valid_size += len(line)
+                if "Run_Key" in record:
+                    self.completed.add(record["Run_Key"])
+        if valid_size != os.path.getsize(self.path):
+            print(f"Truncating damaged tail of {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_size)
+
+    def is_completed(self, key):
+        return key in self.completed
+
+    def append(self, record):
+        """Writes one record, it should carry its Run_Key"""
+        self.file.write(json.dumps(record, default=str) + "\n")
+        if "Run_Key" in record:
+            self.completed.add(record["Run_Key"])
+        self._pending += 1
+        if self._pending >= self.flush_every or time.time() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+        self._pending = 0
+        self._last_flush = time.time()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_results(path, chunksize=None):
+    """
+    DataFrame of all stored records. With chunksize an iterator of DataFrames is returned instead,
+    so a large result file can be aggregated without loading it whole.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return iter([]) if chunksize else pd.DataFrame()
+    return pd.read_json(path, lines=True, chunksize=chunksize)
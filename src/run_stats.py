@@ -0,0 +1,77 @@
+from array import array
+
+
+class RunStats:
+    """
+    Counters and timers of one simulated_annealing run, passed in like a trace and filled in by the solver.
+    Move counters and per temperature level figures (steps, seconds, temperature, unsatisfied clauses at the end
+    of the level) are always collected - they cost a few integer additions per step.
+    With sample_phases one step out of every check_every (256) is timed phase by phase: picking the variable,
+    evaluating the neighbor and deciding, applying an accepted flip, recording history.
+    Rejected moves are evaluated from the make/break cache and never touch the state, so there is nothing to revert.
+    """
+    PHASES = ("select", "evaluate", "apply", "record")
+
+    def __init__(self, sample_phases=True):
+        self.sample_phases = sample_phases
+        self.calibration_time = 0.0 # set_delta warm-up, 0 when the temperature was given or cached
+        self.total_time = 0.0
+        self.total_steps = 0
+        self.accepted = 0
+        self.greedy = 0 # accepted as strictly better (more satisfied clauses, or same and higher score)
+        self.uphill = 0 # accepted with better fitness but not greedy
+        self.restarts = 0
+        self.level_steps = array('q')
+        self.level_time = array('d')
+        self.level_temperature = array('d')
+        self.level_unsat = array('q')
+        self.phase_time = dict.fromkeys(self.PHASES, 0.0)
+        self.phase_samples = dict.fromkeys(self.PHASES, 0)
+
+    @property
+    def rejected(self):
+        return self.total_steps - self.accepted
+
+    @property
+    def metropolis(self):
+        """Worsening moves accepted by the Metropolis rule"""
+        return self.accepted - self.greedy - self.uphill
+
+    def end_level(self, steps, seconds, temperature, unsat):
+        self.level_steps.append(steps)
+        self.level_time.append(seconds)
+        self.level_temperature.append(temperature)
+        self.level_unsat.append(unsat)
+
+    def add_phase_sample(self, select, evaluate, apply, record):
+        """Phase durations of one timed step, apply is None for a rejected move"""
+        for phase, seconds in zip(self.PHASES, (select, evaluate, apply, record)):
+            if seconds is not None:
+                self.phase_time[phase] += seconds
+                self.phase_samples[phase] += 1
+
+    def phase_us(self, phase):
+        """Mean microseconds of a phase over sampled steps"""
+        samples = self.phase_samples[phase]
+        return self.phase_time[phase] / samples * 1e6 if samples else 0.0
+
+    def summary(self):
+        """Flat dict for result records / DataFrame columns"""
+        levels = len(self.level_steps)
+        return {
+            "Accepted": self.accepted,
+            "Rejected": self.rejected,
+            "Greedy": self.greedy,
+            "Uphill": self.uphill,
+            "Metropolis": self.metropolis,
+            "Accept_Rate": self.accepted / self.total_steps if self.total_steps else 0.0,
+            "Restarts": self.restarts,
+            "Levels": levels,
+            "Mean_Level_Ms": sum(self.level_time) / levels * 1000 if levels else 0.0,
+            "Mean_Unsat": sum(self.level_unsat) / levels if levels else 0.0,
+            "Calibration_Time": self.calibration_time,
+            "Select_Us": self.phase_us("select"),
+            "Evaluate_Us": self.phase_us("evaluate"),
+            "Apply_Us": self.phase_us("apply"),
+            "Record_Us": self.phase_us("record"),
+        }
@@ -0,0 +1,45 @@
+import os
+import random
+import numpy as np
+from instance_cache import file_sha1
+
+_path_keys = {} # (path, size, mtime_ns) -> key, the file is hashed once per process
+
+
+def make_rng(seed=None):
+    """
+    random.Random for the solvers from seed: None keeps the global random module (unseeded behaviour),
+    an int gives a fresh Random, a Random is used as is and a NumPy Generator seeds a new Random from its stream.
+    """
+    if seed is None or isinstance(seed, random.Random):
+        return random if seed is None else seed
+    if isinstance(seed, np.random.Generator):
+        return random.Random(int(seed.integers(0, 2 ** 63)))
+    return random.Random(seed)
+
+
+def new_base_seed():
+    """Fresh entropy for a batch of runs, recorded so the batch can be replayed"""
+    return int(np.random.SeedSequence().entropy)
+
+
+def path_key(instance_path):
+    """
+    Stable number of an instance from its content (first 63 bits of the file's sha1) - the same on every machine
+    and wherever the file lies, while subsets reusing a file name (wuf20-01.mwcnf in M, N, Q, R) get their own streams.
+    """
+    stat = os.stat(instance_path)
+    cache_key = (instance_path, stat.st_size, stat.st_mtime_ns)
+    if cache_key not in _path_keys:
+        _path_keys[cache_key] = int.from_bytes(file_sha1(instance_path)[:8], "big") >> 1
+    return _path_keys[cache_key]
+
+
+def derive_seed(base_seed, *keys):
+    """
+    63 bit seed of an independent stream spawned from base_seed by SeedSequence, keys are non negative ints
+    like (instance, repeat) - the same keys always give the same stream, no matter which worker or chunk runs them.
+    63 bits so the seed survives the int64 columns of pandas.
+    """
+    sequence = np.random.SeedSequence(base_seed, spawn_key=keys)
+    return int(sequence.generate_state(1, dtype=np.uint64)[0]) >> 1
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from MWSATInstance import MWSATInstance
+import instance_cache
+
+# worker side state, lives as long as the worker process
+_blocks = {} # block name -> SharedMemory, one per add_all call of the parent
+_attached = OrderedDict() # (block name, offset) -> MWSATInstance, least recently used are dropped
+_ATTACHED_MAX = 16
+
+
+def _attach_block(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False) # python 3.13+
+    except TypeError:
+        # older python registers the block again, pool workers share the parent's resource tracker so it is a no-op
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedInstanceStore:
+    """
+    Parent side of instance sharing: instances are loaded once and packed one after another, in the compiled format
+    (see instance_cache), into a single shared memory block per add_all call - a block costs open file descriptors,
+    one per instance would run out of them on a 1000 file subset. Workers attach with attach_instance(path, handle).
+    Use as a context manager, blocks are unlinked on exit.
+    """
+    def __init__(self):
+        self.blocks = [] # SharedMemory
+        self.handles = {} # filepath -> (block name, offset)
+
+    def add_all(self, filepaths):
+        """Loads every instance not shared yet (compiled file is used when up to date), returns {filepath: handle}"""
+        new_paths = [path for path in dict.fromkeys(filepaths) if path not in self.handles]
+        if new_paths:
+            parts = [instance_cache.instance_to_bytes(MWSATInstance(path)) for path in new_paths]
+            # every part starts 8 byte aligned - workers index its int32 arrays through memoryviews,
+            # which do not take unaligned data
+            sizes = [-(-len(data) // 8) * 8 for data in parts]
+            block = shared_memory.SharedMemory(create=True, size=sum(sizes))
+            offset = 0
+            for path, data, size in zip(new_paths, parts, sizes):
+                block.buf[offset:offset + len(data)] = data
+                self.handles[path] = (block.name, offset)
+                offset += size
+            self.blocks.append(block)
+        return {path: self.handles[path] for path in filepaths}
+
+    def add(self, filepath):
+        """Handle of one instance, prefer add_all for many - every call that adds something makes a new block"""
+        return self.add_all([filepath])[filepath]
+
+    def nbytes(self):
+        return sum(block.size for block in self.blocks)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+        self.handles = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_instance(filepath, handle):
+    """
+    Worker side: MWSATInstance backed by its part of the shared block. The block is attached once per process,
+    instances are kept for reuse but at most _ATTACHED_MAX of them. Clauses, weights and the occurrence index
+    are views of the shared arrays (MWSATInstance views=True), a worker only adds normalized weights and
+    the per run solver state.
+    """
+    if handle in _attached:
+        _attached.move_to_end(handle)
+        return _attached[handle]
+    name, offset = handle
+    if name not in _blocks:
+        _blocks[name] = _attach_block(name)
+    compiled = instance_cache.CompiledInstance(_blocks[name].buf[offset:])
+    instance = MWSATInstance(filepath, compiled=compiled, views=True)
+    _attached[handle] = instance
+    if len(_attached) > _ATTACHED_MAX:
+        _attached.popitem(last=False)
+    return instance
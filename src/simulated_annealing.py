@@ -1,8 +1,10 @@
 import math
-import random
+import time
 import numpy as np
 from MWSATInstance import MWSATInstance
 from MWSATSolution import MWSATSolution
+from trace_recorders import FullTrace
+from seeding import make_rng
 
 def compare_metrics(current_sat, current_score, old_sat, old_score):
     """
@@ -28,91 +30,370 @@ def simulated_annealing(instance: MWSATInstance,
                         equilibrium_steps: int, 
                         max_steps_without_improvement: float,
                         fitness_coefficient: float,
-                        random_flip = False):
-    
-    current_state = MWSATSolution(instance)
+                        random_flip = False,
+                        trace = None,
+                        initial_temperature = None,
+                        calibration_cache = None,
+                        time_limit = None,
+                        max_flips = None,
+                        target_score = None,
+                        on_improvement = None,
+                        restart = None,
+                        stop_check = None,
+                        seed = None,
+                        stats = None):
+    """
+    Returns best state and recorded score history.
+    trace is a recorder from trace_recorders (full history by default), total step count is stored in trace.total_steps
+    and the reason the run ended in trace.stop_reason
+    initial_temperature skips the set_delta calibration, calibration_cache (TemperatureCalibrationCache) reuses it between runs
+    - one temperature per instance and parameters whatever the seed, see calibrate_initial_temperature
+    Anytime mode - time_limit (seconds), max_flips (total steps) and target_score (valid solution at least this good)
+    end the run early, on_improvement(best_state, total_steps, elapsed) is called for every new best state and stops
+    the run when it returns True. See simulated_annealing_iter for the generator form.
+    restart is a policy from restart_policies - stagnating runs are reheated (and perturbed) instead of ending cold,
+    the number of restarts is stored in trace.restarts
+    stop_check() is polled together with the deadline and ends the run when it returns True (external cancellation)
+    seed (int, random.Random or NumPy Generator, see seeding.make_rng) makes the run reproducible, with None the global
+    random module is used
+    stats (run_stats.RunStats) is filled with move counters, per temperature level steps/time/unsatisfied clauses
+    and calibration time, None keeps the loop uninstrumented
+    """
+    improvements = simulated_annealing_iter(instance, P0, cooling_coefficient, equilibrium_steps, max_steps_without_improvement,
+                                            fitness_coefficient, random_flip, trace, initial_temperature, calibration_cache,
+                                            time_limit, max_flips, target_score, restart=restart,
+                                            stop_check=stop_check, seed=seed, stats=stats)
+    try:
+        improvement = next(improvements)
+        while True:
+            stop = on_improvement is not None and bool(on_improvement(*improvement))
+            improvement = improvements.send(stop)
+    except StopIteration as finished:
+        return finished.value
+
+def simulated_annealing_iter(instance: MWSATInstance, 
+                             P0: float, 
+                             cooling_coefficient: float, 
+                             equilibrium_steps: int, 
+                             max_steps_without_improvement: float,
+                             fitness_coefficient: float,
+                             random_flip = False,
+                             trace = None,
+                             initial_temperature = None,
+                             calibration_cache = None,
+                             time_limit = None,
+                             max_flips = None,
+                             target_score = None,
+                             check_every = 256,
+                             restart = None,
+                             stop_check = None,
+                             seed = None,
+                             stats = None):
+    """
+    Generator form of simulated_annealing - yields (best_state, total_steps, elapsed seconds) on every new best state,
+    yielded states are never modified afterwards. Sending True stops the run, plain iteration keeps it going.
+    The generator's return value (StopIteration.value) is the usual (best_state, history).
+    Deadline, flip budget and stop_check are checked every check_every steps, so the loop itself stays free of clock calls.
+    time_limit counts from the call, temperature calibration included - pass initial_temperature or calibration_cache
+    when the deadline is tight, calibration itself is not interrupted.
+    With stats, move counters are kept and one step per check_every is timed phase by phase (when stats.sample_phases).
+    Whether to instrument is decided once per temperature level - without stats the steps run a copy of the loop
+    with no counters and no timing checks at all.
+    """
+    if trace is None:
+        trace = FullTrace()
+    record = trace.step_recorder()
+    rng = make_rng(seed)
+    # drawn even when not needed so the rest of the run draws the same numbers on a cache hit or miss - the starting
+    # temperature itself is shared, a cache hit returns whatever the first seed calibrated
+    calibration_seed = rng.getrandbits(64)
+    start_time = time.perf_counter()
+    deadline = start_time + time_limit if time_limit is not None else math.inf
+    flip_budget = max_flips if max_flips is not None else math.inf
+
+    current_state = MWSATSolution(instance, rng=rng)
     best_state = current_state.copy()
 
-    # Pre-calculate initial fitness - if neighbor is not accepted it will be flipped back - no copying needed
+    # Pre-calculate initial fitness - neighbors are evaluated from the make/break cache, no copying needed
     sat_unsat = len(current_state.unsatisfied_clauses) / instance.num_clauses
     current_fitness = current_state.current_score_norm - (fitness_coefficient * sat_unsat * instance.num_vars)
 
     # Initial temperature setup
-    delta_avg = set_delta(instance, 1e6, cooling_coefficient=1, equilibrium_steps=100, 
-                          steps=3000, fitness_coefficient=fitness_coefficient, random_flip=random_flip)
-    
-    
-    #edge case
-    if delta_avg == 0: delta_avg = 1.0
-    temperature = abs(delta_avg) / abs(np.log(P0))
+    if initial_temperature is None:
+        calibration_start = time.perf_counter()
+        initial_temperature = calibrate_initial_temperature(instance, P0, fitness_coefficient, random_flip, calibration_cache,
+                                                            seed=calibration_seed)
+        if stats is not None:
+            stats.calibration_time = time.perf_counter() - calibration_start
+    temperature = initial_temperature
     
-    history = []
+    # make/break cache of current_state, arrays are updated in place by update_variable_and_score
+    make_count = current_state.make_count
+    break_count = current_state.break_count
+    variable_values = current_state.variable_values
+    weights = instance.weights
+    normalized_weights = instance.normalized_weights
+    rng_random = rng.random
+    rng_randint = rng.randint
+    rng_choice = rng.choice
+    unsat_items = current_state.unsatisfied_clauses.items # dense id list of UnsatClauseSet, sampled directly
+
     steps_without_improvement = 0
     total_steps = 0
     max_steps = max_steps_without_improvement * instance.num_clauses
+    next_check = min(check_every, flip_budget)
+    stop_reason = None
+    restarts = 0
+    restart_step = 0 # total_steps at the last restart
+    next_restart = restart.interval(1) * instance.num_clauses if restart is not None else math.inf
+    accepted = 0
+    greedy = 0
+    uphill = 0
+    sample_phases = stats is not None and stats.sample_phases
+    timed = False # this step is timed phase by phase
+    perf_counter = time.perf_counter
 
-    while steps_without_improvement < max_steps:    
-        for _ in range(equilibrium_steps * instance.num_clauses):
-            steps_without_improvement += 1
-            total_steps += 1
+    if target_score is not None and best_state.clauses_satisfied == instance.num_clauses and best_state.current_score >= target_score:
+        stop_reason = "target_score"
+
+    while stop_reason is None and steps_without_improvement < max_steps:    
+        level_start = perf_counter() if stats is not None else 0.0
+        level_start_steps = total_steps
+        if stats is None:
+            # uninstrumented steps - keep in sync with the instrumented copy below, the only difference is
+            # the move counters and phase timing, so a plain run pays nothing for them
+            for _ in range(equilibrium_steps * instance.num_clauses):
+                if total_steps >= next_check:
+                    if total_steps >= flip_budget:
+                        stop_reason = "max_flips"
+                        break
+                    if time.perf_counter() >= deadline:
+                        stop_reason = "time_limit"
+                        break
+                    if stop_check is not None and stop_check():
+                        stop_reason = "stopped"
+                        break
+                    next_check = min(total_steps + check_every, flip_budget)
+
+                steps_without_improvement += 1
+                total_steps += 1
             
-            #  PICK VARIABLE - total random, or from unsat clauses
-            if random_flip:
-                var_to_flip = random.randint(1, instance.num_vars)
-            elif current_state.unsatisfied_clauses:
-                clause = random.choice(list(current_state.unsatisfied_clauses))
-                var_to_flip = abs(random.choice(clause))
-            else:
-                var_to_flip = random.randint(1, instance.num_vars)
+                #  PICK VARIABLE - total random, or from unsat clauses
+                if random_flip:
+                    var_to_flip = rng_randint(1, instance.num_vars)
+                elif unsat_items:
+                    clause = instance.clauses[unsat_items[int(rng_random() * len(unsat_items))]]
+                    var_to_flip = abs(rng_choice(clause))
+                else:
+                    var_to_flip = rng_randint(1, instance.num_vars)
 
-            # SAVE OLD METRICS
-            old_sat = current_state.clauses_satisfied
-            old_score = current_state.current_score
+                # EVALUATE NEIGHBOR - O(1) from the make/break cache (inlined flip_delta), state is touched only if the move is accepted
+                var_idx = var_to_flip - 1
+                old_sat = current_state.clauses_satisfied
+                old_score = current_state.current_score
+                new_sat = old_sat + make_count[var_idx] - break_count[var_idx]
+                if variable_values[var_idx] == 1:
+                    new_score = old_score - weights[var_idx]
+                    new_score_norm = current_state.current_score_norm - normalized_weights[var_idx]
+                else:
+                    new_score = old_score + weights[var_idx]
+                    new_score_norm = current_state.current_score_norm + normalized_weights[var_idx]
+
+                sat_unsat = (instance.num_clauses - new_sat) / instance.num_clauses
+                neighbor_fitness = new_score_norm - (fitness_coefficient * sat_unsat * instance.num_vars)
+            
+                delta = neighbor_fitness - current_fitness
+            
+                # ACCEPT OR REJECT
+                accept_move = False
+                greedy_move = False
+            
+                # A. Check if strictly better (Greedy) using stored metrics
+                if compare_metrics(new_sat, new_score, old_sat, old_score):
+                    accept_move = True
+                    greedy_move = True
+            
+                # B. not scritly better - random acceptance of worse
+                elif delta > 0:
+                    accept_move = True
+                else:
+                    exponent = delta / temperature
+                    if exponent > -100:
+                        if rng_random() < math.exp(exponent):
+                            accept_move = True
+            
+                if accept_move:
+                    # Apply the flip, update fitness baseline
+                    current_state.update_variable_and_score(var_to_flip)
+                    current_fitness = neighbor_fitness
+                    # Check Global Best
+                    if greedy_move and compare_states(current_state, best_state):
+                        steps_without_improvement = 0
+                        best_state = current_state.copy() # Copy to avoid rewriting
+                        if (yield best_state, total_steps, time.perf_counter() - start_time):
+                            stop_reason = "stopped"
+                        elif (target_score is not None and best_state.clauses_satisfied == instance.num_clauses
+                              and best_state.current_score >= target_score):
+                            stop_reason = "target_score"
             
-            # FLIP IN PLACE
-            current_state.update_variable_and_score(var_to_flip)
+                if record is not None:
+                    record(current_state.current_score)
+                if stop_reason is not None:
+                    break
+        else:
+            for _ in range(equilibrium_steps * instance.num_clauses):
+                if total_steps >= next_check:
+                    if total_steps >= flip_budget:
+                        stop_reason = "max_flips"
+                        break
+                    if time.perf_counter() >= deadline:
+                        stop_reason = "time_limit"
+                        break
+                    if stop_check is not None and stop_check():
+                        stop_reason = "stopped"
+                        break
+                    next_check = min(total_steps + check_every, flip_budget)
+                    timed = sample_phases
 
-            # CALCULATE NEW FITNESS
-            # Now 'current_state' IS the neighbor. 
-            sat_unsat = len(current_state.unsatisfied_clauses) / instance.num_clauses
-            neighbor_fitness = current_state.current_score_norm - (fitness_coefficient * sat_unsat * instance.num_vars)
+                steps_without_improvement += 1
+                total_steps += 1
+                if timed:
+                    t_select = perf_counter()
             
-            delta = neighbor_fitness - current_fitness
+                #  PICK VARIABLE - total random, or from unsat clauses
+                if random_flip:
+                    var_to_flip = rng_randint(1, instance.num_vars)
+                elif unsat_items:
+                    clause = instance.clauses[unsat_items[int(rng_random() * len(unsat_items))]]
+                    var_to_flip = abs(rng_choice(clause))
+                else:
+                    var_to_flip = rng_randint(1, instance.num_vars)
+
+                if timed:
+                    t_evaluate = perf_counter()
+                # EVALUATE NEIGHBOR - O(1) from the make/break cache (inlined flip_delta), state is touched only if the move is accepted
+                var_idx = var_to_flip - 1
+                old_sat = current_state.clauses_satisfied
+                old_score = current_state.current_score
+                new_sat = old_sat + make_count[var_idx] - break_count[var_idx]
+                if variable_values[var_idx] == 1:
+                    new_score = old_score - weights[var_idx]
+                    new_score_norm = current_state.current_score_norm - normalized_weights[var_idx]
+                else:
+                    new_score = old_score + weights[var_idx]
+                    new_score_norm = current_state.current_score_norm + normalized_weights[var_idx]
+
+                sat_unsat = (instance.num_clauses - new_sat) / instance.num_clauses
+                neighbor_fitness = new_score_norm - (fitness_coefficient * sat_unsat * instance.num_vars)
             
-            # ACCEPT OR REVERT
-            accept_move = False
+                delta = neighbor_fitness - current_fitness
             
-            # A. Check if strictly better (Greedy) using stored metrics
-            if compare_metrics(current_state.clauses_satisfied, current_state.current_score, old_sat, old_score):
-                accept_move = True
-                # Check Global Best
-                if compare_states(current_state, best_state):
-                    steps_without_improvement = 0
-                    best_state = current_state.copy() # Copy to avoid rewriting
+                # ACCEPT OR REJECT
+                accept_move = False
+                greedy_move = False
             
-            # B. not scritly better - random acceptance of worse
-            elif delta > 0:
-                accept_move = True
-            else:
-                exponent = delta / temperature
-                if exponent > -100:
-                    if random.random() < math.exp(exponent):
-                        accept_move = True
+                # A. Check if strictly better (Greedy) using stored metrics
+                if compare_metrics(new_sat, new_score, old_sat, old_score):
+                    accept_move = True
+                    greedy_move = True
+                    greedy += 1
             
-            if accept_move:
-                # Keep the change, update fitness baseline
-                current_fitness = neighbor_fitness
-            else:
-                # REVERT: Flip the same variable again to undo
-                current_state.update_variable_and_score(var_to_flip)
-                # No need to revert current_fitness, it stays as is
+                # B. not scritly better - random acceptance of worse
+                elif delta > 0:
+                    accept_move = True
+                    uphill += 1
+                else:
+                    exponent = delta / temperature
+                    if exponent > -100:
+                        if rng_random() < math.exp(exponent):
+                            accept_move = True
             
-            history.append(current_state.current_score)
+                if timed:
+                    t_apply = perf_counter()
+                if accept_move:
+                    accepted += 1
+                    # Apply the flip, update fitness baseline
+                    current_state.update_variable_and_score(var_to_flip)
+                    current_fitness = neighbor_fitness
+                    # Check Global Best
+                    if greedy_move and compare_states(current_state, best_state):
+                        steps_without_improvement = 0
+                        best_state = current_state.copy() # Copy to avoid rewriting
+                        if (yield best_state, total_steps, time.perf_counter() - start_time):
+                            stop_reason = "stopped"
+                        elif (target_score is not None and best_state.clauses_satisfied == instance.num_clauses
+                              and best_state.current_score >= target_score):
+                            stop_reason = "target_score"
+            
+                if timed:
+                    t_record = perf_counter()
+                if record is not None:
+                    record(current_state.current_score)
+                if timed:
+                    stats.add_phase_sample(t_evaluate - t_select, t_apply - t_evaluate,
+                                           t_record - t_apply if accept_move else None, perf_counter() - t_record)
+                    timed = False
+                if stop_reason is not None:
+                    break
 
+        trace.end_level(current_state.current_score)
+        if stats is not None:
+            stats.end_level(total_steps - level_start_steps, perf_counter() - level_start, temperature, len(unsat_items))
         temperature *= cooling_coefficient
-        if temperature < 1e-5: break
+
+        # RESTART - stagnating (or frozen) run is reheated, possibly continuing from a perturbed best state
+        frozen = temperature < 1e-5
+        if restart is not None and stop_reason is None and (frozen or min(steps_without_improvement, total_steps - restart_step) >= next_restart):
+            restarts += 1
+            restart_step = total_steps
+            next_restart = restart.interval(restarts + 1) * instance.num_clauses
+            temperature = restart.reheat_fraction * initial_temperature
+            frozen = False
+            new_state = restart.restart_state(current_state, best_state, rng)
+            if new_state is not current_state:
+                current_state = new_state
+                make_count = current_state.make_count
+                break_count = current_state.break_count
+                variable_values = current_state.variable_values
+                unsat_items = current_state.unsatisfied_clauses.items
+                sat_unsat = (instance.num_clauses - current_state.clauses_satisfied) / instance.num_clauses
+                current_fitness = current_state.current_score_norm - (fitness_coefficient * sat_unsat * instance.num_vars)
+        if stop_reason is None and frozen:
+            stop_reason = "frozen"
         
-    return best_state, history
+    trace.total_steps = total_steps
+    trace.restarts = restarts
+    trace.stop_reason = stop_reason or "no_improvement"
+    if stats is not None:
+        stats.total_steps = total_steps
+        stats.accepted = accepted
+        stats.greedy = greedy
+        stats.uphill = uphill
+        stats.restarts = restarts
+        stats.total_time = time.perf_counter() - start_time
+    return best_state, trace.values()
+
+def calibrate_initial_temperature(instance: MWSATInstance, P0: float, fitness_coefficient: float, random_flip=False, cache=None,
+                                  seed=None):
+    """Initial temperature so that average worsening move is accepted with probability P0, looked up in cache first.
+    seed drives the calibration walk, see seeding.make_rng. The cache key leaves the seed out: the temperature is
+    shared per instance and parameters, every later seed gets the one calibrated by the first caller."""
+    key = None
+    if cache is not None:
+        key = cache.make_key(instance, fitness_coefficient, random_flip, P0)
+        temperature = cache.get(key)
+        if temperature is not None:
+            return temperature
+
+    delta_avg = set_delta(instance, 1e6, cooling_coefficient=1, equilibrium_steps=100, 
+                          steps=3000, fitness_coefficient=fitness_coefficient, random_flip=random_flip, seed=seed)
+    #edge case
+    if delta_avg == 0: delta_avg = 1.0
+    temperature = float(abs(delta_avg) / abs(np.log(P0)))
+
+    if cache is not None:
+        cache.put(key, temperature)
+    return temperature
 
 def set_delta(instance: MWSATInstance, 
               initial_temperature: float, 
@@ -120,17 +401,20 @@ def set_delta(instance: MWSATInstance,
               equilibrium_steps: int, 
               steps: int,
               fitness_coefficient: float = None,
-              random_flip=False):
+              random_flip=False,
+              seed=None):
     """calculates average fitness difference when performing random walk in space"""
+    rng = make_rng(seed)
               
-    current_state = MWSATSolution(instance)
+    current_state = MWSATSolution(instance, rng=rng)
     best_state = current_state.copy()
 
     sat_unsat = len(current_state.unsatisfied_clauses) / instance.num_clauses
     current_fitness = current_state.current_score_norm - (fitness_coefficient * instance. num_vars * sat_unsat)
     temperature = initial_temperature
 
-    deltas = []
+    deltas_sum = 0.0 # running mean of accepted worsening deltas, no list kept
+    deltas_count = 0
     step_counter = 0
     
     while step_counter < steps:
@@ -138,40 +422,43 @@ def set_delta(instance: MWSATInstance,
             step_counter += 1
             
             if random_flip:
-                var_to_flip = random.randint(1, instance.num_vars)
+                var_to_flip = rng.randint(1, instance.num_vars)
             elif current_state.unsatisfied_clauses:
-                clause = random.choice(list(current_state.unsatisfied_clauses))
-                var_to_flip = abs(random.choice(clause))
+                clause = instance.clauses[current_state.unsatisfied_clauses.random_choice(rng)]
+                var_to_flip = abs(rng.choice(clause))
             else:
-                var_to_flip = random.randint(1, instance.num_vars)
+                var_to_flip = rng.randint(1, instance.num_vars)
 
+            sat_delta, score_delta, norm_delta = current_state.flip_delta(var_to_flip)
             old_sat = current_state.clauses_satisfied
             old_score = current_state.current_score
+            new_sat = old_sat + sat_delta
+            new_score = old_score + score_delta
 
-            current_state.update_variable_and_score(var_to_flip)
-            
-            sat_unsat = len(current_state.unsatisfied_clauses) / instance.num_clauses
-            neighbor_fitness = current_state.current_score_norm - (fitness_coefficient * instance.num_vars * sat_unsat)
+            sat_unsat = (instance.num_clauses - new_sat) / instance.num_clauses
+            neighbor_fitness = current_state.current_score_norm + norm_delta - (fitness_coefficient * instance.num_vars * sat_unsat)
             delta = neighbor_fitness - current_fitness
 
             accept_move = False
+            greedy_move = False
             
-            if compare_metrics(current_state.clauses_satisfied, current_state.current_score, old_sat, old_score):
+            if compare_metrics(new_sat, new_score, old_sat, old_score):
                 accept_move = True
-                if compare_states(current_state, best_state):
-                    best_state = current_state.copy()
+                greedy_move = True
             else:
                 exponent = delta / temperature
                 if exponent > -100:
-                    if random.random() < math.exp(exponent):
-                        deltas.append(abs(delta))
+                    if rng.random() < math.exp(exponent):
+                        deltas_sum += abs(delta)
+                        deltas_count += 1
                         accept_move = True
             
             if accept_move:
-                current_fitness = neighbor_fitness
-            else:
                 current_state.update_variable_and_score(var_to_flip)
+                current_fitness = neighbor_fitness
+                if greedy_move and compare_states(current_state, best_state):
+                    best_state = current_state.copy()
 
         temperature *= cooling_coefficient
         
-    return np.mean(deltas) if deltas else 1.0
\ No newline at end of file
+    return deltas_sum / deltas_count if deltas_count else 1.0
\ No newline at end of file
@@ -0,0 +1,61 @@
+import json
+import os
+from collections import OrderedDict
+
+
+class TemperatureCalibrationCache:
+    """
+    LRU cache of calibrated initial temperatures keyed on (instance fingerprint, fitness_coefficient, random_flip, P0).
+    The calibration seed is not part of the key - runs with different seeds share the first calibrated temperature.
+    With path set, entries are loaded from that JSON file on creation and written back after every new calibration.
+    """
+    def __init__(self, max_entries=1024, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path is not None and os.path.exists(path):
+            self._load()
+
+    @staticmethod
+    def make_key(instance, fitness_coefficient, random_flip, P0):
+        return (instance.fingerprint(), float(fitness_coefficient), bool(random_flip), float(P0))
+
+    def get(self, key):
+        """Cached temperature or None"""
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, temperature):
+        self.entries[key] = temperature
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False) # least recently used
+        if self.path is not None:
+            self.save()
+
+    def save(self, path=None):
+        """Atomic write of all entries as JSON"""
+        path = path or self.path
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump([list(key) + [temperature] for key, temperature in self.entries.items()], f)
+        os.replace(tmp_path, path)
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            print(f"Ignoring unreadable calibration cache {self.path}")
+            return
+        for fingerprint, fitness_coefficient, random_flip, P0, temperature in rows[-self.max_entries:]:
+            self.entries[(fingerprint, fitness_coefficient, random_flip, P0)] = temperature
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,76 @@
+from array import array
+
+class FullTrace:
+    """Records current score after every step (the original history list)"""
+    def __init__(self):
+        self.history = []
+        self.total_steps = 0 # filled in by simulated_annealing
+        self.stop_reason = None # why the run ended, filled in by simulated_annealing
+        self.restarts = 0 # restarts done by the restart policy
+
+    def step_recorder(self):
+        """Callable taking the current score, called every step - None when nothing is recorded per step"""
+        return self.history.append
+
+    def end_level(self, score):
+        """Called when temperature level is finished"""
+        pass
+
+    def values(self):
+        return self.history
+
+
+class NoTrace(FullTrace):
+    """Records nothing, only total step count - constant memory for batch runs"""
+    def step_recorder(self):
+        return None
+
+
+class DecimatedTrace(FullTrace):
+    """Records every `every`-th step, or only the score at the end of each temperature level when every is None"""
+    def __init__(self, every=None):
+        super().__init__()
+        self.every = every
+        self._counter = 0
+
+    def step_recorder(self):
+        if self.every is None:
+            return None
+        history = self.history
+        every = self.every
+
+        def record(score):
+            self._counter += 1
+            if self._counter == every:
+                self._counter = 0
+                history.append(score)
+        return record
+
+    def end_level(self, score):
+        if self.every is None:
+            self.history.append(score)
+
+
+class RingBufferTrace(FullTrace):
+    """Keeps only the last `capacity` step scores in a preallocated array"""
+    def __init__(self, capacity=100000):
+        super().__init__()
+        self.capacity = capacity
+        self.buffer = array('q', [0]) * capacity
+        self.recorded = 0 # how many scores were recorded in total
+
+    def step_recorder(self):
+        buffer = self.buffer
+        capacity = self.capacity
+
+        def record(score):
+            buffer[self.recorded % capacity] = score
+            self.recorded += 1
+        return record
+
+    def values(self):
+        """Recorded scores in chronological order (at most capacity of them)"""
+        if self.recorded <= self.capacity:
+            return self.buffer[:self.recorded].tolist()
+        start = self.recorded % self.capacity
+        return self.buffer[start:].tolist() + self.buffer[:start].tolist()
@@ -1,29 +1,82 @@
 from MWSATInstance import MWSATInstance
 import time
-from simulated_annealing import simulated_annealing
+from simulated_annealing import simulated_annealing, calibrate_initial_temperature
+from trace_recorders import NoTrace
+from run_stats import RunStats
+from shared_instances import SharedInstanceStore, attach_instance
+from temperature_calibration import TemperatureCalibrationCache
+from result_store import ResultStore, load_results, run_key
+from seeding import new_base_seed, path_key, derive_seed
+from instance_dataset import instance_key
+from collections import OrderedDict
+import math
 import os
 import concurrent.futures
 import pandas as pd
 
-def _worker_task(filepath, params, opt_val, n_repeats):
+# worker process local state, chunks of the same instance that land on the same worker reuse it
+_local_instances = OrderedDict() # filepath -> MWSATInstance, when instances are not shared
+_LOCAL_INSTANCES_MAX = 16
+_calibration_cache = TemperatureCalibrationCache()
+
+
+def _get_instance(filepath, shared_handle=None):
+    if shared_handle is not None:
+        return attach_instance(filepath, shared_handle)
+    if filepath in _local_instances:
+        _local_instances.move_to_end(filepath)
+        return _local_instances[filepath]
+    instance = MWSATInstance(filepath)
+    _local_instances[filepath] = instance
+    if len(_local_instances) > _LOCAL_INSTANCES_MAX:
+        _local_instances.popitem(last=False)
+    return instance
+
+
+def _worker_task(filepath, params, opt_val, n_repeats, shared_handle=None, repeats=None, base_seed=None, key_seed=None,
+                 collect_stats=False):
     """
     Worker function to run in a separate process.
-    Loads the instance once and runs the algorithm n_repeats times.
+    Loads the instance once (or attaches to the parent's shared memory copy) and runs the algorithm n_repeats times,
+    or once for every repeat number in repeats.
+    Every run gets its own stream derived from (base_seed, instance, repeat), so results do not depend on which
+    worker or chunk ran them. key_seed is the seed the caller asked for (None when unseeded), it goes to Run_Key.
+    collect_stats adds the RunStats summary columns to every record, Calibration_Time of the task (0 on a cache hit)
+    goes to its first record only, so the column sums to the real calibration cost.
     """
     results = []
     instance_name = os.path.basename(filepath)
     
     try:
-        instance = MWSATInstance(filepath)
+        instance = _get_instance(filepath, shared_handle)
     except Exception as e:
         print(f"Error loading {instance_name}: {e}")
         return []
 
-    for _ in range(n_repeats):
+    if base_seed is None:
+        base_seed = new_base_seed()
+    stream_key = path_key(filepath)
+
+    # Same instance and parameters for every repeat - calibrate initial temperature once per worker,
+    # from the instance's own stream so every worker ends up with the same temperature
+    calibration_start = time.perf_counter()
+    initial_temperature = calibrate_initial_temperature(instance, params["P0"], params["fitness_coefficient"],
+                                                        params.get("random_flip", False), _calibration_cache,
+                                                        seed=derive_seed(base_seed, stream_key, 0))
+    calibration_time = time.perf_counter() - calibration_start
+
+    if repeats is None:
+        repeats = range(n_repeats)
+
+    for repeat in repeats:
         start_time = time.time()
+        seed = derive_seed(base_seed, stream_key, 1, repeat)
         
-        # Run Algorithm
-        best_state, history = simulated_annealing(instance, **params)
+        # Run Algorithm - no score history is kept, only the step count
+        trace = NoTrace()
+        stats = RunStats() if collect_stats else None
+        best_state, _ = simulated_annealing(instance, trace=trace, initial_temperature=initial_temperature, seed=seed,
+                                            stats=stats, **params)
         
         elapsed_time = time.time() - start_time
         
@@ -32,60 +85,195 @@ def _worker_task(filepath, params, opt_val, n_repeats):
         is_valid = (best_state.clauses_satisfied == instance.num_clauses)
         
         
-        success = is_valid and (final_score >= opt_val)
-        rel_error = (opt_val - final_score) / opt_val if is_valid else 1.0
-            
-        # never trust data
-        if rel_error < 0: rel_error = 0.0
+        # opt_val 0 means the optimum is unknown - no success and no relative error (NaN) for valid runs
+        success = is_valid and opt_val > 0 and (final_score >= opt_val)
+        if not is_valid:
+            rel_error = 1.0
+        elif opt_val > 0:
+            rel_error = max(0.0, (opt_val - final_score) / opt_val) # never trust data
+        else:
+            rel_error = math.nan
     
             
         # Append Record
-        results.append({
+        record = {
             "Instance": instance_name,
+            "Repeat": repeat,
             "Is_Valid": is_valid,
             "Success": success,
             "Score": final_score,
             "Optimum": opt_val,
             "Rel_Error": rel_error,
-            "Steps": len(history),
-            "Time": elapsed_time
-        })
+            "Steps": trace.total_steps,
+            "Time": elapsed_time,
+            "Seed": seed,
+            "Run_Key": run_key(filepath, params, repeat, key_seed)
+        }
+        if stats is not None:
+            stats.calibration_time = calibration_time
+            calibration_time = 0.0
+            record.update(stats.summary())
+        results.append(record)
         
     return results
 
 
-def run_blackbox_parallel(instance_paths, solutions_dict, params, n_repeats=100, max_workers=None):
+def plan_chunks(pending_repeats, n_workers, tasks_per_worker=4):
+    """
+    Splits work given as {(path, config): [repeat numbers to run]} into ((path, config), repeats) chunks.
+    Instance cost is estimated from file size; chunk size is chosen so that every chunk costs about
+    total_cost / (n_workers * tasks_per_worker) - big instances get small chunks, small instances big ones.
+    Chunks are returned longest job first, together with the size estimates (keyed on path).
+    """
+    sizes = {path: max(1, os.path.getsize(path)) for path, _ in pending_repeats}
+    total_cost = sum(sizes[path] * len(repeats) for (path, _), repeats in pending_repeats.items())
+    target_cost = total_cost / max(1, n_workers * tasks_per_worker)
+
+    chunks = []
+    for job, repeats in pending_repeats.items():
+        if not repeats:
+            continue
+        chunk_size = min(len(repeats), max(1, round(target_cost / sizes[job[0]])))
+        for start in range(0, len(repeats), chunk_size):
+            chunks.append((job, repeats[start:start + chunk_size]))
+    chunks.sort(key=lambda chunk: sizes[chunk[0][0]] * len(chunk[1]), reverse=True)
+    return chunks, sizes
+
+
+def _format_seconds(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def run_blackbox_parallel(instance_paths, solutions_dict, params, n_repeats=100, max_workers=None, share_instances=True,
+                          tasks_per_worker=4, results_path=None, seed=None, collect_stats=False):
+    """
+    Runs n_repeats of simulated_annealing on every instance in a process pool, returns DataFrame of all runs.
+    Work is split into (instance, repeat chunk) tasks submitted longest job first, see plan_chunks.
+    With share_instances the parent loads every instance once into shared memory and workers attach to it - clauses
+    and occurrence index are read in place, so memory does not grow with workers, at the cost of slower steps
+    (memoryview rows instead of Python lists, about 15% on a 20000 variable instance).
+    With results_path records are streamed into a ResultStore as they arrive instead of being kept in memory,
+    runs already in that file are skipped (resume) and the returned DataFrame holds the requested runs read back from it.
+    seed (int) makes the whole evaluation reproducible, every run has its own stream and records its Seed.
+    collect_stats adds solver counters (Accepted, Rejected, Greedy, Levels, Mean_Unsat, phase timings ...,
+    see run_stats.RunStats.summary) as columns.
+    solutions_dict maps instance keys (wuf20-01) or paths to optima, paths win when both are present.
+    Instances missing from it get Optimum 0, their valid runs Success False and Rel_Error NaN.
+    """
+    return run_configs_parallel(instance_paths, solutions_dict, [params], n_repeats, max_workers, share_instances,
+                                tasks_per_worker, results_path, seed=seed, collect_stats=collect_stats)
+
+
+def run_configs_parallel(instance_paths, solutions_dict, configs, n_repeats=100, max_workers=None, share_instances=True,
+                         tasks_per_worker=4, results_path=None, config_columns=None, title="Black Box Evaluation",
+                         first_repeat=0, seed=None, collect_stats=False):
+    """
+    run_blackbox_parallel for a list of parameter dicts - every (config, instance, repeat) is one run, all of them
+    go through the same pool, so workers keep their loaded instances across configs.
+    With config_columns every record also gets a Config column (index into configs) and those parameter values.
+    Repeats are numbered from first_repeat, so a run can be continued with further repeats.
+    Run streams depend on seed, instance and repeat only - all configs see the same streams (common random numbers).
+    Without seed fresh entropy is drawn and printed, so the evaluation can still be replayed.
+    collect_stats adds the RunStats counter columns to every record.
+    """
     all_records = []
-    tasks = []
+    tasks = {}
+    n_workers = max_workers or os.cpu_count() or 1
+    store = ResultStore(results_path) if results_path is not None else None
+
+    pending_repeats = {}
+    requested = {} # Run_Key -> config index of every run this call asks for, done now or earlier
+    for config, params in enumerate(configs):
+        for path in instance_paths:
+            repeats = list(range(first_repeat, first_repeat + n_repeats))
+            for r in repeats:
+                requested[run_key(path, params, r, seed)] = config
+            if store is not None:
+                repeats = [r for r in repeats if not store.is_completed(run_key(path, params, r, seed))]
+            pending_repeats[(path, config)] = repeats
+    chunks, sizes = plan_chunks(pending_repeats, n_workers, tasks_per_worker)
+    total_runs = sum(len(repeats) for _, repeats in chunks)
+    total_cost = sum(sizes[path] * len(repeats) for (path, _), repeats in chunks)
+    requested_runs = len(configs) * len(instance_paths) * n_repeats
+    base_seed = seed if seed is not None else new_base_seed()
     
-    print(f"--- Starting Black Box Evaluation ---")
+    print(f"--- Starting {title} ---")
+    if len(configs) > 1:
+        print(f"Configs: {len(configs)}")
     print(f"Instances: {len(instance_paths)}")
     print(f"Repeats per Instance: {n_repeats}")
-    print(f"Total Runs: {len(instance_paths) * n_repeats}")
+    print(f"Seed: {base_seed}")
+    print(f"Total Runs: {total_runs}")
+    if total_runs < requested_runs:
+        print(f"Resuming: {requested_runs - total_runs} runs already in {results_path}")
+    print(f"Tasks: {len(chunks)}")
     print(f"Parallel Workers: {max_workers if max_workers else 'Auto'}")
     
-    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
-        
-        for path in instance_paths:
-            filename = os.path.basename(path)
-            key = filename.split(".")[0]
-            opt_val = solutions_dict.get(key, 0)
-            
-            future = executor.submit(_worker_task, path, params, opt_val, n_repeats)
-            tasks.append(future)
-        
-        # Collect results
-        for i, future in enumerate(concurrent.futures.as_completed(tasks)):
-            try:
-                data = future.result()
-                all_records.extend(data)
+    try:
+        with SharedInstanceStore() as shared, concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            handles = shared.add_all(sorted({path for (path, _), _ in chunks})) if share_instances else {}
+            for (path, config), repeats in chunks:
+                # keyed by path (InstanceDataset.solutions(by_path=True)) or by instance name
+                opt_val = solutions_dict.get(path, solutions_dict.get(instance_key(path), 0))
+                shared_handle = handles.get(path)
                 
-                # Simple progress indicator
-                if (i + 1) % 1 == 0: # Update every instance
-                    print(f"Completed {i + 1}/{len(instance_paths)} instances...")
-                    
-            except Exception as e:
-                print(f"Task generated an exception: {e}")
+                future = executor.submit(_worker_task, path, configs[config], opt_val, len(repeats), shared_handle, repeats,
+                                         base_seed, seed, collect_stats)
+                tasks[future] = (path, config, len(repeats))
+            
+            # Collect results
+            start_time = time.time()
+            completed_runs = 0
+            completed_cost = 0
+            last_print = -math.inf
+            for future in concurrent.futures.as_completed(tasks):
+                path, config, runs = tasks[future]
+                try:
+                    data = future.result()
+                    if config_columns is not None:
+                        extra = {"Config": config}
+                        extra.update({name: configs[config].get(name) for name in config_columns})
+                        for record in data:
+                            record.update(extra)
+                    if store is not None:
+                        for record in data:
+                            store.append(record)
+                    else:
+                        all_records.extend(data)
+                except Exception as e:
+                    print(f"Task generated an exception: {e}")
+
+                # Progress in runs, ETA from estimated cost of what is left - printed at most once per second
+                completed_runs += runs
+                completed_cost += sizes[path] * runs
+                elapsed = time.time() - start_time
+                if elapsed - last_print >= 1.0 or completed_runs == total_runs:
+                    last_print = elapsed
+                    eta = elapsed * (total_cost - completed_cost) / completed_cost if completed_cost else math.inf
+                    print(f"Completed {completed_runs}/{total_runs} runs, elapsed {_format_seconds(elapsed)}, ETA {_format_seconds(eta)}")
+    finally:
+        if store is not None:
+            store.close()
 
     print("--- Evaluation Complete ---")
-    return pd.DataFrame(all_records)
\ No newline at end of file
+    if store is not None:
+        return _load_requested(results_path, requested, configs, config_columns)
+    return pd.DataFrame(all_records)
+
+
+def _load_requested(results_path, requested, configs, config_columns, chunksize=100000):
+    """
+    Records of the requested runs only - the file may also hold other params, seeds or repeats of earlier calls.
+    Config is renumbered for this call's configs, stored records carry the index of the call that wrote them.
+    """
+    frames = [chunk[chunk["Run_Key"].isin(requested)] for chunk in load_results(results_path, chunksize=chunksize)]
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame()
+    results = pd.concat(frames, ignore_index=True)
+    if config_columns is not None:
+        results["Config"] = results["Run_Key"].map(requested)
+        for name in config_columns:
+            results[name] = results["Config"].map(lambda config: configs[config].get(name))
+    return results
@@ -0,0 +1,45 @@
+import random
+import numpy as np
+import pytest
+from MWSATInstance import MWSATInstance
+
+
+def _random_instance(rng, empty_clauses, skewed):
+    """
+    Random formula with clauses of 3 literals, evaluated on the padded matrix - skewed mixes in shorter clauses and
+    one long one, the padded matrix is then too big and the CSR path is taken
+    """
+    num_vars = rng.randint(1, 12)
+    lengths = [rng.randint(1, 3) if skewed else 3 for _ in range(rng.randint(5, 20))] + [0] * empty_clauses
+    if skewed:
+        lengths.append(60)
+    rng.shuffle(lengths)
+    clauses = [[rng.choice([-1, 1]) * rng.randint(1, num_vars) for _ in range(length)] for length in lengths]
+    weights = np.array([rng.randint(0, 9) for _ in range(num_vars)])
+    offsets = np.cumsum([0] + lengths).astype(np.int32)
+    literals = np.array([lit for clause in clauses for lit in clause], dtype=np.int32)
+    return MWSATInstance("random", use_compiled=False, formula=(num_vars, weights, offsets, literals))
+
+
+@pytest.mark.parametrize("skewed", [False, True])
+@pytest.mark.parametrize("empty_clauses", [0, 1, 3])
+def test_batch_evaluation_matches_instance(empty_clauses, skewed):
+    rng = random.Random(empty_clauses * 2 + skewed)
+    for _ in range(30):
+        instance = _random_instance(rng, empty_clauses, skewed)
+        assignments = np.array([[rng.randint(0, 1) for _ in range(instance.num_vars)] for _ in range(16)])
+        raw, _, violated = instance.evaluate_batch(assignments)
+        assert instance.formula_matrix.padded != skewed
+        for row, bits in enumerate(assignments):
+            score, _, valid = instance.evaluate(list(bits))
+            assert raw[row] == score
+            assert violated[row] >= empty_clauses
+            assert (violated[row] == 0) == valid
+
+
+def test_only_empty_clauses():
+    instance = MWSATInstance("empty", use_compiled=False,
+                             formula=(2, np.array([1, 2]), np.zeros(3, dtype=np.int32), np.zeros(0, dtype=np.int32)))
+    raw, _, violated = instance.evaluate_batch(np.array([[0, 0], [1, 1]]))
+    assert raw.tolist() == [0, 3]
+    assert violated.tolist() == [2, 2]
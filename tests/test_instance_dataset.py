@@ -0,0 +1,59 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import instance_dataset
+from instance_dataset import InstanceDataset, MANIFEST_NAME
+from benchmarks import generate_instance
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """gen/gen-A with two instances and an opt file for one of them, gen/gen-B with one instance and no opt file"""
+    for subset, names in (("gen-A", [("wgen-01", 10, 40), ("wgen-02", 30, 120)]), ("gen-B", [("wgen-01", 20, 80)])):
+        directory = tmp_path / "gen" / subset
+        directory.mkdir(parents=True)
+        for seed, (name, num_vars, num_clauses) in enumerate(names):
+            generate_instance(str(directory / f"{name}.mwcnf"), num_vars, num_clauses, seed=seed)
+    (tmp_path / "gen" / "gen-A-opt.dat").write_text("gen-02 1234 1 -2 0\n")
+    return str(tmp_path)
+
+
+def test_manifest_round_trip(tree, monkeypatch):
+    dataset = InstanceDataset(tree)
+    assert os.path.exists(os.path.join(tree, MANIFEST_NAME))
+    assert [os.path.relpath(path, tree) for path in dataset.paths] == [
+        os.path.join("gen", "gen-A", "wgen-01.mwcnf"), os.path.join("gen", "gen-A", "wgen-02.mwcnf"),
+        os.path.join("gen", "gen-B", "wgen-01.mwcnf")]
+    assert dataset.frame["Vars"].tolist() == [10, 30, 20]
+    assert dataset.frame["Clauses"].tolist() == [40, 120, 80]
+    assert dataset.frame["Literals"].tolist() == [120, 360, 240]
+    assert np.isnan(dataset.frame["Optimum"][0]) and dataset.frame["Optimum"][1] == 1234
+
+    # a warm open parses nothing and gives the same frame
+    def no_parsing(path):
+        raise AssertionError(f"{path} parsed again")
+    monkeypatch.setattr(instance_dataset, "_index_instance", no_parsing)
+    reopened = InstanceDataset(tree)
+    pd.testing.assert_frame_equal(reopened.frame, dataset.frame, check_dtype=False)
+
+    # a changed file is the only one indexed again
+    monkeypatch.undo()
+    indexed = []
+    index = instance_dataset._index_instance
+    monkeypatch.setattr(instance_dataset, "_index_instance", lambda path: indexed.append(path) or index(path))
+    with open(dataset.paths[2], 'a') as f:
+        f.write("c appended comment\n")
+    InstanceDataset(tree)
+    assert indexed == [dataset.paths[2]]
+
+
+def test_select_filters(tree):
+    dataset = InstanceDataset(tree)
+    assert len(dataset.select(family="gen")) == 3
+    assert dataset.select(subset="gen-B").frame["Vars"].tolist() == [20]
+    assert dataset.select(subset=["gen-A", "gen-B"], min_vars=15, max_vars=25).frame["Set"].tolist() == ["gen-B"]
+    assert dataset.select(with_optimum=True).solutions() == {"wgen-02": 1234}
+    assert dataset.select(largest=2).frame["Vars"].tolist() == [30, 20]
+    assert dataset.select(smallest=1, by="Clauses").frame["Vars"].tolist() == [10]
+    assert dataset.select(query="Clauses > 50 and Set == 'gen-A'").frame["Vars"].tolist() == [30]
@@ -0,0 +1,109 @@
+import bz2
+import gzip
+import lzma
+import pytest
+from mwcnf_parser import parse_mwcnf
+
+TEXT = """c small instance
+c with comments
+p mwcnf 4 3
+w 10 0 30 40 0
+1 -2 3 0
+-4 2 0
+3 -1 4 -2 0
+%
+0
+"""
+
+
+def _write(tmp_path, text, name="test.mwcnf"):
+    path = tmp_path / name
+    path.write_bytes(text.encode() if isinstance(text, str) else text)
+    return str(path)
+
+
+def _clauses(parsed):
+    offsets = parsed.clause_offsets.tolist()
+    literals = parsed.literals.tolist()
+    return [literals[offsets[i]:offsets[i + 1]] for i in range(parsed.num_clauses)]
+
+
+def test_parses_header_weights_and_clauses(tmp_path):
+    parsed = parse_mwcnf(_write(tmp_path, TEXT))
+    assert parsed.num_vars == 4
+    assert parsed.weights.tolist() == [10, 0, 30, 40] # 0 weight kept, terminator cut
+    assert _clauses(parsed) == [[1, -2, 3], [-4, 2], [3, -1, 4, -2]]
+    assert parsed.problems == []
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 16, 64])
+def test_tokens_across_chunk_boundaries(tmp_path, chunk_size):
+    # long numbers and the header line get cut by small chunks at every possible position
+    text = "p mwcnf 3 2\nw 123456 7 890123 0\n-1 2 3\n0 1 -2 0\n"
+    parsed = parse_mwcnf(_write(tmp_path, text), chunk_size=chunk_size)
+    assert parsed.weights.tolist() == [123456, 7, 890123]
+    assert _clauses(parsed) == [[-1, 2, 3], [1, -2]] # clause continued on the next line
+    assert parsed.problems == []
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, lzma.compress, bz2.compress])
+def test_compressed_input(tmp_path, compress):
+    # recognized by magic bytes, not by the suffix
+    parsed = parse_mwcnf(_write(tmp_path, compress(TEXT.encode()), name="test.mwcnf"), chunk_size=8)
+    assert parsed.weights.tolist() == [10, 0, 30, 40]
+    assert _clauses(parsed) == [[1, -2, 3], [-4, 2], [3, -1, 4, -2]]
+    assert parsed.bytes_read == len(TEXT) # uncompressed size
+
+
+def test_weights_over_several_lines(tmp_path):
+    parsed = parse_mwcnf(_write(tmp_path, "p mwcnf 4 1\nw 1 2 0\nw 0 4 0\n1 2 3 4 0\n"))
+    assert parsed.weights.tolist() == [1, 2, 0, 4]
+    assert parsed.problems == []
+
+
+def test_weights_without_terminator(tmp_path):
+    parsed = parse_mwcnf(_write(tmp_path, "p mwcnf 3 1\nw 5 6 0\n1 2 3 0\n"))
+    assert parsed.weights.tolist() == [5, 6, 0] # count matches the header, the last 0 is a weight
+    assert parsed.problems == []
+
+
+def test_missing_weights(tmp_path):
+    parsed = parse_mwcnf(_write(tmp_path, "p mwcnf 3 1\n1 2 3 0\n"))
+    assert parsed.weights.tolist() == []
+    assert parsed.problems == ["header declares 3 variables, found 0 weights"]
+
+
+def test_header_mismatch_lenient_and_strict(tmp_path):
+    path = _write(tmp_path, "p mwcnf 3 5\nw 1 2 3 0\n1 2 0\n-3 0\n")
+    parsed = parse_mwcnf(path)
+    assert parsed.num_clauses == 2
+    assert parsed.problems == ["header declares 5 clauses, found 2"]
+    with pytest.raises(ValueError, match="header declares 5 clauses"):
+        parse_mwcnf(path, strict=True)
+
+
+def test_missing_header(tmp_path):
+    parsed = parse_mwcnf(_write(tmp_path, "w 1 2 0\n1 -2 0\n"))
+    assert parsed.num_vars == 2
+    assert parsed.weights.tolist() == [1, 2]
+    assert parsed.problems == ["missing p mwcnf header"]
+
+
+@pytest.mark.parametrize("line", ["1 x 0", "1 2.5 0", "1 - 2 0", "1 2 -", "1 + 0", "1-2 0"])
+def test_non_integer_tokens(tmp_path, line):
+    with pytest.raises(ValueError, match="unexpected token"):
+        parse_mwcnf(_write(tmp_path, f"p mwcnf 2 1\nw 1 2 0\n{line}\n"))
+
+
+def test_malformed_header(tmp_path):
+    with pytest.raises(ValueError, match="malformed header"):
+        parse_mwcnf(_write(tmp_path, "p mwcnf three 1\nw 1 2 3 0\n1 0\n"))
+
+
+def test_literal_past_declared_vars(tmp_path):
+    path = _write(tmp_path, "p mwcnf 2 1\nw 1 2 0\n1 -3 0\n")
+    parsed = parse_mwcnf(path)
+    assert parsed.num_vars == 2
+    assert parsed.problems == ["variable 3 outside of the declared 2"]
+    with pytest.raises(ValueError, match="variable 3"):
+        parse_mwcnf(path, strict=True)
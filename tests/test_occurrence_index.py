@@ -0,0 +1,66 @@
+import os
+import pytest
+from MWSATInstance import MWSATInstance
+import instance_cache
+from multi_chain_annealing import simulated_annealing_multichain
+from trace_recorders import DecimatedTrace
+from benchmarks import generate_instance
+
+# literals out of variable order, a repeated literal and a tautology
+INSTANCE_TEXT = """c test
+p mwcnf 5 5
+w 3 1 4 1 5 0
+3 -1 2 0
+5 4 -2 0
+-4 -4 1 0
+2 -2 3 0
+-5 3 -1 0
+"""
+def _write_instance(tmp_path):
+    path = tmp_path / "ordered.mwcnf"
+    path.write_text(INSTANCE_TEXT)
+    return str(path)
+
+
+def test_compiled_index_keeps_literal_order(tmp_path):
+    path = _write_instance(tmp_path)
+    text = MWSATInstance(path, use_compiled=False)
+    instance_cache.write_compiled(text, path)
+    compiled = MWSATInstance(path)
+    assert compiled.parse_info is None # really loaded from the .mwbin
+    assert text.occurrences.clause_vars == [(2, 0, 1), (4, 3, 1), (3, 0), (), (4, 2, 0)]
+    assert compiled.occurrences.clause_vars == text.occurrences.clause_vars
+    assert compiled.occurrences.clause_ids == text.occurrences.clause_ids
+    assert compiled.occurrences.signs == text.occurrences.signs
+
+
+def test_multichain_same_with_and_without_compiled_file(tmp_path):
+    path = str(tmp_path / "random.mwcnf")
+    generate_instance(path, 50, 220, seed=3) # literals in random variable order
+    text = MWSATInstance(path, use_compiled=False)
+    instance_cache.write_compiled(text, path)
+    compiled = MWSATInstance(path)
+    # short run, walking unsat clauses (random_flip=False) is where clause_vars order matters
+    params = dict(n_chains=4, P0=0.5, cooling_coefficient=0.5, equilibrium_steps=1, max_steps_without_improvement=2,
+                  fitness_coefficient=1.0, random_flip=False, seed=7, initial_temperature=1.0)
+    chains_text = simulated_annealing_multichain(text, traces=[DecimatedTrace() for _ in range(4)], **params)
+    chains_compiled = simulated_annealing_multichain(compiled, traces=[DecimatedTrace() for _ in range(4)], **params)
+    for (best_text, trace_text), (best_compiled, trace_compiled) in zip(chains_text, chains_compiled):
+        assert list(best_text.variable_values) == list(best_compiled.variable_values)
+        assert list(trace_text) == list(trace_compiled)
+
+
+def test_literal_over_declared_vars_raises(tmp_path):
+    path = tmp_path / "sloppy.mwcnf"
+    path.write_text("p mwcnf 3 2\nw 1 2 3 0\n1 -2 3 0\n2 4 0\n")
+    with pytest.raises(ValueError, match="literal 4"):
+        MWSATInstance(str(path), use_compiled=False, write_compiled=True)
+    assert not os.path.exists(instance_cache.compiled_path(str(path)))
+
+
+def test_clause_lookup_built_on_first_use(tmp_path):
+    path = _write_instance(tmp_path)
+    instance = MWSATInstance(path, use_compiled=False)
+    assert instance.clause_lookup is None
+    assert instance.get_clauses_for_var(-1) == [(3, -1, 2), (-4, -4, 1), (-5, 3, -1)]
+    assert instance.get_clauses_for_var(2) == [(3, -1, 2), (5, 4, -2)] # the tautology is not indexed
@@ -0,0 +1,42 @@
+import os
+import pytest
+from MWSATInstance import MWSATInstance
+import parallel_tempering
+from parallel_tempering import parallel_tempering as run_tempering, temperature_ladder
+from trace_recorders import DecimatedTrace
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "wuf20-91", "wuf20-91-M", "wuf20-01.mwcnf")
+
+
+def test_temperature_ladder_is_geometric():
+    ladder = temperature_ladder(8.0, 1.0, 4)
+    assert ladder == pytest.approx([8.0, 4.0, 2.0, 1.0])
+    assert temperature_ladder(8.0, 1.0, 1) == [1.0]
+
+
+def test_swaps_exchange_states_and_keep_the_ladder(monkeypatch):
+    # every round walks each ladder temperature once, over the same replica objects in some order
+    walks = []
+    walk = parallel_tempering._walk
+
+    def recording_walk(state, fitness, temperature, *args):
+        walks.append((id(state), temperature))
+        return walk(state, fitness, temperature, *args)
+    monkeypatch.setattr(parallel_tempering, "_walk", recording_walk)
+
+    instance = MWSATInstance(DATA_PATH, use_compiled=False)
+    n_replicas = 5
+    trace = DecimatedTrace()
+    best_state, _ = run_tempering(instance, n_replicas, P0=0.8, fitness_coefficient=1.2, max_steps_without_improvement=20,
+                                  initial_temperature=2.0, min_temperature_ratio=0.05, trace=trace, seed=6)
+    ladder = temperature_ladder(2.0, 0.1, n_replicas)
+    rounds = [walks[start:start + n_replicas] for start in range(0, len(walks), n_replicas)]
+    assert len(rounds) == len(trace.values()) > 2
+    replica_ids = {state_id for state_id, _ in rounds[0]}
+    assert len(replica_ids) == n_replicas
+    for walked in rounds:
+        assert [temperature for _, temperature in walked] == ladder
+        assert {state_id for state_id, _ in walked} == replica_ids
+    assert any(a != b for a, b in zip(rounds, rounds[1:])) # states did move along the ladder
+    assert max(trace.swap_rates) > 0
+    assert best_state.current_score == instance.evaluate(best_state.variable_values)[0]
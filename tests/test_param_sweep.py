@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import param_sweep
+from param_sweep import friedman_statistic, friedman_eliminate, _block_costs
+from result_store import run_key
+
+
+def test_friedman_statistic_known_value():
+    # rank sums 4, 9, 11 over 4 blocks: 12 / (4 * 3 * 4) * 218 - 3 * 4 * 4 = 6.5
+    costs = np.array([[1, 2, 3], [1, 2, 3], [1, 3, 2], [1, 2, 3]])
+    statistic, rank_sums, _ = friedman_statistic(costs)
+    assert rank_sums.tolist() == [4, 9, 11]
+    assert abs(statistic - 6.5) < 1e-9
+
+
+def test_friedman_statistic_all_ties():
+    assert friedman_statistic(np.ones((5, 3)))[0] is None
+    assert friedman_eliminate(np.ones((5, 3))) == []
+
+
+def test_friedman_eliminate_keeps_equal_configs():
+    # configs with identical cost distributions are dropped at about alpha, not most of the time
+    rng = np.random.default_rng(0)
+    trials = 400
+    eliminated = sum(bool(friedman_eliminate(rng.normal(size=(10, 4)), alpha=0.05)) for _ in range(trials))
+    assert eliminated / trials < 0.1
+
+
+def test_friedman_eliminate_drops_worse_config():
+    rng = np.random.default_rng(1)
+    costs = rng.normal(size=(20, 3))
+    costs[:, 2] += 3
+    assert friedman_eliminate(costs) == [2]
+
+
+def test_block_costs_separates_subsets_with_same_file_names():
+    params = {"P0": 0.5}
+    rows = []
+    for subset, error in (("M", 0.1), ("N", 0.2)):
+        path = f"/data/wuf20-91/wuf20-91-{subset}/wuf20-01.mwcnf"
+        for config in (0, 1):
+            rows.append({"Instance": "wuf20-01.mwcnf", "Repeat": 0, "Config": config, "Steps": 10,
+                         "Rel_Error": error + config, "Run_Key": run_key(path, params, 0)})
+    costs = _block_costs(pd.DataFrame(rows), [0, 1])
+    assert costs.shape == (2, 2)
+
+
+def _fake_runs(costs_by_p0, fail=False):
+    """Stand-in for run_configs_parallel: cost of a run is costs_by_p0[P0] plus noise, fail returns no runs"""
+    rng = np.random.default_rng(2)
+
+    def run(instance_paths, solutions_dict, configs, n_repeats, max_workers=None, results_path=None,
+            config_columns=None, title=None, first_repeat=0, seed=None):
+        if fail:
+            return pd.DataFrame()
+        rows = []
+        for config_index, params in enumerate(configs):
+            for path in instance_paths:
+                for repeat in range(first_repeat, first_repeat + n_repeats):
+                    rows.append({"Instance": path, "Repeat": repeat, "Config": config_index, "P0": params["P0"],
+                                 "Is_Valid": True, "Score": 1, "Optimum": 1, "Steps": 1, "Time": 0.01,
+                                 "Rel_Error": costs_by_p0[params["P0"]] + rng.normal(0, 0.1),
+                                 "Run_Key": run_key(path, params, repeat, seed)})
+        return pd.DataFrame(rows)
+    return run
+
+
+def test_race_drops_worst_ranked_config_first(monkeypatch):
+    # configs 0 and 1 are both significantly worse than 2, only one may go - it has to be the worst, config 1
+    monkeypatch.setattr(param_sweep, "run_configs_parallel", _fake_runs({0.1: 3.0, 0.2: 5.0, 0.3: 0.0}))
+    configs = [{"P0": 0.1}, {"P0": 0.2}, {"P0": 0.3}]
+    paths = [f"/data/instance{i}.mwcnf" for i in range(10)]
+    summary_rows, _ = param_sweep.race_configs(configs, paths, {}, max_repeats=3, min_survivors=2, seed=1)
+    assert [row["Val"] for row in summary_rows if row["Alive"]] == [0, 2]
+
+
+def test_race_keeps_all_configs_without_complete_blocks(monkeypatch):
+    # every config only finished runs on its own instance (the rest failed), so no block holds all of them
+    run = _fake_runs({0.1: 0.0, 0.2: 1.0, 0.3: 2.0, 0.4: 3.0})
+
+    def partial(instance_paths, solutions_dict, configs, *args, **kwargs):
+        results = run(instance_paths, solutions_dict, configs, *args, **kwargs)
+        own = [instance_paths[config] for config in results["Config"]]
+        return results[results["Instance"] == own].reset_index(drop=True)
+    monkeypatch.setattr(param_sweep, "run_configs_parallel", partial)
+    configs = [{"P0": 0.1}, {"P0": 0.2}, {"P0": 0.3}, {"P0": 0.4}]
+    paths = [f"/data/instance{i}.mwcnf" for i in range(4)]
+    for halving in (True, False):
+        summary_rows, _ = param_sweep.race_configs(configs, paths, {}, max_repeats=3, min_blocks=1, halving=halving,
+                                                   seed=1)
+        assert [row["Alive"] for row in summary_rows] == [True] * 4
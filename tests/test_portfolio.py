@@ -0,0 +1,37 @@
+import multiprocessing
+import os
+import time
+import portfolio
+from portfolio import portfolio_solve
+from instance_dataset import read_optima
+from benchmarks import QUICK_PARAMS
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "wuf20-91")
+DATA_PATH = os.path.join(DATA_DIR, "wuf20-91-M", "wuf20-01.mwcnf")
+
+
+def test_member_stops_on_set_event():
+    stop_event = multiprocessing.Event()
+    stop_event.set()
+    portfolio._init_member(multiprocessing.Value('q', -1), stop_event)
+    row = portfolio._member_task(DATA_PATH, None, 0, QUICK_PARAMS, time.time() + 30, None, None, 1)
+    assert (row["Stop_Reason"], row["Runs"], row["Score"]) == ("cancelled", 0, None)
+
+
+def test_target_cancels_other_members_and_best_is_global():
+    optimum = read_optima(os.path.join(DATA_DIR, "wuf20-91-M-opt.dat"))["wuf20-01"]
+    configs = [QUICK_PARAMS, dict(QUICK_PARAMS, P0=0.5), dict(QUICK_PARAMS, P0=0.3)]
+    start = time.time()
+    best_state, stats = portfolio_solve(DATA_PATH, configs, time_limit=60, target_score=optimum, max_workers=2, seed=1)
+    assert time.time() - start < 60
+    assert [row["Member"] for row in stats] == [0, 1, 2]
+    reasons = [row["Stop_Reason"] for row in stats]
+    assert "target_score" in reasons and set(reasons) <= {"target_score", "cancelled"}
+    # the queued member only got a worker after the target was hit
+    assert (stats[2]["Stop_Reason"], stats[2]["Runs"]) == ("cancelled", 0)
+
+    assert best_state.clauses_satisfied == best_state.instance.num_clauses
+    assert best_state.current_score == optimum
+    assert best_state.current_score == max(row["Score"] for row in stats if row["Is_Valid"])
+    winners = [row for row in stats if row["Winner"]]
+    assert len(winners) == 1 and winners[0]["Score"] == optimum
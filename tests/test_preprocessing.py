@@ -0,0 +1,63 @@
+import itertools
+import random
+import numpy as np
+import pytest
+from MWSATInstance import MWSATInstance
+from preprocessing import preprocess
+
+
+def _brute_force_optimum(instance, expand=None):
+    """Best weight of a valid assignment (None when there is none), assignments are mapped through expand first"""
+    best = None
+    for bits in itertools.product((0, 1), repeat=instance.num_vars):
+        score, _, valid = instance.evaluate(bits)
+        if not valid:
+            continue
+        if expand is not None:
+            score, _, full_valid = expand(bits)
+            assert full_valid # every reduced solution must be a solution of the original
+        if best is None or score > best:
+            best = score
+    return best
+
+
+def _random_instance(rng):
+    """Tiny formulas with units, repeats and zero weights so every rule fires somewhere"""
+    num_vars = rng.randint(1, 9)
+    clauses = [[rng.choice([-1, 1]) * rng.randint(1, num_vars) for _ in range(rng.choice([1, 1, 2, 2, 3, 3, 4]))]
+               for _ in range(rng.randint(0, 14))]
+    weights = np.array([rng.choice([0, 0, 1, 5, 9]) for _ in range(num_vars)])
+    offsets = np.cumsum([0] + [len(clause) for clause in clauses]).astype(np.int32)
+    literals = np.array([lit for clause in clauses for lit in clause], dtype=np.int32)
+    return MWSATInstance("random", use_compiled=False, formula=(num_vars, weights, offsets, literals))
+
+
+@pytest.mark.parametrize("subsumption", [True, False])
+def test_preprocess_keeps_optimum(subsumption):
+    rng = random.Random(1)
+    conflicts = 0
+    for _ in range(200):
+        instance = _random_instance(rng)
+        reduction = preprocess(instance, subsumption=subsumption)
+        optimum = _brute_force_optimum(instance)
+        if reduction.conflict:
+            conflicts += 1
+            assert optimum is None
+            continue
+        reduced_optimum = _brute_force_optimum(reduction.instance,
+                                               expand=lambda bits: instance.evaluate(reduction.expand(bits)))
+        assert reduced_optimum == optimum
+    assert conflicts > 0 # the conflict branch is exercised too
+
+
+def test_fixed_score_matches_expand():
+    rng = random.Random(2)
+    for _ in range(50):
+        instance = _random_instance(rng)
+        reduction = preprocess(instance)
+        if reduction.conflict:
+            continue
+        bits = [rng.randint(0, 1) for _ in range(reduction.instance.num_vars)]
+        reduced_score = reduction.instance.evaluate(bits)[0]
+        assert instance.evaluate(reduction.expand(bits))[0] == reduced_score + reduction.fixed_score
+        assert list(reduction.restrict(reduction.expand(bits))) == bits
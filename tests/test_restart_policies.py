@@ -0,0 +1,64 @@
+import os
+import pytest
+from MWSATInstance import MWSATInstance
+from restart_policies import luby, RestartPolicy, LubyRestarts, GeometricRestarts
+from simulated_annealing import simulated_annealing
+from trace_recorders import NoTrace
+from benchmarks import QUICK_PARAMS
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "wuf20-91", "wuf20-91-M", "wuf20-01.mwcnf")
+
+
+def test_luby_sequence():
+    assert [luby(i) for i in range(1, 16)] == [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8]
+    assert luby(31) == 16 and luby(32) == 1
+
+
+def test_luby_and_geometric_intervals():
+    assert [LubyRestarts(unit=2).interval(k) for k in range(1, 8)] == [2, 2, 4, 2, 2, 4, 8]
+    assert [GeometricRestarts(first=2, factor=1.5).interval(k) for k in range(1, 5)] == [2, 3, 4.5, 6.75]
+
+
+def test_policy_base_is_abstract():
+    with pytest.raises(TypeError):
+        RestartPolicy()
+
+
+class _RecordingRestarts(GeometricRestarts):
+    """Geometric policy that remembers which intervals the solver asked for and how often it restarted"""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.asked = []
+        self.restarted = 0
+
+    def interval(self, k):
+        self.asked.append(k)
+        return super().interval(k)
+
+    def restart_state(self, current_state, best_state, rng=None):
+        self.restarted += 1
+        return super().restart_state(current_state, best_state, rng)
+
+
+def test_restarts_trigger_in_annealing_loop():
+    instance = MWSATInstance(DATA_PATH)
+    params = dict(QUICK_PARAMS, max_steps_without_improvement=1000)
+    policy = _RecordingRestarts(first=0.5, factor=2.0, perturb_fraction=0.1)
+    trace = NoTrace()
+    best_state, _ = simulated_annealing(instance, trace=trace, seed=1, initial_temperature=1.0, restart=policy,
+                                        max_flips=50 * instance.num_clauses, **params)
+    # the solver asks for the next interval after every restart, in order, and each one is twice the last
+    assert trace.restarts == policy.restarted > 1
+    assert policy.asked == list(range(1, trace.restarts + 2))
+    assert best_state.clauses_satisfied == instance.num_clauses
+
+    # growing intervals mean fewer restarts in the same budget than constant ones
+    constant = NoTrace()
+    simulated_annealing(instance, trace=constant, seed=1, initial_temperature=1.0, max_flips=50 * instance.num_clauses,
+                        restart=GeometricRestarts(first=0.5, factor=1.0, perturb_fraction=0.1), **params)
+    assert constant.restarts > trace.restarts
+
+    no_restarts = NoTrace()
+    simulated_annealing(instance, trace=no_restarts, seed=1, initial_temperature=1.0,
+                        max_flips=50 * instance.num_clauses, **params)
+    assert no_restarts.restarts == 0
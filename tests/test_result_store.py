@@ -0,0 +1,51 @@
+import json
+import os
+from benchmarks import QUICK_PARAMS
+from result_store import ResultStore, load_results, run_key
+from worker_utils import run_configs_parallel
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "wuf20-91", "wuf20-91-M", "wuf20-01.mwcnf")
+
+
+def _lines(path):
+    with open(path) as f:
+        return f.readlines()
+
+
+def test_torn_last_line_is_cut_off(tmp_path):
+    path = str(tmp_path / "runs.jsonl")
+    records = [{"Run_Key": run_key(DATA_PATH, QUICK_PARAMS, repeat), "Score": repeat} for repeat in range(3)]
+    text = "".join(json.dumps(record) + "\n" for record in records)
+    with open(path, 'w') as f:
+        f.write(text[:-10]) # crash in the middle of the last record
+
+    with ResultStore(path) as store:
+        assert store.completed == {records[0]["Run_Key"], records[1]["Run_Key"]}
+        assert os.path.getsize(path) == len(text) - len(json.dumps(records[2])) - 1
+        store.append(records[2])
+    assert load_results(path)["Score"].tolist() == [0, 1, 2]
+
+
+def test_resume_runs_only_missing_repeats(tmp_path, capsys):
+    path = str(tmp_path / "runs.jsonl")
+    first = run_configs_parallel([DATA_PATH], {}, [QUICK_PARAMS], n_repeats=3, max_workers=1, results_path=path, seed=1)
+    assert sorted(first["Repeat"]) == [0, 1, 2]
+
+    # keep one finished run and half of the next one, as if the evaluation died while writing
+    lines = _lines(path)
+    with open(path, 'w') as f:
+        f.write(lines[0] + lines[1][:len(lines[1]) // 2])
+    kept = json.loads(lines[0])
+    capsys.readouterr()
+
+    resumed = run_configs_parallel([DATA_PATH], {}, [QUICK_PARAMS], n_repeats=3, max_workers=1, results_path=path,
+                                   seed=1)
+    out = capsys.readouterr().out
+    assert "Total Runs: 2" in out
+    assert "Resuming: 1 runs" in out
+    lines = _lines(path)
+    assert len(lines) == 3 # the kept run was not executed again
+    assert json.loads(lines[0]) == kept
+    assert sorted(json.loads(line)["Repeat"] for line in lines) == [0, 1, 2]
+    # same seed - the runs executed again reproduce the lost records
+    assert sorted(resumed["Score"]) == sorted(first["Score"])
@@ -0,0 +1,19 @@
+import os
+import shutil
+from seeding import path_key, derive_seed
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "wuf20-91")
+
+
+def test_same_name_in_different_subsets_gets_own_stream():
+    paths = [os.path.join(DATA_DIR, f"wuf20-91-{subset}", "wuf20-01.mwcnf") for subset in "MNQR"]
+    keys = [path_key(path) for path in paths]
+    assert len(set(keys)) == len(keys)
+    assert len({derive_seed(1, key, 1, 0) for key in keys}) == len(keys)
+
+
+def test_key_does_not_depend_on_location(tmp_path):
+    path = os.path.join(DATA_DIR, "wuf20-91-M", "wuf20-01.mwcnf")
+    copy = shutil.copy(path, tmp_path / "moved.mwcnf")
+    assert path_key(str(copy)) == path_key(path)
+    assert 0 <= path_key(path) < 2 ** 63
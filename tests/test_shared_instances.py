@@ -0,0 +1,52 @@
+import gc
+import glob
+import os
+import pytest
+from MWSATInstance import MWSATInstance
+from OccurrenceIndex import ArrayRows
+import shared_instances
+from shared_instances import SharedInstanceStore, attach_instance
+from simulated_annealing import simulated_annealing
+from trace_recorders import NoTrace
+from benchmarks import QUICK_PARAMS
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "wuf20-91", "wuf20-91-M")
+
+
+@pytest.fixture
+def store():
+    with SharedInstanceStore() as store:
+        yield store
+        # the test process attached to its own blocks, release the views before the blocks go away
+        shared_instances._attached.clear()
+        gc.collect()
+        for name in list(shared_instances._blocks):
+            shared_instances._blocks.pop(name).close()
+
+
+def test_attached_instances_are_views_with_same_content(store):
+    paths = sorted(glob.glob(os.path.join(DATA_DIR, "*.mwcnf")))[:5] # several instances packed in one block
+    handles = store.add_all(paths)
+    assert len(store.blocks) == 1
+    for path in paths:
+        loaded = MWSATInstance(path, use_compiled=False)
+        attached = attach_instance(path, handles[path])
+        assert isinstance(attached.clauses, ArrayRows)
+        assert isinstance(attached.occurrences.clause_ids, ArrayRows)
+        assert [tuple(clause) for clause in attached.clauses] == loaded.clauses
+        assert list(attached.weights) == loaded.weights
+        assert [list(ids) for ids in attached.occurrences.clause_ids] == loaded.occurrences.clause_ids
+        assert [[bool(sign) for sign in signs] for signs in attached.occurrences.signs] == loaded.occurrences.signs
+        assert [tuple(v) for v in attached.occurrences.clause_vars] == loaded.occurrences.clause_vars
+
+
+def test_attached_instance_runs_like_loaded_one(store):
+    path = sorted(glob.glob(os.path.join(DATA_DIR, "*.mwcnf")))[1]
+    attached = attach_instance(path, store.add(path))
+    loaded = MWSATInstance(path, use_compiled=False)
+    results = []
+    for instance in (attached, loaded):
+        trace = NoTrace()
+        best_state, _ = simulated_annealing(instance, trace=trace, seed=3, initial_temperature=1.0, **QUICK_PARAMS)
+        results.append((list(best_state.variable_values), best_state.current_score, trace.total_steps))
+    assert results[0] == results[1]
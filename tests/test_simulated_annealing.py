@@ -0,0 +1,89 @@
+import os
+import pytest
+from MWSATInstance import MWSATInstance
+from run_stats import RunStats
+from simulated_annealing import simulated_annealing, simulated_annealing_iter, calibrate_initial_temperature
+from temperature_calibration import TemperatureCalibrationCache
+from trace_recorders import FullTrace, NoTrace, DecimatedTrace, RingBufferTrace
+from benchmarks import QUICK_PARAMS
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "wuf20-91", "wuf20-91-M", "wuf20-01.mwcnf")
+
+
+def _run(instance, stats, seed):
+    trace = FullTrace()
+    best_state, _ = simulated_annealing(instance, trace=trace, seed=seed, initial_temperature=1.0, stats=stats,
+                                        **QUICK_PARAMS)
+    return list(best_state.variable_values), best_state.current_score, trace.total_steps, trace.values()
+
+
+@pytest.mark.parametrize("sample_phases", [False, True])
+def test_instrumented_loop_matches_plain_one(sample_phases):
+    # stats=None runs a separate copy of the step loop, both copies have to walk the same trajectory
+    instance = MWSATInstance(DATA_PATH, use_compiled=False)
+    for seed in range(3):
+        stats = RunStats(sample_phases=sample_phases)
+        plain = _run(instance, None, seed)
+        instrumented = _run(instance, stats, seed)
+        assert instrumented == plain
+        assert stats.total_steps == plain[2]
+        assert 0 < stats.accepted <= stats.total_steps
+        assert stats.metropolis >= 0 and stats.greedy > 0
+        assert sum(stats.level_steps) == stats.total_steps
+
+
+def test_calibrated_temperature_shared_between_seeds():
+    # the cache key has no seed: the first run calibrates, later seeds reuse its temperature without a second walk
+    instance = MWSATInstance(DATA_PATH, use_compiled=False)
+    cache = TemperatureCalibrationCache()
+    temperatures = []
+    for seed in range(3):
+        stats = RunStats()
+        simulated_annealing(instance, trace=FullTrace(), seed=seed, calibration_cache=cache, stats=stats, **QUICK_PARAMS)
+        temperatures.append(stats.level_temperature[0])
+    assert len(set(temperatures)) == 1
+    assert (cache.misses, cache.hits, len(cache)) == (1, 2, 1)
+    # a different calibration seed without the cache walks differently, which is what the cache hides
+    uncached = {calibrate_initial_temperature(instance, QUICK_PARAMS["P0"], QUICK_PARAMS["fitness_coefficient"], seed=seed)
+                for seed in range(3)}
+    assert len(uncached) > 1
+
+
+def test_trace_recorders_keep_their_share_of_the_full_history():
+    instance = MWSATInstance(DATA_PATH, use_compiled=False)
+    traces = {"full": FullTrace(), "none": NoTrace(), "every7": DecimatedTrace(every=7), "levels": DecimatedTrace(),
+              "ring": RingBufferTrace(capacity=50)}
+    stats = RunStats()
+    for name, trace in traces.items():
+        simulated_annealing(instance, trace=trace, seed=4, initial_temperature=1.0,
+                            stats=stats if name == "full" else None, **QUICK_PARAMS)
+    full = traces["full"].values()
+    total_steps = traces["full"].total_steps
+    assert len(full) == total_steps > 50
+    assert all(trace.total_steps == total_steps for trace in traces.values())
+    assert traces["none"].values() == []
+    assert traces["every7"].values() == full[6::7]
+    level_ends = [sum(stats.level_steps[:level + 1]) - 1 for level in range(len(stats.level_steps))]
+    assert traces["levels"].values() == [full[step] for step in level_ends]
+    assert traces["ring"].recorded == total_steps
+    assert traces["ring"].values() == full[-50:]
+
+
+def test_anytime_improvements_increase_and_stop_at_flip_budget():
+    instance = MWSATInstance(DATA_PATH, use_compiled=False)
+    params = dict(QUICK_PARAMS, max_steps_without_improvement=1000) # would run far past the budget
+    trace = NoTrace()
+    improvements = simulated_annealing_iter(instance, trace=trace, seed=5, initial_temperature=1.0, max_flips=3000,
+                                            **params)
+    yielded = []
+    try:
+        while True:
+            best_state, steps, _ = next(improvements)
+            yielded.append(((best_state.clauses_satisfied, best_state.current_score), steps))
+    except StopIteration as finished:
+        final_state, _ = finished.value
+    assert len(yielded) > 1
+    assert all(a[0] < b[0] and a[1] < b[1] for a, b in zip(yielded, yielded[1:]))
+    assert yielded[-1][0] == (final_state.clauses_satisfied, final_state.current_score)
+    assert yielded[-1][1] <= 3000
+    assert (trace.total_steps, trace.stop_reason) == (3000, "max_flips")
@@ -0,0 +1,84 @@
+import random
+import numpy as np
+import pytest
+from MWSATInstance import MWSATInstance
+from MWSATSolution import MWSATSolution
+
+
+def _random_instance(rng, num_vars=8, num_clauses=30):
+    """Short clauses with repeated literals, tautologies and duplicate clauses mixed in"""
+    clauses = []
+    for _ in range(num_clauses):
+        clause = [rng.choice([-1, 1]) * rng.randint(1, num_vars) for _ in range(rng.randint(1, 4))]
+        kind = rng.random()
+        if kind < 0.15:
+            clause.append(-clause[0]) # tautology
+        elif kind < 0.3:
+            clause.append(clause[-1]) # repeated literal
+        clauses.append(clause)
+        if rng.random() < 0.15:
+            clauses.append(rng.sample(clause, len(clause))) # duplicate, literals shuffled
+    offsets = np.cumsum([0] + [len(clause) for clause in clauses]).astype(np.int32)
+    literals = np.array([lit for clause in clauses for lit in clause], dtype=np.int32)
+    weights = np.array([rng.randint(1, 100) for _ in range(num_vars)])
+    return MWSATInstance("random", use_compiled=False, formula=(num_vars, weights, offsets, literals))
+
+
+def _check_state(state):
+    """Compares the incremental state with one recomputed from the assignment"""
+    instance = state.instance
+    values = state.variable_values
+    make = [0] * instance.num_vars
+    breaks = [0] * instance.num_vars
+    unsat = set()
+    for clause_id, clause in enumerate(instance.clauses):
+        literals = set(clause)
+        if any(-lit in literals for lit in literals):
+            assert state.satisfied_in_clause[clause_id] == 1
+            continue
+        true_vars = [abs(lit) for lit in literals if (lit > 0) == values[abs(lit) - 1]]
+        xor = 0
+        for var in true_vars:
+            xor ^= var
+        assert state.satisfied_in_clause[clause_id] == len(true_vars)
+        assert state.true_vars_xor[clause_id] == xor
+        if not true_vars:
+            unsat.add(clause_id)
+            for var in {abs(lit) for lit in literals}:
+                make[var - 1] += 1
+        elif len(true_vars) == 1:
+            breaks[true_vars[0] - 1] += 1
+    assert set(state.unsatisfied_clauses) == unsat
+    assert len(state.unsatisfied_clauses) == len(unsat)
+    assert list(state.make_count) == make
+    assert list(state.break_count) == breaks
+    assert state.clauses_satisfied == instance.num_clauses - len(unsat)
+    assert state.current_score == sum(w for w, value in zip(instance.weights, values) if value)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_state_matches_recomputation_after_flips(seed):
+    rng = random.Random(seed)
+    instance = _random_instance(rng)
+    state = MWSATSolution(instance, rng=rng)
+    _check_state(state)
+    for _ in range(200):
+        variable = rng.randint(1, instance.num_vars)
+        sat_delta, score_delta, _ = state.flip_delta(variable)
+        sat_before, score_before = state.clauses_satisfied, state.current_score
+        state.update_variable_and_score(variable)
+        assert state.clauses_satisfied == sat_before + sat_delta
+        assert state.current_score == score_before + score_delta
+        _check_state(state)
+
+
+def test_copy_is_independent():
+    rng = random.Random(1)
+    instance = _random_instance(rng)
+    state = MWSATSolution(instance, rng=rng)
+    copy = state.copy()
+    for variable in range(1, instance.num_vars + 1):
+        state.update_variable_and_score(variable)
+    _check_state(state)
+    _check_state(copy)
+    assert copy.variable_values != state.variable_values
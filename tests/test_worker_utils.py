@@ -0,0 +1,47 @@
+import math
+import os
+from benchmarks import QUICK_PARAMS
+from worker_utils import _worker_task, plan_chunks, run_configs_parallel
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "wuf20-91", "wuf20-91-M", "wuf20-01.mwcnf")
+
+
+def test_unknown_optimum_does_not_fail_runs():
+    records = _worker_task(DATA_PATH, QUICK_PARAMS, 0, 2, base_seed=1)
+    assert len(records) == 2
+    for record in records:
+        assert not record["Success"]
+        assert math.isnan(record["Rel_Error"]) if record["Is_Valid"] else record["Rel_Error"] == 1.0
+
+
+def test_sweep_without_solutions_returns_every_config():
+    configs = [dict(QUICK_PARAMS, P0=0.5), dict(QUICK_PARAMS, P0=0.9)]
+    results = run_configs_parallel([DATA_PATH], {}, configs, n_repeats=1, max_workers=1, config_columns=["P0"], seed=1)
+    assert sorted(results["P0"]) == [0.5, 0.9]
+
+
+def test_plan_chunks_longest_first_and_covers_every_repeat(tmp_path):
+    paths = []
+    for name, size in (("small", 1000), ("medium", 4000), ("large", 16000)):
+        path = tmp_path / f"{name}.mwcnf"
+        path.write_bytes(b"x" * size)
+        paths.append(str(path))
+    pending = {(path, config): list(range(5, 45)) for path in paths for config in (0, 1)}
+    pending[(paths[0], 2)] = [] # finished job, no chunk
+    n_workers, tasks_per_worker = 3, 4
+    chunks, sizes = plan_chunks(pending, n_workers, tasks_per_worker)
+
+    costs = [sizes[path] * len(repeats) for (path, _), repeats in chunks]
+    assert costs == sorted(costs, reverse=True)
+    covered = {}
+    for job, repeats in chunks:
+        covered.setdefault(job, []).extend(repeats)
+    assert {job: sorted(repeats) for job, repeats in covered.items()} == {job: r for job, r in pending.items() if r}
+
+    # a chunk costs about total / (workers * tasks_per_worker), rounding may add half a run of its instance
+    target = sum(sizes[path] * len(repeats) for (path, _), repeats in pending.items()) / (n_workers * tasks_per_worker)
+    for (path, _), repeats in chunks:
+        assert 1 <= len(repeats) <= 40
+        assert len(repeats) == 1 or sizes[path] * len(repeats) <= target + sizes[path] / 2
+    chunk_lengths = {path: max(len(repeats) for (p, _), repeats in chunks if p == path) for path in paths}
+    assert chunk_lengths[paths[0]] == 40 > chunk_lengths[paths[1]] > chunk_lengths[paths[2]] # small ones in one chunk